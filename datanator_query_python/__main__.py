@@ -7,7 +7,10 @@
 """
 
 import cement
-from datanator_query_python.util import mongo_util
+import json
+import pymongo
+import sys
+from datanator_query_python.util import mongo_util, client_registry
 from datanator_query_python.config import config
 import datanator_query_python
 
@@ -102,6 +105,221 @@ class DefineSchema(cement.Controller):
         print("done")
 
 
+class Benchmark(cement.Controller):
+    """Benchmark query methods on synthetic data. """
+
+    class Meta:
+        label = 'benchmark'
+        description = 'Time query methods against synthetic collections in a local mongod or mongomock'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--scale', '-s'], dict(
+                type=int, default=10000,
+                help='Number of synthetic uniprot documents (other collections scale with it).')),
+            (['--seed'], dict(
+                type=int, default=0, help='Random seed of the synthetic data.')),
+            (['--clade-depth'], dict(
+                type=int, default=1,
+                help="Nested 'no rank' clades in the synthetic taxonomy; 25 gives lineages of 32 ancestors.")),
+            (['--repeat', '-r'], dict(
+                type=int, default=20, help='Calls per benchmarked method.')),
+            (['--uri'], dict(
+                type=str, default=None,
+                help='Connection string of a local mongod; mongomock is used if omitted.')),
+            (['--skip-load'], dict(
+                action='store_true', help='Reuse data loaded by a previous run (mongod only).')),
+            (['--output', '-o'], dict(
+                type=str, default=None, help='Write the JSON report to this file.')),
+            (['--baseline', '-b'], dict(
+                type=str, default=None, help='JSON report to compare median latencies with.')),
+            (['--micro'], dict(
+                action='store_true', help='Run the micro benchmarks of in-process helpers instead (no database).'))
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        from datanator_query_python.benchmark import runner
+        if args.micro:
+            from datanator_query_python.benchmark import micro
+            print(runner.dump(micro.run(repeat=args.repeat), args.output))
+            return
+        report = runner.run(scale=args.scale, seed=args.seed, uri=args.uri,
+                            repeat=args.repeat, skip_load=args.skip_load, clade_depth=args.clade_depth)
+        text = runner.dump(report, args.output)
+        if args.baseline is None:
+            print(text)
+        else:
+            with open(args.baseline) as f:
+                base = json.load(f)
+            for name, ratio in sorted(runner.compare(base, report).items()):
+                print('{}\t{:.3f}'.format(name, ratio))
+
+
+class ExplainAudit(cement.Controller):
+    """Explain the queries of the query methods and flag plans that miss indexes. """
+
+    class Meta:
+        label = 'explain-audit'
+        description = 'Flag COLLSCANs, in-memory sorts and high docs examined/returned ratios in query plans'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--db'], dict(
+                type=str, default='datanator', help='Target database.')),
+            (['--uri'], dict(
+                type=str, default=None, help='Connection string; the config class credentials are used if omitted.')),
+            (['--config_name', '-cn'], dict(
+                type=str, default='TestConfig',
+                help='Config class to be used.')),
+            (['--method', '-m'], dict(
+                action='append', default=None, help='Audit only this query method (repeatable).')),
+            (['--max-ratio'], dict(
+                type=float, default=10.0, help='Max documents examined per document returned.')),
+            (['--json'], dict(
+                action='store_true', help='Print the results as JSON.'))
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        from datanator_query_python.util import explain_audit
+        if args.uri is not None:
+            client = pymongo.MongoClient(args.uri)
+        else:
+            conf = getattr(config, args.config_name)
+            client = mongo_util.MongoUtil(MongoDB=conf.SERVER,
+                                          db=args.db,
+                                          username=conf.USERNAME,
+                                          password=conf.PASSWORD).client
+        results = explain_audit.run(client, db=args.db, names=args.method, max_ratio=args.max_ratio)
+        if args.json:
+            print(json.dumps(results, indent=2, sort_keys=True))
+        else:
+            print(explain_audit.report(results))
+        if any(r.get('problems') for r in results):
+            self.app.exit_code = 1
+
+
+class OrthologSummary(cement.Controller):
+    """Materialize per-ortholog-group abundance summaries. """
+
+    class Meta:
+        label = 'ortholog-summary'
+        description = 'Build or refresh the ortholog_abundance_summary collection from uniprot with $merge'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--db'], dict(
+                type=str, default='datanator', help='Target database.')),
+            (['--uri'], dict(
+                type=str, default=None, help='Connection string; the config class credentials are used if omitted.')),
+            (['--config_name', '-cn'], dict(
+                type=str, default='TestConfig',
+                help='Config class to be used.')),
+            (['--refresh'], dict(
+                action='store_true', help='Rebuild only the groups touched since the previous run.')),
+            (['--group-type', '-g'], dict(
+                action='append', default=None, choices=['ko_number', 'orthodb_id'],
+                help='Summarize only this group type (repeatable).'))
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        from datanator_query_python.aggregate import ortholog_summary
+        if args.uri is not None:
+            client_registry.set_override(pymongo.MongoClient(args.uri))
+            summary = ortholog_summary.OrthologSummary(db=args.db)
+        else:
+            conf = getattr(config, args.config_name)
+            summary = ortholog_summary.OrthologSummary(MongoDB=conf.SERVER, db=args.db,
+                                                       username=conf.USERNAME, password=conf.PASSWORD)
+        group_types = tuple(args.group_type or ortholog_summary.GROUPS)
+        if args.refresh:
+            result = summary.refresh(group_types=group_types)
+        else:
+            result = summary.build(group_types=group_types)
+        print(json.dumps(result, indent=2, sort_keys=True, default=str))
+
+
+class CollectionStats(cement.Controller):
+    """Store the collection statistics served by the query classes. """
+
+    class Meta:
+        label = 'collection-stats'
+        description = 'Count the distinct proteins, organisms, ... of the data collections into collection_stats'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--db'], dict(
+                type=str, default='datanator', help='Target database.')),
+            (['--uri'], dict(
+                type=str, default=None, help='Connection string; the config class credentials are used if omitted.')),
+            (['--config_name', '-cn'], dict(
+                type=str, default='TestConfig',
+                help='Config class to be used.')),
+            (['--collection', '-c'], dict(
+                action='append', default=None,
+                choices=['uniprot', 'sabio_rk_old', 'metabolites_meta'],
+                help='Count only the statistics of this collection (repeatable).'))
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        from datanator_query_python.util import collection_stats
+        if args.uri is not None:
+            client = pymongo.MongoClient(args.uri)
+        else:
+            conf = getattr(config, args.config_name)
+            client = mongo_util.MongoUtil(MongoDB=conf.SERVER, db=args.db, username=conf.USERNAME,
+                                          password=conf.PASSWORD).client
+        result = collection_stats.refresh_all(client[args.db], collections=args.collection)
+        print(json.dumps(result, indent=2, sort_keys=True))
+
+
+class TaxonIntervals(cement.Controller):
+    """Label taxon_tree with nested intervals and denormalize the labels. """
+
+    class Meta:
+        label = 'taxon-intervals'
+        description = 'Assign pre-order left/right labels to taxon_tree and copy them onto the observation collections'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--db'], dict(
+                type=str, default='datanator', help='Target database.')),
+            (['--uri'], dict(
+                type=str, default=None, help='Connection string; the config class credentials are used if omitted.')),
+            (['--config_name', '-cn'], dict(
+                type=str, default='TestConfig',
+                help='Config class to be used.')),
+            (['--no-relabel'], dict(
+                action='store_true', help='Reuse the labels stored in taxon_tree instead of relabelling it.')),
+            (['--collection', '-c'], dict(
+                action='append', default=None,
+                choices=['uniprot', 'sabio_rk_old', 'rna_halflife_new', 'metabolite_concentrations'],
+                help='Denormalize the labels onto this collection only (repeatable).'))
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        from datanator_query_python.aggregate import taxon_intervals
+        if args.uri is not None:
+            client_registry.set_override(pymongo.MongoClient(args.uri))
+            intervals = taxon_intervals.TaxonIntervals(db=args.db)
+        else:
+            conf = getattr(config, args.config_name)
+            intervals = taxon_intervals.TaxonIntervals(MongoDB=conf.SERVER, db=args.db,
+                                                       username=conf.USERNAME, password=conf.PASSWORD)
+        result = intervals.run(collections=tuple(args.collection or taxon_intervals.TARGETS),
+                               relabel=not args.no_relabel)
+        print(json.dumps(result, indent=2, sort_keys=True))
+
+
 class App(cement.App):
     """ Command line application """
     class Meta:
@@ -109,13 +327,20 @@ class App(cement.App):
         base_controller = 'base'
         handlers = [
             BaseController,
-            DefineSchema
+            DefineSchema,
+            Benchmark,
+            ExplainAudit,
+            OrthologSummary,
+            CollectionStats,
+            TaxonIntervals
         ]
 
 
 def main():
     with App() as app:
         app.run()
+    if app.exit_code:
+        sys.exit(app.exit_code)
 
 if __name__=='__main__':
     main()
\ No newline at end of file
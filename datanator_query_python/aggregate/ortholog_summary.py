@@ -0,0 +1,205 @@
+"""Materialize per-ortholog-group summaries of the uniprot collection into
+the ortholog_abundance_summary collection.
+
+There is one summary document per KEGG orthology (ko_number) and per OrthoDB
+(orthodb_id) group. It holds the group's members (uniprot id, species and
+whether the protein has abundances), the group's species and statistics of
+its abundance values, so the by-KO and by-OrthoDB queries read one document
+instead of scanning every protein of the group. The documents are written
+server side with $merge (MongoDB >= 4.2).
+
+A refresh rebuilds only the groups touched since the previous run: groups of
+the proteins modified (modified_field) or inserted (ObjectId _id) since then,
+and the groups those proteins belonged to at the previous run. Deleted
+proteins leave no trace to find them by, so only a full build drops them.
+"""
+import datetime
+from bson.objectid import ObjectId
+from pymongo import ASCENDING
+from datanator_query_python.util import mongo_util
+
+
+# group field -> group name field of uniprot documents
+GROUPS = {'ko_number': 'ko_name', 'orthodb_id': 'orthodb_name'}
+STATE_ID = 'refresh_state'
+
+
+def summary_id(group_type, group_id):
+    """_id of the summary document of a group.
+
+    Args:
+        group_type (:obj:`str`): 'ko_number' or 'orthodb_id'.
+        group_id (:obj:`str`): KO number or OrthoDB id, as stored in uniprot.
+
+    Return:
+        (:obj:`dict`)
+    """
+    return {'group_type': group_type, 'group_id': group_id}
+
+
+class OrthologSummary(mongo_util.MongoUtil):
+
+    def __init__(self, MongoDB=None, db='datanator', username=None, password=None,
+                 authSource='admin', readPreference='primary', replicaSet=None, options=None,
+                 source='uniprot', summary='ortholog_abundance_summary', modified_field='last_modified'):
+        super().__init__(MongoDB=MongoDB, db=db, username=username, password=password,
+                         authSource=authSource, readPreference=readPreference,
+                         replicaSet=replicaSet, options=options)
+        self.source = self.db_obj[source]
+        self.summary = self.db_obj[summary]
+        self.modified_field = modified_field
+
+    @staticmethod
+    def pipeline(group_type, into, refreshed_at, group_ids=None):
+        """Pipeline summarizing the groups of one type and merging them into a collection.
+
+        Abundance values are converted to double, non numeric and non finite
+        values are left out of the statistics.
+
+        Args:
+            group_type (:obj:`str`): 'ko_number' or 'orthodb_id'.
+            into (:obj:`str`): name of the summary collection.
+            refreshed_at (:obj:`datetime.datetime`): time stamp of the run.
+            group_ids (:obj:`list` of :obj:`str`, optional): summarize only these groups. Defaults to None (all).
+
+        Return:
+            (:obj:`list` of :obj:`dict`)
+        """
+        if group_ids is None:
+            match = {group_type: {'$type': 'string'}}
+        else:
+            match = {group_type: {'$in': list(group_ids)}}
+        values = {'$filter': {'input': {'$map': {'input': {'$ifNull': ['$abundances', []]}, 'as': 'a',
+                                                 'in': {'$convert': {'input': '$$a.abundance', 'to': 'double',
+                                                                     'onError': None, 'onNull': None}}}},
+                              'as': 'v',
+                              'cond': {'$and': [{'$gt': ['$$v', float('-inf')]}, {'$lt': ['$$v', float('inf')]}]}}}
+        return [{'$match': match},
+                {'$project': {'_id': 0, 'group_id': '$' + group_type, 'group_name': '$' + GROUPS[group_type],
+                              'uniprot_id': 1, 'ncbi_taxonomy_id': 1, 'species_name': 1,
+                              'has_abundances': {'$ne': [{'$type': '$abundances'}, 'missing']},
+                              'values': values}},
+                {'$group': {'_id': {'group_type': group_type, 'group_id': '$group_id'},
+                            'group_name': {'$first': '$group_name'},
+                            'members': {'$push': {'uniprot_id': '$uniprot_id',
+                                                  'ncbi_taxonomy_id': '$ncbi_taxonomy_id',
+                                                  'species_name': '$species_name',
+                                                  'abundances': '$has_abundances',
+                                                  'n_abundances': {'$size': '$values'}}},
+                            'species': {'$addToSet': '$ncbi_taxonomy_id'},
+                            'n_members': {'$sum': 1},
+                            'n_with_abundances': {'$sum': {'$cond': ['$has_abundances', 1, 0]}},
+                            'n_abundances': {'$sum': {'$size': '$values'}},
+                            'abundance_sum': {'$sum': {'$sum': '$values'}},
+                            'abundance_min': {'$min': {'$min': '$values'}},
+                            'abundance_max': {'$max': {'$max': '$values'}}}},
+                {'$addFields': {'n_species': {'$size': '$species'},
+                                'abundance_mean': {'$cond': [{'$gt': ['$n_abundances', 0]},
+                                                             {'$divide': ['$abundance_sum', '$n_abundances']},
+                                                             None]},
+                                'refreshed_at': {'$literal': refreshed_at}}},
+                {'$project': {'abundance_sum': 0}},
+                {'$merge': {'into': into, 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}}]
+
+    @staticmethod
+    def _now():
+        # BSON dates have millisecond precision
+        now = datetime.datetime.utcnow()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    def ensure_indexes(self):
+        """Index the summary collection for refresh (groups of a protein).
+        """
+        self.summary.create_index([('members.uniprot_id', ASCENDING)], background=True)
+
+    def last_run(self):
+        """Start time of the previous build or refresh.
+
+        Return:
+            (:obj:`datetime.datetime`): None if the summary was never built.
+        """
+        state = self.summary.find_one({'_id': STATE_ID})
+        return None if state is None else state['last_run']
+
+    def _summarize(self, group_type, refreshed_at, group_ids=None, chunk_size=1000):
+        if group_ids is None:
+            self.source.aggregate(self.pipeline(group_type, self.summary.name, refreshed_at), allowDiskUse=True)
+            stale = {'_id.group_type': group_type, 'refreshed_at': {'$lt': refreshed_at}}
+            self.summary.delete_many(stale)
+            return self.summary.count_documents({'_id.group_type': group_type, 'refreshed_at': refreshed_at})
+        group_ids = sorted(group_ids)
+        for i in range(0, len(group_ids), chunk_size):
+            chunk = group_ids[i:i + chunk_size]
+            self.source.aggregate(self.pipeline(group_type, self.summary.name, refreshed_at, group_ids=chunk),
+                                  allowDiskUse=True)
+            # groups left without members
+            self.summary.delete_many({'_id': {'$in': [summary_id(group_type, g) for g in chunk]},
+                                      'refreshed_at': {'$lt': refreshed_at}})
+        return len(group_ids)
+
+    def touched_groups(self, since, group_types=tuple(GROUPS), chunk_size=1000):
+        """Groups of the proteins modified or inserted since a time, before and after the change.
+
+        Args:
+            since (:obj:`datetime.datetime`): UTC time.
+            group_types (:obj:`tuple` of :obj:`str`, optional): group types. Defaults to all.
+            chunk_size (:obj:`int`, optional): uniprot ids per summary lookup. Defaults to 1000.
+
+        Return:
+            (:obj:`dict`): group type -> set of group ids.
+        """
+        touched = {group_type: set() for group_type in group_types}
+        query = {'$or': [{self.modified_field: {'$gt': since}},
+                         {'_id': {'$gt': ObjectId.from_datetime(since)}}]}
+        projection = dict.fromkeys(('uniprot_id',) + tuple(group_types), 1)
+        uniprot_ids = []
+        for doc in self.source.find(query, projection=projection):
+            uniprot_ids.append(doc.get('uniprot_id'))
+            for group_type in group_types:
+                if isinstance(doc.get(group_type), str):
+                    touched[group_type].add(doc[group_type])
+        for i in range(0, len(uniprot_ids), chunk_size):
+            query = {'members.uniprot_id': {'$in': uniprot_ids[i:i + chunk_size]},
+                     '_id.group_type': {'$in': list(group_types)}}
+            for doc in self.summary.find(query, projection={'_id': 1}):
+                touched[doc['_id']['group_type']].add(doc['_id']['group_id'])
+        return touched
+
+    def build(self, group_types=tuple(GROUPS)):
+        """Summarize every group and drop the summaries of groups that no longer exist.
+
+        Args:
+            group_types (:obj:`tuple` of :obj:`str`, optional): group types. Defaults to all.
+
+        Return:
+            (:obj:`dict`): {'mode': 'build', 'started': ..., 'groups': {group type: groups written}}
+        """
+        started = self._now()
+        self.ensure_indexes()
+        groups = {group_type: self._summarize(group_type, started) for group_type in group_types}
+        self.summary.update_one({'_id': STATE_ID}, {'$set': {'last_run': started, 'mode': 'build'}}, upsert=True)
+        return {'mode': 'build', 'started': started, 'groups': groups}
+
+    def refresh(self, since=None, group_types=tuple(GROUPS), chunk_size=1000):
+        """Summarize only the groups touched since the previous run
+        (a full build if there was none).
+
+        Args:
+            since (:obj:`datetime.datetime`, optional): UTC time overriding the previous run's. Defaults to None.
+            group_types (:obj:`tuple` of :obj:`str`, optional): group types. Defaults to all.
+            chunk_size (:obj:`int`, optional): groups per aggregation. Defaults to 1000.
+
+        Return:
+            (:obj:`dict`): {'mode': 'refresh', 'started': ..., 'since': ..., 'groups': {group type: groups rebuilt}}
+        """
+        if since is None:
+            since = self.last_run()
+            if since is None:
+                return self.build(group_types=group_types)
+        started = self._now()
+        touched = self.touched_groups(since, group_types=group_types, chunk_size=chunk_size)
+        groups = {group_type: self._summarize(group_type, started, group_ids=touched[group_type],
+                                              chunk_size=chunk_size)
+                  for group_type in group_types}
+        self.summary.update_one({'_id': STATE_ID}, {'$set': {'last_run': started, 'mode': 'refresh'}}, upsert=True)
+        return {'mode': 'refresh', 'started': started, 'since': since, 'groups': groups}
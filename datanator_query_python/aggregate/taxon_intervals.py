@@ -0,0 +1,234 @@
+"""Nested-interval labels of the taxon_tree collection, denormalized onto the
+observation collections.
+
+Every taxon_tree node gets a left and a right label: left is its rank in a
+pre-order walk of the tree, right the largest left label in its subtree. A
+node y is then in the subtree of x (x included) iff x.left <= y.left <= x.right,
+so "all data under taxon x" is one range query on an indexed field, instead
+of a match on anc_id arrays. The observation collections carry the left
+label of their organism in taxon_left: at the top level of uniprot and
+sabio_rk_old documents, and in every element of the halflives array of
+rna_halflife_new and of the concentrations array of
+metabolite_concentrations documents.
+
+Labels are positions in the whole tree, so any change of the taxon_tree
+collection (ETL run) invalidates them: :meth:`TaxonIntervals.run` relabels
+the tree and rewrites taxon_left everywhere. Observations of organisms that
+are not in the tree get no taxon_left.
+
+The tree is relabelled before the observation collections are rewritten, so
+until the last collection is done, subtree queries compare new tree labels
+with old taxon_left values and may miss or include wrong observations. Run
+it in the same maintenance window as the taxon_tree ETL.
+"""
+from pymongo import ASCENDING, UpdateMany, UpdateOne
+from datanator_query_python.util import mongo_util, taxonomy_index
+
+
+LEFT = 'left'
+RIGHT = 'right'
+FIELD = 'taxon_left'
+# collection -> (tax id field, array of observations holding it or None)
+TARGETS = {'uniprot': ('ncbi_taxonomy_id', None),
+           'sabio_rk_old': ('taxon_id', None),
+           'rna_halflife_new': ('ncbi_taxonomy_id', 'halflives'),
+           'metabolite_concentrations': ('ncbi_taxonomy_id', 'concentrations')}
+
+
+def interval(taxon_collection, tax_id):
+    """Labels of a taxon.
+
+    Args:
+        taxon_collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+        tax_id (:obj:`int`): tax id.
+
+    Return:
+        (:obj:`tuple` of :obj:`int`): (left, right), None if the taxon is missing or not labelled.
+    """
+    doc = taxon_collection.find_one(filter={'tax_id': tax_id}, projection={'_id': 0, LEFT: 1, RIGHT: 1})
+    if doc is None or LEFT not in doc:
+        return None
+    return doc[LEFT], doc[RIGHT]
+
+
+def subtree_query(labels, field=FIELD, array=None, strict=False):
+    """Query matching the documents labelled within an interval.
+
+    Args:
+        labels (:obj:`tuple` of :obj:`int`): (left, right) of the subtree root.
+        field (:obj:`str`, optional): labelled field. Defaults to 'taxon_left'.
+        array (:obj:`str`, optional): array whose elements hold the field. Defaults to None (top level).
+        strict (:obj:`bool`, optional): leave the subtree root out. Defaults to False.
+
+    Return:
+        (:obj:`dict`)
+    """
+    left, right = labels
+    bounds = {'$gt' if strict else '$gte': left, '$lte': right}
+    if array is None:
+        return {field: bounds}
+    return {array: {'$elemMatch': {field: bounds}}}
+
+
+def in_subtree(labels, left, strict=False):
+    """Whether a left label is within an interval, as :func:`subtree_query` matches it.
+
+    Args:
+        labels (:obj:`tuple` of :obj:`int`): (left, right) of the subtree root.
+        left (:obj:`int`): left label, None if not labelled.
+        strict (:obj:`bool`, optional): leave the subtree root out. Defaults to False.
+
+    Return:
+        (:obj:`bool`)
+    """
+    if left is None:
+        return False
+    if strict:
+        return labels[0] < left <= labels[1]
+    return labels[0] <= left <= labels[1]
+
+
+def iter_subtree_docs(collection, labels, array, projection=None, batch_size=None, limit=0, max_time_ms=None):
+    """Documents of an observation collection with observations in a subtree,
+    keeping only those observations in the array.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): observation collection.
+        labels (:obj:`tuple` of :obj:`int`): (left, right) of the subtree root.
+        array (:obj:`str`): array of observations, e.g. 'halflives'.
+        projection (:obj:`dict`, optional): result projection. Defaults to None.
+        batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+        limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+        max_time_ms (:obj:`int`, optional): server time limit of the query. Defaults to None.
+
+    Return:
+        (:obj:`Generator` of :obj:`dict`)
+    """
+    kwargs = {}
+    if batch_size:
+        kwargs['batch_size'] = batch_size
+    if max_time_ms is not None:
+        kwargs['max_time_ms'] = max_time_ms
+    cursor = collection.find(filter=subtree_query(labels, array=array), projection=projection,
+                             limit=limit, **kwargs)
+    try:
+        for doc in cursor:
+            if array in doc:
+                doc[array] = [e for e in doc[array] if in_subtree(labels, e.get(FIELD))]
+            yield doc
+    finally:
+        cursor.close()
+
+
+class TaxonIntervals(mongo_util.MongoUtil):
+
+    def __init__(self, MongoDB=None, db='datanator', username=None, password=None,
+                 authSource='admin', readPreference='primary', replicaSet=None, options=None,
+                 taxon_tree='taxon_tree', batch_size=1000):
+        super().__init__(MongoDB=MongoDB, db=db, username=username, password=password,
+                         authSource=authSource, readPreference=readPreference,
+                         replicaSet=replicaSet, options=options)
+        self.taxon_tree = self.db_obj[taxon_tree]
+        self.batch_size = batch_size
+
+    def _bulk_write(self, collection, requests):
+        """Write requests in batches.
+
+        Return:
+            (:obj:`int`): number of modified documents.
+        """
+        modified = 0
+        batch = []
+        for request in requests:
+            batch.append(request)
+            if len(batch) == self.batch_size:
+                modified += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            modified += collection.bulk_write(batch, ordered=False).modified_count
+        return modified
+
+    def label_tree(self):
+        """Assign the left and right labels of every taxon_tree node.
+
+        Return:
+            (:obj:`dict`): tax id -> left label.
+        """
+        index = taxonomy_index.TaxonomyIndex.from_collection(self.taxon_tree)
+        tax_ids, left, right = (a.tolist() for a in index.intervals())
+        self._bulk_write(self.taxon_tree, (UpdateOne({'tax_id': t}, {'$set': {LEFT: l, RIGHT: r}})
+                                           for t, l, r in zip(tax_ids, left, right)))
+        self.taxon_tree.create_index([(LEFT, ASCENDING)], background=True)
+        return dict(zip(tax_ids, left))
+
+    def labels(self):
+        """Left labels currently stored in taxon_tree.
+
+        Return:
+            (:obj:`dict`): tax id -> left label.
+        """
+        docs = self.taxon_tree.find(filter={LEFT: {'$exists': True}}, projection={'_id': 0, 'tax_id': 1, LEFT: 1},
+                                    batch_size=10000)
+        return {doc['tax_id']: doc[LEFT] for doc in docs}
+
+    def denormalize(self, name, lefts):
+        """Write taxon_left onto the documents of an observation collection.
+
+        Collections with one organism per document are updated with one
+        update_many per organism; the observation arrays are rewritten
+        document by document.
+
+        Args:
+            name (:obj:`str`): collection name, a key of :data:`TARGETS`.
+            lefts (:obj:`dict`): tax id -> left label.
+
+        Return:
+            (:obj:`int`): number of modified documents.
+        """
+        collection = self.db_obj[name]
+        tax_field, array = TARGETS[name]
+        if array is None:
+            tax_ids = [doc['_id'] for doc in collection.aggregate([{'$group': {'_id': '$' + tax_field}}],
+                                                                   allowDiskUse=True)]
+            requests = (UpdateMany({tax_field: t}, {'$set': {FIELD: lefts[t]}}) if t in lefts else
+                        UpdateMany({tax_field: t}, {'$unset': {FIELD: ''}})
+                        for t in tax_ids)
+            path = FIELD
+        else:
+            requests = (UpdateOne({'_id': doc['_id']}, {'$set': {array: self._label_array(doc[array], tax_field, lefts)}})
+                        for doc in collection.find(filter={array: {'$type': 'array'}}, projection={array: 1},
+                                                   batch_size=self.batch_size))
+            path = '{}.{}'.format(array, FIELD)
+        modified = self._bulk_write(collection, requests)
+        collection.create_index([(path, ASCENDING)], background=True)
+        return modified
+
+    @staticmethod
+    def _label_array(elements, tax_field, lefts):
+        labelled = []
+        for element in elements:
+            element = dict(element)
+            left = lefts.get(element.get(tax_field))
+            if left is None:
+                element.pop(FIELD, None)
+            else:
+                element[FIELD] = left
+            labelled.append(element)
+        return labelled
+
+    def run(self, collections=tuple(TARGETS), relabel=True):
+        """Label the tree, then denormalize the labels. Subtree queries are
+        inconsistent while this runs (see the module documentation).
+
+        Args:
+            collections (:obj:`Iterable` of :obj:`str`, optional): observation collections. Defaults to all of :data:`TARGETS`.
+            relabel (:obj:`bool`, optional): relabel the tree first, else reuse its stored labels. Defaults to True.
+
+        Return:
+            (:obj:`dict`): number of labelled taxa and of modified documents per collection.
+        """
+        lefts = self.label_tree() if relabel else self.labels()
+        result = {'taxon_tree': len(lefts)}
+        for name in collections:
+            result[name] = self.denormalize(name, lefts)
+        return result
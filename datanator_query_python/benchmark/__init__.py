@@ -0,0 +1,2 @@
+"""Offline benchmarks of the query classes on synthetic data.
+"""
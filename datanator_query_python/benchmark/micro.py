@@ -0,0 +1,220 @@
+"""Micro benchmarks of the in-process helpers the query methods spend their
+CPU time in. Unlike :mod:`runner`, they need no database (canon_rank_distance
+reads an in-process mongomock collection).
+
+Every benchmark times the current implementation against the one it
+replaced and reports both, plus the speedup.
+"""
+import copy
+import random
+import time
+import types
+import simplejson as json
+from datanator_query_python.benchmark.synthetic import ORGANS, SyntheticData
+from datanator_query_python.query.query_protein import QueryProtein
+from datanator_query_python.query.query_taxon_tree import QueryTaxonTree
+from datanator_query_python.util import client_registry, file_util, nan_util, rank_service, taxonomy_index
+
+
+def _best_ms(func, make_args, repeat):
+    """Best of repeat calls, with fresh arguments per call (not timed).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def _protein_docs(n_docs, n_abundances, seed=0):
+    """uniprot documents with large abundances arrays and some NaN masses and abundances.
+    """
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n_docs):
+        docs.append({'uniprot_id': 'Q{:08d}'.format(i),
+                     'protein_name': 'Synthetic protein {}'.format(i),
+                     'mass': float('nan') if i % 10 == 0 else rng.uniform(5e3, 2e5),
+                     'length': rng.randint(50, 2000),
+                     'canon_anc_ids': list(range(7)),
+                     'abundances': [{'organ': rng.choice(ORGANS),
+                                     'abundance': float('nan') if rng.random() < 0.01 else rng.lognormvariate(2, 2),
+                                     'file_name': 'synthetic_{}.txt'.format(j % 50)}
+                                    for j in range(n_abundances)]})
+    return docs
+
+
+def sanitize(n_docs=50, n_abundances=2000, repeat=5, seed=0):
+    """Replacing NaN in protein documents: json round trip vs nan_util.replace_nan.
+
+    Args:
+        n_docs (:obj:`int`, optional): documents per call. Defaults to 50.
+        n_abundances (:obj:`int`, optional): abundances per document. Defaults to 2000.
+        repeat (:obj:`int`, optional): calls per implementation, the best is kept. Defaults to 5.
+        seed (:obj:`int`, optional): random seed. Defaults to 0.
+
+    Return:
+        (:obj:`dict`)
+    """
+    docs = _protein_docs(n_docs, n_abundances, seed=seed)
+
+    def round_trip(docs):
+        return [json.loads(json.dumps(doc, ignore_nan=True)) for doc in docs]
+
+    def in_place(docs):
+        return [nan_util.replace_nan(doc) for doc in docs]
+
+    assert round_trip(docs) == in_place(copy.deepcopy(docs))
+    old = _best_ms(round_trip, lambda: (copy.deepcopy(docs),), repeat)
+    new = _best_ms(in_place, lambda: (copy.deepcopy(docs),), repeat)
+    return {'n_docs': n_docs, 'n_abundances': n_abundances,
+            'json_round_trip_ms': old, 'replace_nan_ms': new,
+            'speedup': round(old / max(new, 1e-3), 2)}
+
+
+def canon_distances(n_species=5000, repeat=5, seed=0):
+    """Canonical ancestor distances of an OrthoDB group's species to the anchor
+    in get_all_ortho: one _get_common_canon_anc call per species vs
+    QueryProtein._canon_distances.
+
+    Args:
+        n_species (:obj:`int`, optional): species in the group. Defaults to 5000.
+        repeat (:obj:`int`, optional): calls per implementation, the best is kept. Defaults to 5.
+        seed (:obj:`int`, optional): random seed. Defaults to 0.
+
+    Return:
+        (:obj:`dict`)
+    """
+    data = SyntheticData(scale=n_species * 100, seed=seed)
+    anchor = data.species[0]
+    names = [species['tax_name'] for species in data.species]
+    canon_ancs = [species['canon_anc_names'] for species in data.species]
+    # both only need the instance's file_manager and _get_common_canon_anc
+    owner = types.SimpleNamespace(file_manager=file_util.FileUtil())
+    owner._get_common_canon_anc = types.MethodType(QueryProtein._get_common_canon_anc, owner)
+
+    def per_species(names, canon_ancs):
+        return [QueryProtein._get_common_canon_anc(owner, anchor['tax_name'], name, anchor['canon_anc_names'],
+                                                   canon_anc)[anchor['tax_name']]
+                for name, canon_anc in zip(names, canon_ancs)]
+
+    def vectorized(names, canon_ancs):
+        return QueryProtein._canon_distances(owner, anchor['tax_name'], names, anchor['canon_anc_names'],
+                                             canon_ancs).tolist()
+
+    assert per_species(names, canon_ancs) == vectorized(names, canon_ancs)
+    old = _best_ms(per_species, lambda: (names, canon_ancs), repeat)
+    new = _best_ms(vectorized, lambda: (names, canon_ancs), repeat)
+    return {'n_species': len(names),
+            'per_species_ms': old, 'vectorized_ms': new,
+            'speedup': round(old / max(new, 1e-3), 2)}
+
+
+class _CountingCollection:
+    """Collection proxy counting find and find_one calls, i.e. database round trips.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, *args, **kwargs):
+        self.calls += 1
+        return self._collection.find(*args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        self.calls += 1
+        return self._collection.find_one(*args, **kwargs)
+
+
+def canon_rank_distance(n_lineages=20, clade_depth=25, scale=20000, repeat=5, seed=0):
+    """Canonical rank distances of deep lineages (32 ancestors with the default
+    clade_depth, as deep as the human one): one find_one per ancestor vs one
+    $in per lineage in QueryTaxonTree.get_canon_rank_distance vs the taxonomy
+    index. mongomock answers every query in-process, so the database calls per
+    lineage, not the milliseconds, tell what a remote server would see.
+
+    Args:
+        n_lineages (:obj:`int`, optional): lineages per call. Defaults to 20.
+        clade_depth (:obj:`int`, optional): nested 'no rank' clades, see :class:`SyntheticData`. Defaults to 25.
+        scale (:obj:`int`, optional): scale of the synthetic data; only the taxonomy is loaded,
+        20000 gives 81 deep lineages. Defaults to 20000.
+        repeat (:obj:`int`, optional): calls per implementation, the best is kept. Defaults to 5.
+        seed (:obj:`int`, optional): random seed. Defaults to 0.
+
+    Return:
+        (:obj:`dict`)
+    """
+    import mongomock
+    data = SyntheticData(scale=scale, seed=seed, clade_depth=clade_depth)
+    client = mongomock.MongoClient()
+    client['datanator-test']['taxon_tree'].insert_many(list(data.taxon_tree()))
+    deepest = sorted(data.species, key=lambda s: -len(s['anc_id']))[:n_lineages]
+    ids = [s['tax_id'] for s in deepest]
+    previous = client_registry.set_override(client)
+    try:
+        batched = QueryTaxonTree(MongoDB='benchmark')
+        indexed = QueryTaxonTree(MongoDB='benchmark', use_taxonomy_index=True, taxonomy_index_names=True)
+    finally:
+        client_registry.set_override(previous)
+    batched.collection = _CountingCollection(batched.collection)
+    indexed.collection = _CountingCollection(indexed.collection)
+    # the process-wide caches are keyed by collection name, drop those of other clients
+    rank_service.default.clear(batched.collection)
+    taxonomy_index.refresh(indexed.collection, names=True)
+    roi = taxonomy_index.CANON_RANKS
+
+    def per_ancestor(collection, _id):
+        anc = collection.find_one(filter={'tax_id': _id}, projection={'anc_id': 1, 'tax_name': 1, 'anc_name': 1})
+        result = [{anc['tax_name']: 0}]
+        for i, tax_id in enumerate(reversed(anc['anc_id'])):
+            doc = collection.find_one(filter={'tax_id': tax_id}, projection={'rank': 1, '_id': 0, 'tax_name': 1})
+            if doc.get('rank') in roi:
+                result.append({doc['tax_name']: i + 1})
+        result.append({anc['anc_name'][0]: len(anc['anc_name'])})
+        return result
+
+    old_collection = _CountingCollection(client['datanator-test']['taxon_tree'])
+    results = {
+        'per_ancestor': lambda: [per_ancestor(old_collection, _id) for _id in ids],
+        'batched': lambda: [batched.get_canon_rank_distance(_id, front_end=True) for _id in ids],
+        'taxonomy_index': lambda: [indexed.get_canon_rank_distance(_id, front_end=True) for _id in ids]}
+    expected = results['per_ancestor']()
+    assert results['batched']() == expected == results['taxonomy_index']()
+    calls = {}
+    for name, collection in [('per_ancestor', old_collection), ('batched', batched.collection),
+                             ('taxonomy_index', indexed.collection)]:
+        collection.calls = 0
+        results[name]()
+        calls[name] = collection.calls / len(ids)
+    timings = {name: _best_ms(func, tuple, repeat) for name, func in results.items()}
+    taxonomy_index.reset()
+    rank_service.default.clear(batched.collection)
+    return {'n_lineages': len(ids), 'ancestors': min(len(s['anc_id']) for s in deepest),
+            'queries_per_lineage': calls,
+            'per_ancestor_ms': timings['per_ancestor'], 'batched_ms': timings['batched'],
+            'taxonomy_index_ms': timings['taxonomy_index'],
+            'speedup': round(timings['per_ancestor'] / max(timings['batched'], 1e-3), 2)}
+
+
+BENCHMARKS = {'sanitize': sanitize, 'canon_distances': canon_distances,
+              'canon_rank_distance': canon_rank_distance}
+
+
+def run(only=None, repeat=5):
+    """Run the micro benchmarks.
+
+    Args:
+        only (:obj:`list` of :obj:`str`, optional): names of the benchmarks to run. Defaults to None (all).
+        repeat (:obj:`int`, optional): calls per implementation. Defaults to 5.
+
+    Return:
+        (:obj:`dict`): benchmark name to result.
+    """
+    return {name: func(repeat=repeat) for name, func in BENCHMARKS.items()
+            if only is None or name in only}
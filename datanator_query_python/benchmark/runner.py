@@ -0,0 +1,280 @@
+"""Load synthetic collections into a local mongod (or mongomock) and time
+the main query methods against them.
+
+The report is plain JSON with sorted keys, so reports of two releases can
+be diffed directly or with :func:`compare`. mongomock runs anywhere but
+evaluates queries in Python and lacks some server features (index hints,
+matching through nested arrays), so numbers meant for comparison between
+releases should come from a local mongod.
+"""
+import json
+import platform
+import statistics
+import time
+import pymongo
+import datanator_query_python
+from datanator_query_python.benchmark.synthetic import SyntheticData
+from datanator_query_python.util import client_registry
+
+
+DB = 'datanator-test'
+INDEXES = {
+    'taxon_tree': [[('tax_id', 1)], [('tax_name', 1)]],
+    'uniprot': [[('uniprot_id', 1)], [('ncbi_taxonomy_id', 1)], [('ko_number', 1)],
+                [('abu_exist', 1), ('orthodb_id', 1)], [('ancestor_taxon_id', 1)]],
+    'sabio_rk_old': [[('kinlaw_id', 1)], [('taxon_id', 1)],
+                     [('reaction_participant.substrate_aggregate', 1)],
+                     [('reaction_participant.product_aggregate', 1)]],
+    'metabolites_meta': [[('InChI_Key', 1)]],
+    # (field, _id) also serves the *_page calls, see QueryRNA.page_indexes
+    'rna_halflife_new': [[('ko_number', 1), ('_id', 1)], [('protein_names', 1), ('_id', 1)],
+                         [('orthodb_id', 1), ('_id', 1)]],
+    'pax': [[('ncbi_id', 1)], [('organ', 1)]],
+}
+
+
+def connect(uri=None):
+    """Client of the database to benchmark against.
+
+    Args:
+        uri (:obj:`str`, optional): connection string of a local mongod, e.g.
+        'mongodb://localhost:27017'. Defaults to None (in-process mongomock).
+
+    Return:
+        (:obj:`pymongo.MongoClient` or :obj:`mongomock.MongoClient`)
+    """
+    if uri is not None:
+        return pymongo.MongoClient(uri)
+    try:
+        import mongomock
+    except ImportError:
+        raise ImportError('mongomock is needed to benchmark without a mongod; '
+                          'install it or pass the uri of a local mongod.')
+    return mongomock.MongoClient()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load(client, data, db=DB, batch_size=1000):
+    """(Re)create the synthetic collections and their indexes.
+
+    Args:
+        client (:obj:`pymongo.MongoClient`): client to load the data with.
+        data (:obj:`SyntheticData`): generated data.
+        db (:obj:`str`, optional): database name. Defaults to 'datanator-test'.
+        batch_size (:obj:`int`, optional): documents per insert_many. Defaults to 1000.
+
+    Return:
+        (:obj:`dict`): seconds spent loading each collection.
+    """
+    seconds = {}
+    for name, docs in data.collections().items():
+        start = time.perf_counter()
+        collection = client[db][name]
+        collection.drop()
+        for chunk in _chunks(docs, batch_size):
+            collection.insert_many(chunk, ordered=False)
+        for keys in INDEXES.get(name, []):
+            collection.create_index(keys)
+        seconds[name] = round(time.perf_counter() - start, 3)
+    return seconds
+
+
+def _samples(client, data, db=DB, n=10):
+    """Arguments of the benchmarked calls, taken from the loaded documents.
+    """
+    database = client[db]
+    step = max(1, data.scale // n)
+    proteins = [database['uniprot'].find_one({'uniprot_id': data.uniprot_id(i)})
+                for i in range(0, data.scale, step)][:n]
+    kinlaws = list(database['sabio_rk_old'].find({}, projection={'reaction_participant': 1}, limit=n))
+    species = data.species[::max(1, len(data.species) // n)][:n]
+    deep = sorted(data.species, key=lambda s: -len(s['anc_id']))[:n]
+    return {
+        'uniprot_id': [p['uniprot_id'] for p in proteins],
+        'orthodb_id': [p['orthodb_id'] for p in proteins],
+        'ko_number': [p['ko_number'] for p in proteins],
+        'tax_id': [s['tax_id'] for s in species],
+        'tax_name': [s['tax_name'] for s in species],
+        'deep_tax_id': [s['tax_id'] for s in deep],
+        'deep_tax_name': [s['tax_name'] for s in deep],
+        'substrates': [k['reaction_participant'][3]['substrate_aggregate'] for k in kinlaws],
+        'products': [k['reaction_participant'][4]['product_aggregate'] for k in kinlaws],
+        'inchikey': data.inchikeys[:n],
+    }
+
+
+def cases(samples, db=DB):
+    """Benchmarked calls. Every case takes the index of the repetition, so
+    consecutive calls use different arguments.
+
+    Args:
+        samples (:obj:`dict`): call arguments, see _samples.
+        db (:obj:`str`, optional): database name. Defaults to 'datanator-test'.
+
+    Return:
+        (:obj:`dict`): case name to callable.
+    """
+    from datanator_query_python.query import (query_protein, query_taxon_tree, query_sabiork_old,
+                                              query_metabolites_meta, query_rna_halflife, query_pax)
+    server = 'benchmark'
+    protein = query_protein.QueryProtein(server=server, database=db, verbose=False)
+    taxon = query_taxon_tree.QueryTaxonTree(MongoDB=server, db=db)
+    indexed_taxon = query_taxon_tree.QueryTaxonTree(MongoDB=server, db=db, use_taxonomy_index=True,
+                                                    taxonomy_index_names=True)
+    sabio = query_sabiork_old.QuerySabioOld(MongoDB=server, db=db)
+    meta = query_metabolites_meta.QueryMetabolitesMeta(MongoDB=server, db=db)
+    rna = query_rna_halflife.QueryRNA(server=server, db=db, collection_str='rna_halflife_new')
+    pax = query_pax.QueryPax(MongoDB=server, db=db)
+
+    def pick(key, i, offset=0):
+        values = samples[key]
+        return values[(i + offset) % len(values)]
+
+    return {
+        'QueryProtein.get_meta_by_id':
+            lambda i: protein.get_meta_by_id([pick('uniprot_id', i)]),
+        'QueryProtein.get_abundance_by_taxon':
+            lambda i: protein.get_abundance_by_taxon(pick('tax_id', i)),
+        'QueryProtein.get_equivalent_protein_with_anchor':
+            lambda i: protein.get_equivalent_protein_with_anchor(pick('uniprot_id', i), 3),
+        'QueryProtein.get_all_kegg':
+            lambda i: protein.get_all_kegg(pick('ko_number', i), pick('tax_name', i), 3),
+        'QueryProtein.get_all_ortho':
+            lambda i: protein.get_all_ortho(pick('orthodb_id', i), pick('tax_name', i), 3),
+        'QueryTaxonTree.get_anc_by_id':
+            lambda i: taxon.get_anc_by_id(samples['tax_id']),
+        'QueryTaxonTree.get_canon_common_ancestor':
+            lambda i: taxon.get_canon_common_ancestor(pick('tax_id', i), pick('tax_id', i, 1)),
+        'QueryTaxonTree.get_canon_rank_distance':
+            lambda i: taxon.get_canon_rank_distance(pick('deep_tax_id', i), front_end=True),
+        'QueryTaxonTree.get_canon_rank_distance_by_name':
+            lambda i: taxon.get_canon_rank_distance_by_name(pick('deep_tax_name', i), front_end=True),
+        'QueryTaxonTree.get_canon_rank_distance[taxonomy_index]':
+            lambda i: indexed_taxon.get_canon_rank_distance(pick('deep_tax_id', i), front_end=True),
+        'QuerySabioOld.get_kinlaw_by_rxn':
+            lambda i: sabio.get_kinlaw_by_rxn(pick('substrates', i), pick('products', i)),
+        'QuerySabioOld.get_kinlaw_by_environment':
+            lambda i: list(sabio.iter_kinlaw_by_environment(taxon=samples['tax_id'], taxon_wildtype=[True],
+                                                            ph_range=[6, 8])),
+        'QueryMetabolitesMeta.get_metabolites_meta':
+            lambda i: meta.get_metabolites_meta(pick('inchikey', i)),
+        'QueryRNA.get_doc_by_ko':
+            lambda i: rna.get_doc_by_ko(pick('ko_number', i)),
+        'QueryPax.get_file_by_ncbi_id':
+            lambda i: pax.get_file_by_ncbi_id([pick('tax_id', i)]),
+        'QueryPax.get_file_by_quality':
+            lambda i: pax.get_file_by_quality('WHOLE_ORGANISM', score=2.0, coverage=10),
+    }
+
+
+def time_case(func, repeat=20):
+    """Time repeated calls of one case.
+
+    Return:
+        (:obj:`dict`): latency statistics in milliseconds, or the error
+        if the backend cannot run the call (e.g. mongomock and index hints).
+    """
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        try:
+            func(i)
+        except Exception as e:
+            return {'error': '{}: {}'.format(type(e).__name__, e)}
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'calls': repeat,
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(timings[-1], 3)}
+
+
+def run(scale=10000, seed=0, uri=None, repeat=20, only=None, skip_load=False, clade_depth=1):
+    """Generate, load and benchmark.
+
+    Args:
+        scale (:obj:`int`, optional): number of uniprot documents. Defaults to 10000.
+        seed (:obj:`int`, optional): random seed. Defaults to 0.
+        uri (:obj:`str`, optional): local mongod connection string. Defaults to None (mongomock).
+        repeat (:obj:`int`, optional): calls per case. Defaults to 20.
+        only (:obj:`list` of :obj:`str`, optional): names of the cases to run. Defaults to None (all).
+        skip_load (:obj:`bool`, optional): reuse data loaded by a previous run with the same
+        scale and seed (mongod only). Defaults to False.
+        clade_depth (:obj:`int`, optional): nested 'no rank' clades of the synthetic taxonomy,
+        see :class:`SyntheticData`; 25 benchmarks lineages of 32 ancestors. Defaults to 1.
+
+    Return:
+        (:obj:`dict`): report.
+    """
+    client = connect(uri)
+    data = SyntheticData(scale=scale, seed=seed, clade_depth=clade_depth)
+    load_seconds = {} if skip_load else load(client, data)
+    previous = client_registry.set_override(client)
+    try:
+        benchmarks = cases(_samples(client, data))
+        results = {name: time_case(func, repeat=repeat) for name, func in benchmarks.items()
+                   if only is None or name in only}
+    finally:
+        client_registry.set_override(previous)
+    if uri is None:
+        backend = 'mongomock'
+    else:
+        backend = 'mongod ' + client.server_info().get('version', '')
+    return {'package_version': datanator_query_python.__version__,
+            'python': platform.python_version(),
+            'pymongo': pymongo.version,
+            'backend': backend,
+            'scale': scale,
+            'seed': seed,
+            'clade_depth': clade_depth,
+            'repeat': repeat,
+            'documents': data.counts(),
+            'load_seconds': load_seconds,
+            'results': results}
+
+
+def dump(report, path=None):
+    """Write a report as JSON with sorted keys.
+
+    Args:
+        report (:obj:`dict`): report returned by run.
+        path (:obj:`str`, optional): output file. Defaults to None (return the string only).
+
+    Return:
+        (:obj:`str`)
+    """
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    return text
+
+
+def compare(base, head):
+    """Median latency of head relative to base, per case both reports ran.
+
+    Args:
+        base (:obj:`dict`): baseline report.
+        head (:obj:`dict`): new report.
+
+    Return:
+        (:obj:`dict`): case name to head median / base median (> 1 is slower).
+    """
+    ratios = {}
+    for name, result in head['results'].items():
+        old = base['results'].get(name, {})
+        if 'median_ms' in result and old.get('median_ms'):
+            ratios[name] = round(result['median_ms'] / old['median_ms'], 3)
+    return ratios
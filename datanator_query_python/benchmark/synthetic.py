@@ -0,0 +1,245 @@
+"""Synthetic documents shaped like the datanator collections the query
+classes read: taxon_tree, uniprot, sabio_rk_old, metabolites_meta,
+rna_halflife_new and pax.
+
+Everything is derived from a seeded random.Random, so the same scale and
+seed always give the same documents.
+"""
+import math
+import random
+import string
+
+
+CANON_RANKS = ['superkingdom', 'phylum', 'class', 'order', 'family', 'genus', 'species']
+ORGANS = ['WHOLE_ORGANISM', 'CELL_LINE', 'LIVER', 'BRAIN', 'KIDNEY']
+
+
+class SyntheticData:
+    """Generate documents for every benchmarked collection.
+
+    The number of uniprot documents is the scale; the other collections
+    grow with it (one species per 100 proteins, one kinetic law, rna
+    half-life and metabolite per 10 to 20 proteins, one pax file per 2000).
+    Documents are yielded lazily, so 10M proteins never sit in memory.
+
+    Args:
+        scale (:obj:`int`): number of uniprot documents. Defaults to 10000.
+        seed (:obj:`int`): random seed. Defaults to 0.
+        clade_depth (:obj:`int`): nested 'no rank' clades under every other class;
+        25 gives lineages of 32 ancestors, as deep as the human one. Defaults to 1.
+    """
+
+    def __init__(self, scale=10000, seed=0, clade_depth=1):
+        self.scale = scale
+        self.seed = seed
+        self.clade_depth = clade_depth
+        self.n_species = max(20, scale // 100)
+        self.n_ko = max(10, scale // 50)
+        self.n_kinlaw = max(10, scale // 10)
+        self.n_metabolite = max(10, scale // 20)
+        self.n_rna = max(10, scale // 10)
+        self.n_pax = max(10, scale // 2000)
+        self.taxa = []
+        self.species = []
+        self._build_tree()
+        rng = random.Random(seed)
+        self.inchikeys = [self._inchikey(rng) for _ in range(self.n_metabolite)]
+        self.compound_names = {key: 'compound {}'.format(i) for i, key in enumerate(self.inchikeys)}
+
+    def counts(self):
+        """Number of documents generated per collection.
+
+        Return:
+            (:obj:`dict`)
+        """
+        return {'taxon_tree': len(self.taxa), 'uniprot': self.scale, 'sabio_rk_old': self.n_kinlaw,
+                'metabolites_meta': self.n_metabolite, 'rna_halflife_new': self.n_rna,
+                'pax': self.n_pax}
+
+    @staticmethod
+    def _inchikey(rng):
+        upper = string.ascii_uppercase
+        return '{}-{}-N'.format(''.join(rng.choice(upper) for _ in range(14)),
+                                ''.join(rng.choice(upper) for _ in range(10)))
+
+    @staticmethod
+    def uniprot_id(i):
+        return 'Q{:08d}'.format(i)
+
+    @staticmethod
+    def ko_number(i):
+        return 'K{:05d}'.format(i)
+
+    @staticmethod
+    def orthodb_id(i):
+        return '{}at2759'.format(100000 + i)
+
+    def _build_tree(self):
+        """Taxonomy with the canonical ranks, a 'no rank' clade under every
+        other class and enough species leaves, depth first like NCBI dumps.
+        """
+        fanout = max(2, int(math.ceil(self.n_species ** (1 / (len(CANON_RANKS) - 2)))))
+        root = {'tax_id': 131567, 'tax_name': 'cellular organisms', 'rank': 'no rank',
+                'anc_id': [], 'anc_name': [], 'canon_anc_ids': [], 'canon_anc_names': []}
+        self.taxa.append(root)
+        counters = {}
+        next_id = [1000]
+
+        def add(parent, rank):
+            counters[rank] = counters.get(rank, 0) + 1
+            canonical = parent['rank'] != 'no rank' or parent['tax_id'] == 131567
+            doc = {'tax_id': next_id[0],
+                   'tax_name': '{} {}'.format(rank.capitalize(), counters[rank]),
+                   'rank': rank,
+                   'anc_id': parent['anc_id'] + [parent['tax_id']],
+                   'anc_name': parent['anc_name'] + [parent['tax_name']],
+                   'canon_anc_ids': parent['canon_anc_ids'] + ([parent['tax_id']] if canonical else []),
+                   'canon_anc_names': parent['canon_anc_names'] + ([parent['tax_name']] if canonical else [])}
+            next_id[0] += 1
+            self.taxa.append(doc)
+            return doc
+
+        def grow(parent, level):
+            for _ in range(fanout if level else min(fanout, 3)):
+                if len(self.species) >= self.n_species:
+                    return
+                rank = CANON_RANKS[level]
+                node = add(parent, rank)
+                if rank == 'species':
+                    self.species.append(node)
+                    continue
+                if rank == 'class' and counters[rank] % 2 == 0:
+                    for _ in range(self.clade_depth):
+                        node = add(node, 'no rank')
+                grow(node, level + 1)
+
+        grow(root, 0)
+
+    def taxon_tree(self):
+        for doc in self.taxa:
+            yield dict(doc)
+
+    def _pick_species(self, rng):
+        """The first species are sampled more heavily, as model organisms are in uniprot.
+        """
+        if rng.random() < 0.3:
+            return self.species[min(int(rng.paretovariate(1.2)) - 1, len(self.species) - 1)]
+        return self.species[rng.randrange(len(self.species))]
+
+    def uniprot(self):
+        rng = random.Random(self.seed + 1)
+        for i in range(self.scale):
+            species = self._pick_species(rng)
+            ko = rng.randrange(self.n_ko)
+            abu_exist = rng.random() < 0.6
+            doc = {'uniprot_id': self.uniprot_id(i),
+                   'entry_name': 'SYN{}_{}'.format(i, species['tax_id']),
+                   'gene_name': 'syn{}'.format(ko),
+                   'protein_name': 'Synthetic protein {}'.format(ko),
+                   'ncbi_taxonomy_id': species['tax_id'],
+                   'species_name': species['tax_name'],
+                   'ko_number': self.ko_number(ko),
+                   'ko_name': ['synthetic ortholog {}'.format(ko)],
+                   'orthodb_id': self.orthodb_id(ko),
+                   'orthodb_name': 'Synthetic group {}'.format(ko),
+                   'ancestor_taxon_id': species['anc_id'],
+                   'ancestor_name': species['anc_name'],
+                   'canon_anc_ids': species['canon_anc_ids'],
+                   'canon_anc_names': species['canon_anc_names'],
+                   'length': rng.randint(50, 2000),
+                   'mass': float('nan') if rng.random() < 0.01 else round(rng.uniform(5e3, 2e5), 1),
+                   'sequence': ''.join(rng.choice('ACDEFGHIKLMNPQRSTVWY') for _ in range(30)),
+                   'modifications': [],
+                   'abu_exist': abu_exist}
+            if abu_exist:
+                doc['abundances'] = [{'organ': rng.choice(ORGANS), 'abundance': str(round(rng.lognormvariate(2, 2), 3))}
+                                     for _ in range(rng.randint(1, 3))]
+            yield doc
+
+    def sabio_rk_old(self):
+        rng = random.Random(self.seed + 2)
+        for i in range(self.n_kinlaw):
+            species = rng.choice(self.species)
+            substrates = rng.sample(self.inchikeys, min(2, len(self.inchikeys)))
+            products = rng.sample(self.inchikeys, min(2, len(self.inchikeys)))
+            ec = '{}.{}.{}.{}'.format(rng.randint(1, 6), rng.randint(1, 20), rng.randint(1, 30), rng.randint(1, 200))
+            yield {'kinlaw_id': i + 1,
+                   'taxon_id': species['tax_id'],
+                   'taxon_name': species['tax_name'],
+                   'taxon_wildtype': int(rng.random() < 0.8),
+                   'ph': round(rng.uniform(4, 10), 1),
+                   'temperature': round(rng.uniform(15, 45), 1),
+                   'resource': [{'namespace': 'sabiork.reaction', 'id': str(i // 3 + 1)},
+                                {'namespace': 'ec-code', 'id': ec}],
+                   'substrate_names': [self.compound_names[k] for k in substrates],
+                   'product_names': [self.compound_names[k] for k in products],
+                   'reaction_participant': [
+                       {'substrate': [{'substrate_name': self.compound_names[k],
+                                       'substrate_structure': [{'inchi_key': k}]} for k in substrates]},
+                       {'product': [{'product_name': self.compound_names[k],
+                                     'product_structure': [{'inchi_key': k}]} for k in products]},
+                       {'modifier': []},
+                       {'substrate_aggregate': substrates},
+                       {'product_aggregate': products}],
+                   'parameter': [{'type': 27, 'observed_name': rng.choice(['Km', 'kcat', 'Ki']),
+                                  'value': rng.lognormvariate(0, 2), 'units': 'M'}],
+                   'enzymes': [{'subunit': [{'uniprot_id': self.uniprot_id(rng.randrange(self.scale))}]}]}
+
+    def metabolites_meta(self):
+        rng = random.Random(self.seed + 3)
+        for i, key in enumerate(self.inchikeys):
+            yield {'InChI_Key': key,
+                   'inchikey': key,
+                   'name': 'compound {}'.format(i),
+                   'synonyms': ['synonym {} {}'.format(i, j) for j in range(rng.randint(0, 5))],
+                   'chebi_id': str(10000 + i),
+                   'kegg_id': 'C{:05d}'.format(i),
+                   'similar_compounds': [{rng.choice(self.inchikeys): round(rng.random(), 3)} for _ in range(5)],
+                   'reaction_participants': [{'substrate_of': [], 'product_of': []}]}
+
+    def rna_halflife_new(self):
+        rng = random.Random(self.seed + 4)
+        for i in range(self.n_rna):
+            ko = rng.randrange(self.n_ko)
+            halflives = []
+            for j in range(rng.randint(1, 4)):
+                species = rng.choice(self.species)
+                halflives.append({'ordered_locus_name': 'b{:04d}'.format((i * 7 + j) % 10000),
+                                  'halflife': round(rng.uniform(60, 3600), 2),
+                                  'unit': 's',
+                                  'ncbi_taxonomy_id': species['tax_id'],
+                                  'species_name': species['tax_name'],
+                                  'reference': [{'doi': '10.0000/synthetic.{}'.format(j)}]})
+            yield {'uniprot_id': self.uniprot_id(rng.randrange(self.scale)),
+                   'protein_names': ['Synthetic protein {}'.format(ko)],
+                   'ko_number': self.ko_number(ko),
+                   'orthodb_id': self.orthodb_id(ko),
+                   'halflives': halflives}
+
+    def pax(self):
+        rng = random.Random(self.seed + 5)
+        for i in range(self.n_pax):
+            species = rng.choice(self.species[:max(1, len(self.species) // 10)])
+            organ = rng.choice(ORGANS)
+            yield {'ncbi_id': species['tax_id'],
+                   'species_name': species['tax_name'],
+                   'organ': organ,
+                   'score': round(rng.uniform(0, 10), 2),
+                   'coverage': rng.randint(1, 100),
+                   'weight': rng.randint(1, 100),
+                   'file_name': '{}/{}-{}_synthetic_{}.txt'.format(species['tax_id'], species['tax_id'], organ, i),
+                   'publication': 'https://example.org/synthetic/{}'.format(i % 50),
+                   'observation': [{'protein_id': {'uniprot_id': self.uniprot_id(rng.randrange(self.scale))},
+                                    'string_id': '{}.syn{}'.format(species['tax_id'], j),
+                                    'abundance': round(rng.lognormvariate(2, 2), 3)}
+                                   for j in range(50)]}
+
+    def collections(self):
+        """Generators of every collection, keyed by collection name.
+
+        Return:
+            (:obj:`dict`)
+        """
+        return {'taxon_tree': self.taxon_tree(), 'uniprot': self.uniprot(),
+                'sabio_rk_old': self.sabio_rk_old(), 'metabolites_meta': self.metabolites_meta(),
+                'rna_halflife_new': self.rna_halflife_new(), 'pax': self.pax()}
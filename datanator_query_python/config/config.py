@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 from pathlib import Path, PurePath
+from datanator_query_python.util.connection_options import ConnectionOptions
 import os
 
 home_path = PurePath(Path.home(), '.wc/datanator.env')
@@ -71,7 +72,40 @@ class AtlasConfig:
     PORT = os.getenv("MONGO_ATLAS_PORT")
     REPLSET = os.getenv("MONGO_ATLAS_REPL")
     AUTHDB = os.getenv("MONGO_ATLAS_AUTHDB")
-    READ_PREFERENCE = os.getenv("MONGO_ATLAS_READPREFERENCE")    
+    READ_PREFERENCE = os.getenv("MONGO_ATLAS_READPREFERENCE")
+    MAX_POOL_SIZE = os.getenv("MONGO_ATLAS_MAX_POOL_SIZE", 100)
+    MIN_POOL_SIZE = os.getenv("MONGO_ATLAS_MIN_POOL_SIZE", 0)
+    MAX_IDLE_TIME_MS = os.getenv("MONGO_ATLAS_MAX_IDLE_TIME_MS")
+    SERVER_SELECTION_TIMEOUT_MS = os.getenv("MONGO_ATLAS_SERVER_SELECTION_TIMEOUT_MS", 30000)
+    SOCKET_TIMEOUT_MS = os.getenv("MONGO_ATLAS_SOCKET_TIMEOUT_MS")
+    CONNECT_TIMEOUT_MS = os.getenv("MONGO_ATLAS_CONNECT_TIMEOUT_MS", 20000)
+    WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_ATLAS_WAIT_QUEUE_TIMEOUT_MS")
+    COMPRESSORS = os.getenv("MONGO_ATLAS_COMPRESSORS")
+    MAX_TIME_MS = os.getenv("MONGO_ATLAS_MAX_TIME_MS")
+
+    @classmethod
+    def connection_options(cls, pool_metrics=None):
+        """Connection pool, timeout and compression settings from environment.
+
+        Args:
+            pool_metrics (:obj:`PoolMetrics`, optional): listener collecting pool statistics.
+
+        Return:
+            (:obj:`ConnectionOptions`)
+        """
+        def to_int(val):
+            return None if val in (None, '') else int(val)
+
+        return ConnectionOptions(max_pool_size=to_int(cls.MAX_POOL_SIZE),
+                                 min_pool_size=to_int(cls.MIN_POOL_SIZE),
+                                 max_idle_time_ms=to_int(cls.MAX_IDLE_TIME_MS),
+                                 server_selection_timeout_ms=to_int(cls.SERVER_SELECTION_TIMEOUT_MS),
+                                 socket_timeout_ms=to_int(cls.SOCKET_TIMEOUT_MS),
+                                 connect_timeout_ms=to_int(cls.CONNECT_TIMEOUT_MS),
+                                 wait_queue_timeout_ms=to_int(cls.WAIT_QUEUE_TIMEOUT_MS),
+                                 compressors=cls.COMPRESSORS or None,
+                                 max_time_ms=to_int(cls.MAX_TIME_MS),
+                                 pool_metrics=pool_metrics)
 
 
 class FtxConfig(Config):
@@ -1,4 +1,5 @@
 from datanator_query_python.util import motor_util
+from datanator_query_python.config import config
 import os
 from dotenv import load_dotenv
 from pathlib import Path, PurePath
@@ -14,4 +15,5 @@ load_dotenv(dotenv_path)
 
 where = os.getenv("WHERE") # API_TEST; API_PROD; MONGO_DATANATOR_TEST; MONGO_DATANATOR_PROD;
 client = motor_util.MotorUtil(username=os.getenv(where), password=os.getenv("{}_PASSWORD".format(where)),
-                              MongoDB=os.getenv("MONGO_ATLAS_SERVER")).client
+                              MongoDB=os.getenv("MONGO_ATLAS_SERVER"),
+                              options=config.AtlasConfig.connection_options()).client
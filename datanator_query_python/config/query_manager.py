@@ -3,6 +3,13 @@ from datanator_query_python.query import (query_protein, query_metabolites,
                                          query_sabiork_old, query_taxon_tree, full_text_search,
                                          query_uniprot, query_rna_halflife, query_kegg_orthology,
                                          query_metabolites_meta, query_metabolite_concentrations)
+from datanator_query_python.util import pool_metrics
+
+
+# shared by every manager built here so pool sizes can be tuned from the collected statistics
+metrics = pool_metrics.PoolMetrics()
+options = config.AtlasConfig.connection_options(pool_metrics=metrics)
+
 
 class Manager:
 
@@ -13,15 +20,17 @@ class Manager:
         self.authDB = config.AtlasConfig.AUTHDB
         self.read_preference = config.AtlasConfig.READ_PREFERENCE
         self.repl = config.AtlasConfig.REPLSET
+        self.options = options
 
     def protein_manager(self, database="datanator"):
         return query_protein.QueryProtein(username=self.username, password=self.password, server=self.server,
-        authSource=self.authDB, readPreference=self.read_preference, replicaSet=self.repl, database=database)
+        authSource=self.authDB, readPreference=self.read_preference, replicaSet=self.repl, database=database,
+        options=self.options)
 
     def metabolite_concentration_manager(self):
         return query_metabolite_concentrations.QueryMetaboliteConcentrations(MongoDB=self.server, db='datanator',
         collection_str='metabolite_concentrations', username=self.username, password=self.password, authSource=self.authDB,
-        readPreference=self.read_preference, replicaSet=self.repl)
+        readPreference=self.read_preference, replicaSet=self.repl, options=self.options)
 
     def eymdb_manager(self):
         return query_metabolites.QueryMetabolites(
@@ -31,7 +40,8 @@ class Manager:
             authSource=self.authDB,
             db='datanator',
             readPreference=self.read_preference,
-            replicaSet=self.repl)
+            replicaSet=self.repl,
+            options=self.options)
 
 
 class RxnManager:
@@ -40,7 +50,7 @@ class RxnManager:
         return query_sabiork_old.QuerySabioOld(username=config.AtlasConfig.USERNAME, 
         password=config.AtlasConfig.PASSWORD, MongoDB=config.AtlasConfig.SERVER,
         authSource=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-        replicaSet=config.AtlasConfig.REPLSET)
+        replicaSet=config.AtlasConfig.REPLSET, options=options)
 
 
 class TaxonManager:
@@ -49,7 +59,7 @@ class TaxonManager:
         return query_taxon_tree.QueryTaxonTree(username=config.AtlasConfig.USERNAME, 
         password=config.AtlasConfig.PASSWORD, MongoDB=config.AtlasConfig.SERVER,
         authSource=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-        replicaSet=config.AtlasConfig.REPLSET)
+        replicaSet=config.AtlasConfig.REPLSET, options=options)
 
 
 class FtxManager:
@@ -61,12 +71,12 @@ class FtxManager:
 def uniprot_manager():
     return query_uniprot.QueryUniprot(username=config.AtlasConfig.USERNAME, password=config.AtlasConfig.PASSWORD,
     server=config.AtlasConfig.SERVER, authSource=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-    collection_str='uniprot', replicaSet=config.AtlasConfig.REPLSET)
+    collection_str='uniprot', replicaSet=config.AtlasConfig.REPLSET, options=options)
 
 def metabolites_meta_manager():
     return query_metabolites_meta.QueryMetabolitesMeta(MongoDB=config.AtlasConfig.SERVER, db='datanator', username=config.AtlasConfig.USERNAME,
     password=config.AtlasConfig.PASSWORD, authSource=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-    replicaSet=config.AtlasConfig.REPLSET)
+    replicaSet=config.AtlasConfig.REPLSET, options=options)
 
 
 class RnaManager:
@@ -74,7 +84,7 @@ class RnaManager:
     def rna_manager(self, db="datanator"):
         return query_rna_halflife.QueryRNA(username=config.AtlasConfig.USERNAME, password=config.AtlasConfig.PASSWORD,
         server=config.AtlasConfig.SERVER, authDB=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-        db=db, collection_str='rna_halflife_new', replicaSet=config.AtlasConfig.REPLSET)
+        db=db, collection_str='rna_halflife_new', replicaSet=config.AtlasConfig.REPLSET, options=options)
 
 
 class KeggManager:
@@ -82,4 +92,4 @@ class KeggManager:
     def kegg_manager(self):
         return query_kegg_orthology.QueryKO(username=config.AtlasConfig.USERNAME, password=config.AtlasConfig.PASSWORD,
         server=config.AtlasConfig.SERVER, authSource=config.AtlasConfig.AUTHDB, readPreference=config.AtlasConfig.READ_PREFERENCE,
-        verbose=False, replicaSet=config.AtlasConfig.REPLSET)
\ No newline at end of file
+        verbose=False, replicaSet=config.AtlasConfig.REPLSET, options=options)
\ No newline at end of file
@@ -12,11 +12,13 @@ class QM(mongo_util.MongoUtil):
                 password=config.AtlasConfig.PASSWORD,
                 authSource=config.AtlasConfig.AUTHDB,
                 replicaSet=config.AtlasConfig.REPLSET,
-                readPreference=config.AtlasConfig.READ_PREFERENCE 
+                readPreference=config.AtlasConfig.READ_PREFERENCE,
+                options=None
                 ):
         super().__init__(MongoDB=server, replicaSet=replicaSet,
                         username=username, password=password,
-                        authSource=authSource, readPreference=readPreference)
+                        authSource=authSource, readPreference=readPreference,
+                        options=options)
         self.read_preference = self._convert_read_p(readPreference)
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
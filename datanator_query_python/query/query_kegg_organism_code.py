@@ -1,4 +1,4 @@
-from datanator_query_python.util import mongo_util
+from datanator_query_python.util import mongo_util, query_cache
 from pymongo.collation import Collation, CollationStrength
 
 
@@ -6,13 +6,16 @@ class QueryKOC:
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', collection_str=None, readPreference='nearest',
-                 replicaSet=None):
+                 replicaSet=None, options=None, cache=None):
         self.mongo_manager = mongo_util.MongoUtil(MongoDB=server, username=username,
                                                   password=password, authSource=authSource, db=database,
-                                                  readPreference=readPreference, replicaSet=replicaSet)
+                                                  readPreference=readPreference, replicaSet=replicaSet,
+                                                  options=options)
         self.client, self.db, self.collection = self.mongo_manager.con_db(collection_str)
+        self.cache = cache
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
+    @query_cache.cached(ttl=query_cache.TTLS['kegg_organism_code'])
     def get_org_code_by_ncbi(self, _id):
         """Get Kegg organism code given NCBI Taxonomy ID.
 
@@ -30,6 +33,7 @@ class QueryKOC:
         else:
             return result.get('kegg_organism_id')
 
+    @query_cache.cached(ttl=query_cache.TTLS['kegg_organism_code'], casefold=True)
     def get_ncbi_by_org_code(self, org_code):
         """Get kegg organism code by NCBI Taxonomy ID.
         
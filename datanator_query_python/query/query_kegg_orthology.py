@@ -1,4 +1,4 @@
-from datanator_query_python.util import mongo_util
+from datanator_query_python.util import mongo_util, query_cache
 from pymongo.collation import Collation, CollationStrength
 
 
@@ -6,17 +6,45 @@ class QueryKO(mongo_util.MongoUtil):
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', max_entries=float('inf'), verbose=True,
-                 readPreference='nearest', replicaSet=None):
+                 readPreference='nearest', replicaSet=None, options=None, cache=None):
 
         super().__init__(MongoDB=server, username=username,
                         password=password, authSource=authSource, db=database,
-                        readPreference=readPreference, replicaSet=replicaSet)
+                        readPreference=readPreference, replicaSet=replicaSet, options=options, cache=cache)
         self.max_entries = max_entries
         self.verbose = verbose
         self.client, self.db, self.collection = self.con_db('kegg_orthology')
         self.ortho = self.db_obj["orthodb"]
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
+    @staticmethod
+    def _loci_query(kegg_id, org, gene_id):
+        con_0 = {'kegg_orthology_id': kegg_id}
+        con_1 = {'gene_ortholog.organism': org}
+        con_2 = {'gene_ortholog.genetic_info.gene_id': gene_id}
+        return {'$and': [con_0, con_1, con_2]}
+
+    @staticmethod
+    def _loci_from_doc(doc, gene_id):
+        if doc is None:
+            return {}
+        obj = doc['gene_ortholog'][0]['genetic_info']
+        return next((item['locus_id'] for item in obj if item["gene_id"] == gene_id), None)
+
+    @staticmethod
+    def _ordered_in_pipeline(field, ids, projection):
+        """Match documents whose field is in ids, sorted in the order of ids.
+        """
+        projection = dict(projection, __order=0)
+        query = {field: {'$in': ids}}
+        pipeline = [
+             {'$match': query},
+             {'$addFields': {"__order": {'$indexOfArray': [ids, "$" + field]}}},
+             {'$sort': {"__order": 1}},
+             {"$project": projection}
+            ]
+        return query, pipeline
+
     def get_ko_by_name(self, name):
         '''Get a gene's ko number by its gene name
 
@@ -64,18 +92,12 @@ class QueryKO(mongo_util.MongoUtil):
         Return:
             (:obj:`str`): locus id.
         """
-        con_0 = {'kegg_orthology_id': kegg_id}
-        con_1 = {'gene_ortholog.organism': org}
-        con_2 = {'gene_ortholog.genetic_info.gene_id': gene_id}
-        query = {'$and': [con_0, con_1, con_2]}
+        query = self._loci_query(kegg_id, org, gene_id)
         projection = {'_id': 0, 'gene_ortholog.$': 1}
         doc = self.collection.find_one(filter=query, projection=projection, collation=self.collation)
-        if doc is None:
-            return {}
-        else:
-            obj = doc['gene_ortholog'][0]['genetic_info']
-            return next((item['locus_id'] for item in obj if item["gene_id"] == gene_id), None)
+        return self._loci_from_doc(doc, gene_id)
 
+    @query_cache.cached(ttl=query_cache.TTLS['kegg_orthology'], casefold=True)
     def get_meta_by_kegg_ids(self, kegg_ids, projection={'_id': 0, 'gene_ortholog': 0}):
         """Get meta given kegg ids
         
@@ -84,19 +106,11 @@ class QueryKO(mongo_util.MongoUtil):
             projection (:obj:`dict`): MongoDB result projection.
 
         Return:
-            (:obj:`tuple` of :obj:`pymongo.Cursor` and :obj:`int`): pymongo Cursor obj and number of documents found.
+            (:obj:`tuple` of :obj:`list` and :obj:`int`): documents and number of documents found.
         """
-        projection['__order'] = 0
-        query = {'kegg_orthology_id': {'$in': kegg_ids}}
-        pipeline = [
-             {'$match': {'kegg_orthology_id': {'$in': kegg_ids}}},
-             {'$addFields': {"__order": {'$indexOfArray': [kegg_ids, "$kegg_orthology_id" ]}}},
-             {'$sort': {"__order": 1}},
-             {"$project": projection}
-            ]
-        docs = self.collection.aggregate(pipeline, collation=self.collation)
-        count = self.collection.count_documents(query, collation=self.collation)
-        return docs, count
+        query, pipeline = self._ordered_in_pipeline('kegg_orthology_id', kegg_ids, projection)
+        return self.find_with_count(self.collection, query, stages=pipeline[1:],
+                                    collation=self.collation, filters=False)
 
     def get_meta_by_ortho_ids(self, orthodb_ids, projection={'_id': 0, 'gene_ortholog': 0},
                               limit=0):
@@ -109,14 +123,7 @@ class QueryKO(mongo_util.MongoUtil):
         Return:
             (:obj:`tuple` of :obj:`pymongo.Cursor` and :obj:`int`): pymongo Cursor obj and number of documents found.
         """
-        projection['__order'] = 0
-        query = {'orthodb_id': {'$in': orthodb_ids}}
-        pipeline = [
-             {'$match': {'orthodb_id': {'$in': orthodb_ids}}},
-             {'$addFields': {"__order": {'$indexOfArray': [orthodb_ids, "$orthodb_id" ]}}},
-             {'$sort': {"__order": 1}},
-             {"$project": projection}
-            ]
+        query, pipeline = self._ordered_in_pipeline('orthodb_id', orthodb_ids, projection)
         docs = self.ortho.aggregate(pipeline)
         count = self.ortho.count_documents(query)
         return docs, count
@@ -1,4 +1,5 @@
 from datanator_query_python.util import mongo_util, file_util
+from datanator_query_python.aggregate import taxon_intervals
 from pymongo.collation import Collation, CollationStrength
 import numpy as np
 
@@ -7,12 +8,13 @@ class QueryMetaboliteConcentrations(mongo_util.MongoUtil):
 
     def __init__(self, MongoDB=None, db=None, collection_str=None, username=None,
                  password=None, authSource='admin', readPreference='nearest',
-                 verbose=True, replicaSet=None):
+                 verbose=True, replicaSet=None, options=None):
         super().__init__(MongoDB=MongoDB, db=db, verbose=verbose, username=username,
                          password=password, authSource=authSource, readPreference=readPreference,
-                         replicaSet=replicaSet)
+                         replicaSet=replicaSet, options=options)
         self.file_manager = file_util.FileUtil()
         self._collection = self.db_obj[collection_str]
+        self.taxon_collection = self.db_obj['taxon_tree']
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
     def get_similar_concentrations(self, metabolite, threshold=0.6):
@@ -82,3 +84,21 @@ class QueryMetaboliteConcentrations(mongo_util.MongoUtil):
         """
         query = {"concentrations.ncbi_taxonomy_id": _id}
         return self._collection.find(filter=query)
+
+    def get_conc_under_taxon(self, _id):
+        """Get concentrations measured in an organism or in any of its descendants,
+        with one range query on the nested-interval labels (see
+        :mod:`datanator_query_python.aggregate.taxon_intervals`). Concentrations
+        of other organisms are dropped from the documents.
+
+        Args:
+            _id(:obj:`int`): NCBI Taxonomy ID.
+
+        Return:
+            (:obj:`Generator` of :obj:`dict`): documents, none if the organism is not labelled.
+        """
+        labels = taxon_intervals.interval(self.taxon_collection, _id)
+        if labels is None:
+            return iter(())
+        return taxon_intervals.iter_subtree_docs(self._collection, labels, 'concentrations',
+                                                 max_time_ms=self.max_time_ms)
@@ -16,7 +16,7 @@ class QueryMetabolites(mongo_util.MongoUtil):
 
     def __init__(self, cache_dirname=None, MongoDB=None, replicaSet=None, db=None,
                  verbose=True, max_entries=float('inf'), username=None,
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None, cache=None):
         self.verbose = verbose
         super().__init__(cache_dirname=cache_dirname,
                          MongoDB=MongoDB,
@@ -27,7 +27,8 @@ class QueryMetabolites(mongo_util.MongoUtil):
                          username=username,
                          password=password,
                          authSource=authSource,
-                         readPreference=readPreference)
+                         readPreference=readPreference,
+                         options=options, cache=cache)
         self.client_ecmdb, self.db_ecmdb, self.collection_ecmdb = self.con_db('ecmdb')
         self.client_ymdb, self.db_ymdb, self.collection_ymdb = self.con_db(
             'ymdb')
@@ -42,7 +43,8 @@ class QueryMetabolites(mongo_util.MongoUtil):
             username=username,
             password=password,
             authSource=authSource,
-            readPreference=readPreference)
+            readPreference=readPreference,
+            options=options, cache=cache)
         self.chem_manager = chem_util.ChemUtil()
 
     def get_conc_from_inchi(self, inchi, inchi_key=False, consensus=False, projection={'_id': 0}):
@@ -63,9 +65,6 @@ class QueryMetabolites(mongo_util.MongoUtil):
             hashed_inchi = self.chem_manager.inchi_to_inchikey(inchi)
         else:
             hashed_inchi = inchi
-        query = {'InChI_Key': inchi}
-        result = []
-
         ids = self.metabolites_meta_manager.get_ids_from_hash(hashed_inchi)
         ecmdb_id = ids['m2m_id']
         ymdb_id = ids['ymdb_id']
@@ -73,22 +72,28 @@ class QueryMetabolites(mongo_util.MongoUtil):
         docs_ecmdb = self.collection_ecmdb.find_one(filter={'m2m_id': ecmdb_id}, projection=projection)
         docs_ymdb = self.collection_ymdb.find_one(filter={'ymdb_id': ymdb_id}, projection=projection)
 
-        def calc_consensus(_list):
-            conc_list = [float(x) for x in _list]
-            cons_val = sum(conc_list) / len(conc_list)
-            return cons_val
+        return self._conc_result([docs_ecmdb, docs_ymdb], consensus)
 
-        def append_result(_dict):
-            if _dict is not None:
-                conc_ecmdb = _dict.get('concentrations', None)
-                if consensus is True and conc_ecmdb is not None:
-                    conc_list = _dict['concentrations']['concentration']
-                    cons_val = calc_consensus(conc_list)
-                    _dict['consensus_value'] = cons_val
-                result.append(_dict)
+    @staticmethod
+    def _conc_result(docs, consensus):
+        ''' Assemble get_conc_from_inchi's result from ECMDB and YMDB documents.
+
+            Args:
+                docs (:obj:`list` of :obj:`dict`): documents found in each collection, or None.
+                consensus (:obj:`bool`): whether to add the consensus value.
 
-        append_result(docs_ecmdb)
-        append_result(docs_ymdb)
+            Return:
+                (:obj:`list` of :obj:`dict`)
+        '''
+        result = []
+        for _dict in docs:
+            if _dict is None:
+                continue
+            conc_ecmdb = _dict.get('concentrations', None)
+            if consensus is True and conc_ecmdb is not None:
+                conc_list = [float(x) for x in _dict['concentrations']['concentration']]
+                _dict['consensus_value'] = sum(conc_list) / len(conc_list)
+            result.append(_dict)
 
         if len(result) == 0:
             return [{
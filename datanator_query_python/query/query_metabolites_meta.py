@@ -1,4 +1,4 @@
-from datanator_query_python.util import mongo_util, chem_util, file_util
+from datanator_query_python.util import mongo_util, chem_util, file_util, query_cache, collection_stats
 import numpy as np
 from pymongo.collation import Collation, CollationStrength
 
@@ -9,14 +9,14 @@ class QueryMetabolitesMeta(mongo_util.MongoUtil):
 
     def __init__(self, cache_dirname=None, MongoDB=None, replicaSet=None, db=None,
                  collection_str='metabolites_meta', verbose=False, max_entries=float('inf'), username=None,
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None, cache=None):
         self._collection_str = collection_str
         self.verbose = verbose
         super().__init__(cache_dirname=cache_dirname, MongoDB=MongoDB,
                         replicaSet=replicaSet, db=db,
                         verbose=verbose, max_entries=max_entries, username=username,
                         password=password, authSource=authSource,
-                        readPreference=readPreference)
+                        readPreference=readPreference, options=options, cache=cache)
         self._collection = self.client.get_database("datanator-test")[collection_str]
         self.e_client, self.e_db_obj, self.e_collection = self.con_db('ecmdb')
         self.y_client, self.y_db_obj, self.y_collection = self.con_db('ymdb')        
@@ -189,13 +189,15 @@ class QueryMetabolitesMeta(mongo_util.MongoUtil):
         return [x[-1] for x in result]
 
     def get_unique_metabolites(self):
-        """Get number of unique metabolites.
+        """Get number of unique metabolites, up to a day old
+        (see :mod:`datanator_query_python.util.collection_stats`).
 
         Return:
             (:obj:`int`): number of unique metabolites.
         """
-        return len(self._collection.distinct('InChI_Key', collation=self.collation))
+        return collection_stats.distinct_count(self._collection, 'InChI_Key', collation=self.collation)
 
+    @query_cache.cached(collection='_collection', ttl=query_cache.TTLS['metabolites_meta'], casefold=True)
     def get_metabolites_meta(self, inchi_key):
         """Get metabolite's meta information given inchi_key.
 
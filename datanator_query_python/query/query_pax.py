@@ -8,7 +8,7 @@ class QueryPax(mongo_util.MongoUtil):
 
     def __init__(self, cache_dirname=None, MongoDB=None, replicaSet=None, db='datanator',
                  collection_str='pax', verbose=False, max_entries=float('inf'), username=None,
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None):
         """Instantiating query_pax
         
         Args:
@@ -23,11 +23,13 @@ class QueryPax(mongo_util.MongoUtil):
             password (str, optional): db authentication password. Defaults to None.
             authSource (str, optional): authentication database. Defaults to 'admin'.
             readPreference (str, optional): mongodb readpreference. Defaults to 'primary'.
+            options (ConnectionOptions, optional): connection pool and timeout settings. Defaults to None.
         """
         super().__init__(cache_dirname=cache_dirname, MongoDB=MongoDB,
                         replicaSet=replicaSet, db=db,
                         verbose=verbose, max_entries=max_entries, username=username,
-                        password=password, authSource=authSource, readPreference=readPreference)
+                        password=password, authSource=authSource, readPreference=readPreference,
+                        options=options)
         self.collation = Collation(locale='en',
                                    strength=CollationStrength.SECONDARY)
         self.chem_manager = chem_util.ChemUtil()
@@ -36,6 +38,22 @@ class QueryPax(mongo_util.MongoUtil):
         self.verbose = verbose
         self.collection = self.db_obj[collection_str]
 
+    @staticmethod
+    def _quality_query(organ, score, coverage, ncbi_id):
+        """Query used by get_file_by_quality.
+
+        Return:
+            (:obj:`dict`)
+        """
+        constraint_0 = {'organ': organ}
+        constraint_1 = {'score': {'$gte': score}}
+        constraint_2 = {'coverage': {'$gte': coverage}}
+        if ncbi_id is not None:
+            constraint_3 = {'ncbi_id': ncbi_id}
+        else:
+            constraint_3 = {'ncbi_id': {'$exists': True}}
+        return {'$and': [constraint_0, constraint_1, constraint_2, constraint_3]}
+
     def get_all_species(self):
         '''
             Get a list of all species in pax collection
@@ -117,15 +135,23 @@ class QueryPax(mongo_util.MongoUtil):
         Returns:
             :obj:`list`: files that meet the requirement 
         """
-        result = []
-        if collation is None:
-            collation = self.collation
+        return list(self.iter_file_by_ncbi_id(taxon, projection=projection))
+
+    def iter_file_by_ncbi_id(self, taxon: list, projection={'_id': 0}, batch_size=None, limit=0):
+        """Given the list of taxon ncbi ID, stream the files associated to the taxon.
+
+        Args:
+            taxon (:obj:`list`): list of taxon ncbi ID
+            projection (:obj:`dict`, optional): mongodb query projection. Defaults to {'_id': 0}.
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Returns:
+            :obj:`Generator`: files that meet the requirement
+        """
         query = {'ncbi_id': {'$in': taxon}}
-        projection = projection
-        docs = self.collection.find(filter=query, projection=projection)
-        for doc in docs:
-            result.append(doc)
-        return result
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
 
     def get_file_by_quality(self, organ, score=4.0, coverage=20, ncbi_id=None,
                             projection={'_id': 0, 'weight': 0}):
@@ -140,20 +166,11 @@ class QueryPax(mongo_util.MongoUtil):
 
         Returns:
             (:obj:`tuple`): tuple containing:
-                docs (:obj:`Interator`): mongodb docs interator;
+                docs (:obj:`list`): mongodb docs;
                 count (:obj:`int`): total number of documents that meet the query conditions.
         """
-        constraint_0 = {'organ': organ}
-        constraint_1 = {'score': {'$gte': score}}
-        constraint_2 = {'coverage': {'$gte': coverage}}
-        if ncbi_id is not None:
-            constraint_3 = {'ncbi_id': ncbi_id}
-        else:
-            constraint_3 = {'ncbi_id': {'$exists': True}}
-        query = {'$and': [constraint_0, constraint_1, constraint_2, constraint_3]}
-        docs = self.collection.find(filter=query, projection=projection)
-        count = self.collection.count_documents(query)
-        return docs, count
+        query = self._quality_query(organ, score, coverage, ncbi_id)
+        return self.find_with_count(self.collection, query, projection=projection)
 
     def get_file_by_publication(self, publication, projection={'_id': 0}):
         """Get documents by publication
@@ -1,51 +1,40 @@
-from datanator_query_python.util import mongo_util, file_util
+from datanator_query_python.util import mongo_util, file_util, nan_util, query_cache, collection_stats
 from datanator_query_python.query import query_taxon_tree, query_kegg_orthology
+from datanator_query_python.aggregate import ortholog_summary, taxon_intervals
 from pymongo.collation import Collation, CollationStrength
 from pymongo import ASCENDING
-from collections import deque
-import simplejson as json
+import copy
+import itertools
+import pickle
+import numpy as np
 
 
 class QueryProtein(mongo_util.MongoUtil):
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', max_entries=float('inf'), verbose=True, collection_str='uniprot',
-                 readPreference='nearest', replicaSet=None):
+                 readPreference='nearest', replicaSet=None, options=None, cache=None):
 
         super().__init__(MongoDB=server, username=username,
                         password=password, authSource=authSource, db=database,
-                        readPreference=readPreference, replicaSet=replicaSet)
+                        readPreference=readPreference, replicaSet=replicaSet, options=options, cache=cache)
         self.taxon_manager = query_taxon_tree.QueryTaxonTree(MongoDB=server, username=username, password=password,
-            authSource=authSource, db=database, replicaSet=replicaSet)
+            authSource=authSource, db=database, replicaSet=replicaSet, options=options, cache=cache)
         self.taxon_col = self.db_obj['taxon_tree']
-        self.kegg_manager = query_kegg_orthology.QueryKO(username=username, password=password, server=server, authSource=authSource, replicaSet=replicaSet)
+        self.kegg_manager = query_kegg_orthology.QueryKO(username=username, password=password, server=server, authSource=authSource, replicaSet=replicaSet,
+                                                         options=options, cache=cache)
         self.file_manager = file_util.FileUtil()
         self.max_entries = max_entries
         self.verbose = verbose
         self.collection = self.db_obj[collection_str]
         self.paxdb_collection = self.db_obj['pax']
+        self.summary_collection = self.db_obj['ortholog_abundance_summary']
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
         self.collection_str = collection_str
 
-    def get_meta_by_id(self, _id):
-        '''
-            Get protein's metadata given uniprot id
-
-            Args:
-                _id (:obj:`list` of :obj:`str`): list of uniprot id.
-
-            Returns:
-                (:obj:`list` of :obj:`dict`): list of information.
-        '''
-        result = []
-        query = {'uniprot_id': {'$in': _id}}
-        projection = {'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0,
-                    'kinetics': 0}
-        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
-        count = self.collection.count_documents(query, collation=self.collation)
-        null = 'None'
-        if count == 0:
-            return {'uniprot_id': 'None',
+    @staticmethod
+    def _empty_meta():
+        return {'uniprot_id': 'None',
             'entry_name': 'None',
             'gene_name': 'None',
             'protein_name': 'None',
@@ -56,15 +45,134 @@ class QueryProtein(mongo_util.MongoUtil):
             'ncbi_taxonomy_id': 99999999,
             'species_name': '99999999'}
 
+    @staticmethod
+    def _sanitize(doc):
+        """Replace NaN values in document with None, in place.
+        """
+        return nan_util.replace_nan(doc)
+
+    @staticmethod
+    def _meta_by_id_query(_id):
+        query = {'uniprot_id': {'$in': _id}}
+        projection = {'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0,
+                    'kinetics': 0}
+        return query, projection
+
+    @staticmethod
+    def _ko_numbers(docs):
+        """Distinct KO numbers of docs, in first-seen order.
+        """
+        return list(dict.fromkeys(doc['ko_number'] for doc in docs if doc.get('ko_number') is not None))
+
+    @staticmethod
+    def _attach_kegg_meta(docs, kegg_docs):
+        """Add kegg_meta (kegg_orthology documents with the same KO number,
+        compared case-insensitively like the collation) to every doc that has one.
+        Proteins sharing a KO number get their own copies.
+        """
+        groups = {}
+        for kegg_doc in kegg_docs:
+            groups.setdefault(kegg_doc['kegg_orthology_id'].casefold(), []).append(kegg_doc)
+        used = set()
         for doc in docs:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
             ko_number = doc.get('ko_number')
-            if ko_number is not None:
-                D, c = self.kegg_manager.get_meta_by_kegg_ids([ko_number])
-                if c != 0:
-                    doc['kegg_meta'] = [d for d in D]    
-            result.append(doc)
-        return result
+            if ko_number is None:
+                continue
+            key = ko_number.casefold()
+            meta = groups.get(key)
+            if meta:
+                doc['kegg_meta'] = copy.deepcopy(meta) if key in used else meta
+                used.add(key)
+        return docs
+
+    @staticmethod
+    def _text_query(name):
+        expression = "\"" + name + "\""
+        return { '$text': { '$search': expression } }
+
+    @staticmethod
+    def _meta_by_name_taxon_query(name, taxon_ids):
+        expression = "\"" + name + "\""
+        query = {'$and': [{'$text': { '$search': expression } },
+                         {'ncbi_taxonomy_id': taxon_ids},
+                         {'abundances': {'$exists': True} }]}
+        projection = {'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0, 'kinetics': 0}
+        return query, projection
+
+    @staticmethod
+    def _group_by_ko(docs, abundance=False, check_nan=False, max_groups=None):
+        """Group protein documents by their kegg orthology number, with
+        the groups kept in a dict keyed by KO number so every document is
+        placed in constant time. Groups are in the order their KO number
+        was first seen.
+
+        A group is only complete once docs is exhausted, so every document is
+        read; with max_groups, documents of KO numbers seen after the first
+        max_groups ones are skipped.
+
+        Args:
+            docs (:obj:`Iterable` of :obj:`dict`): documents with uniprot_id, ko_number and ko_name.
+            abundance (:obj:`bool`): map uniprot_id to whether it has abundances instead of listing uniprot_ids.
+            check_nan (:obj:`bool`): treat 'nan' ko_number as missing.
+            max_groups (:obj:`int`, optional): return at most this many groups. Defaults to None (no limit).
+
+        Return:
+            (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': ...}, ...]
+        """
+        groups = {}
+        for doc in docs:
+            if check_nan:
+                ko_number = doc.get('ko_number')
+                ko_name = doc.get('ko_name')
+                if ko_number is None or ko_number == 'nan':
+                    ko_number = 'no number'
+                    ko_name = ['no name']
+            else:
+                ko_number = doc.get('ko_number', 'no number')
+                ko_name = doc.get('ko_name', ['no name'])
+            group = groups.get(ko_number)
+            if group is None:
+                if max_groups is not None and len(groups) >= max_groups:
+                    continue
+                group = {'ko_number': ko_number, 'ko_name': ko_name,
+                         'uniprot_ids': {} if abundance else []}
+                groups[ko_number] = group
+            if abundance:
+                group['uniprot_ids'][doc['uniprot_id']] = 'abundances' in doc
+            else:
+                group['uniprot_ids'].append(doc['uniprot_id'])
+        return list(groups.values())
+
+    @staticmethod
+    def _abundance_by_id_query(_id):
+        query = {'$and': [{'uniprot_id': {'$in': _id}}, {'abundances': {'$exists': True}}]}
+        projection = {'abundances': 1, 'uniprot_id': 1, '_id': 0,
+                      'protein_name': 1, 'gene_name': 1, 'species_name': 1,
+                      "modifications": 1}
+        return query, projection
+
+    def get_meta_by_id(self, _id):
+        '''
+            Get protein's metadata given uniprot id
+
+            Args:
+                _id (:obj:`list` of :obj:`str`): list of uniprot id.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): list of information.
+        '''
+        query, projection = self._meta_by_id_query(_id)
+        docs, count = self.find_with_count(self.collection, query, projection=projection,
+                                           collation=self.collation)
+        if count == 0:
+            return self._empty_meta()
+
+        docs = [self._sanitize(doc) for doc in docs]
+        ko_numbers = self._ko_numbers(docs)
+        if ko_numbers:
+            kegg_docs, _ = self.kegg_manager.get_meta_by_kegg_ids(ko_numbers)
+            self._attach_kegg_meta(docs, kegg_docs)
+        return docs
 
     def get_ortho_by_id(self, _id):
         '''
@@ -80,18 +188,9 @@ class QueryProtein(mongo_util.MongoUtil):
         query = {'uniprot_id': _id}
         doc = self.collection.find_one(filter=query, projection={"_id": 0})
         if doc is None:
-            return {'uniprot_id': 'None',
-            'entry_name': 'None',
-            'gene_name': 'None',
-            'protein_name': 'None',
-            'canonical_sequence': 'None',
-            'length': 99999999,
-            'mass': '99999999',
-            'abundances': [],
-            'ncbi_taxonomy_id': 99999999,
-            'species_name': '99999999'}
+            return self._empty_meta()
         else:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
+            doc = self._sanitize(doc)
             result.append(doc)
             return result            
 
@@ -108,14 +207,10 @@ class QueryProtein(mongo_util.MongoUtil):
                 (:obj:`list` of :obj:`dict`): protein's metadata.
         '''
         result = []
-        expression = "\"" + name + "\""
-        query = {'$and': [{'$text': { '$search': expression } },
-                         {'ncbi_taxonomy_id': taxon_id},
-                         {'abundances': {'$exists': True} }]}
-        projection = {'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0, 'kinetics': 0}
+        query, projection = self._meta_by_name_taxon_query(name, taxon_id)
         docs = self.collection.find(filter=query, projection=projection)
         for doc in docs:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
+            doc = self._sanitize(doc)
             result.append(doc)
         return result
 
@@ -133,14 +228,10 @@ class QueryProtein(mongo_util.MongoUtil):
         '''
         result = []
         taxon_ids = self.taxon_manager.get_ids_by_name(species_name)
-        expression = "\"" + protein_name + "\""
-        query = {'$and': [{'$text': { '$search': expression } },
-                         {'ncbi_taxonomy_id': {'$in' :taxon_ids}},
-                         {'abundances': {'$exists': True} }]}
-        projection = {'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0, 'kinetics': 0}
+        query, projection = self._meta_by_name_taxon_query(protein_name, {'$in': taxon_ids})
         docs = self.collection.find(filter=query, projection=projection)
         for doc in docs:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
+            doc = self._sanitize(doc)
             result.append(doc)
         return result
 
@@ -156,8 +247,7 @@ class QueryProtein(mongo_util.MongoUtil):
                 protein's uniprot_id and name.
         '''
         result = []
-        expression = "\"" + name + "\""
-        query = { '$text': { '$search': expression } }
+        query = self._text_query(name)
         projection = {'_id': 0, 'uniprot_id': 1, 'protein_name': 1}
         docs = self.collection.find(filter=query, projection=projection)
         # count = self.collection.count_documents(query)
@@ -168,12 +258,13 @@ class QueryProtein(mongo_util.MongoUtil):
             result.append(dic)
         return result
 
-    def get_info_by_text(self, name):
+    def get_info_by_text(self, name, max_groups=None):
         '''
             Get proteins whose name or kegg name contains string 'name'.
 
             Args:
                 name (:obj:`str`): complete/incomplete protein name.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
 
             Returns:
                 (:obj:`list` of :obj:`dict`): list of dictionary containing 
@@ -181,30 +272,18 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []},
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': []}].
         '''
-        result = []
-        expression = "\"" + name + "\""
-        query = { '$text': { '$search': expression } }
+        query = self._text_query(name)
         projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
         docs = self.collection.find(filter=query, projection=projection)
+        return self._group_by_ko(docs, max_groups=max_groups)
 
-        for doc in docs:
-            ko_number = doc.get('ko_number', 'no number')
-            ko_name = doc.get('ko_name', ['no name'])
-            uniprot_id = doc['uniprot_id']
-            index = self.file_manager.search_dict_index(result, 'ko_number', ko_number)
-            if len(index) == 1:
-                result[index[0]]['uniprot_ids'].append(uniprot_id)
-            else:
-                dic = {'ko_number': ko_number, 'ko_name': ko_name, 'uniprot_ids': [uniprot_id]}
-                result.append(dic)
-        return result
-
-    def get_info_by_text_abundances(self, name):
+    def get_info_by_text_abundances(self, name, max_groups=None):
         '''
             Get proteins whose name or kegg name contains string 'name'.
 
             Args:
                 name (:obj:`str`): complete/incomplete protein name.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
 
             Returns:
                 (:obj:`list` of :obj:`dict`): list of dictionary containing 
@@ -212,34 +291,18 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': 0, 'id1': 1, 'id2': 0}}, # 0: has abundances info, 1: no abundances infor
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': 0, 'id1': 1, 'id2': 0}}].
         '''
-        result = []
-        expression = "\"" + name + "\""
-        query = { '$text': { '$search': expression } }
+        query = self._text_query(name)
         projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1, 'abundances': 1}
         docs = self.collection.find(filter=query, projection=projection)
+        return self._group_by_ko(docs, abundance=True, check_nan=True, max_groups=max_groups)
 
-        for doc in docs:
-            ko_number = doc.get('ko_number')
-            ko_name = doc.get('ko_name')
-            if ko_number is None or ko_number == 'nan':
-                ko_number = 'no number'
-                ko_name = ['no name']           
-            uniprot_id = doc['uniprot_id']
-            abundance_status = 'abundances' in doc
-            index = self.file_manager.search_dict_index(result, 'ko_number', ko_number)
-            if len(index) == 1:
-                result[index[0]]['uniprot_ids'][uniprot_id] = abundance_status
-            else:
-                dic = {'ko_number': ko_number, 'ko_name': ko_name, 'uniprot_ids': {uniprot_id: abundance_status}}
-                result.append(dic)
-        return result
-
-    def get_info_by_taxonid(self, _id):
+    def get_info_by_taxonid(self, _id, max_groups=None):
         '''
             Get proteins whose name or kegg name contains string 'name'.
 
             Args:
                 _id (:obj:`int`): ncbi taxonomy id.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
 
             Returns:
                 (:obj:`list` of :obj:`dict`): list of dictionary containing 
@@ -247,29 +310,18 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []},
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': []}].
         '''
-        result = []
         query = {'ncbi_taxonomy_id': _id}
         projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
         docs = self.collection.find(filter=query, projection=projection)
+        return self._group_by_ko(docs, max_groups=max_groups)
 
-        for doc in docs:
-            ko_number = doc.get('ko_number', 'no number')
-            ko_name = doc.get('ko_name', ['no name'])
-            uniprot_id = doc['uniprot_id']
-            index = self.file_manager.search_dict_index(result, 'ko_number', ko_number)
-            if len(index) == 1:
-                result[index[0]]['uniprot_ids'].append(uniprot_id)
-            else:
-                dic = {'ko_number': ko_number, 'ko_name': ko_name, 'uniprot_ids': [uniprot_id]}
-                result.append(dic)
-        return result
-
-    def get_info_by_taxonid_abundance(self, _id):
+    def get_info_by_taxonid_abundance(self, _id, max_groups=None):
         '''
             Get proteins associated with ncbi id.
 
             Args:
                 _id (:obj:`int`): ncbi taxonomy id.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
 
             Returns:
                 result (:obj:`list` of :obj:`dict`): list of dictionary containing 
@@ -277,23 +329,10 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': 0, 'id1': 1, 'id2': 0}},
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': 0, 'id1': 1, 'id2': 0}}].
         '''
-        result = []
         query = {'ncbi_taxonomy_id': _id}
         projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1, 'abundances': 1}
         docs = self.collection.find(filter=query, projection=projection)
-
-        for doc in docs:
-            ko_number = doc.get('ko_number', 'no number')
-            ko_name = doc.get('ko_name', ['no name'])
-            uniprot_id = doc['uniprot_id']
-            abundance_status = 'abundances' in doc
-            index = self.file_manager.search_dict_index(result, 'ko_number', ko_number)
-            if len(index) == 1:
-                result[index[0]]['uniprot_ids'][uniprot_id] = abundance_status
-            else:
-                dic = {'ko_number': ko_number, 'ko_name': ko_name, 'uniprot_ids': {uniprot_id: abundance_status}}
-                result.append(dic)
-        return result
+        return self._group_by_ko(docs, abundance=True, max_groups=max_groups)
 
     def get_info_by_ko(self, ko):
         '''
@@ -308,16 +347,9 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []},
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': []}].
         '''
-        ko = ko.upper()
-        result = [{'ko_number': ko, 'uniprot_ids': []}]
-        query = {'ko_number': ko}
-        projection = {'uniprot_id': 1, '_id': 0, 'ko_name': 1, 'ko_number': 1}
+        query, projection = self._group_members_query(ko, 'ko_number')
         docs = self.collection.find(filter=query, projection=projection)
-
-        for doc in docs:
-            result[0]['ko_name'] = doc.get('ko_name', ['no name'])
-            result[0]['uniprot_ids'].append(doc.get('uniprot_id'))
-        return result
+        return self._info_from_docs(docs, ko, 'ko_number')
 
     def get_info_by_ko_abundance(self, ko):
         '''
@@ -332,17 +364,140 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {}},
                  {'ko_number': ... 'ko_name': ... 'uniprot_ids': {}}].
         '''
-        ko = ko.upper()
-        result = [{'ko_number': ko, 'uniprot_ids': {}}]
-        query = {'ko_number': ko}
-        projection = {'uniprot_id': 1, '_id': 0, 'ko_name': 1, 'ko_number': 1, 'abundances': 1}
+        query, projection = self._group_members_query(ko, 'ko_number', abundance=True)
         docs = self.collection.find(filter=query, projection=projection)
+        return self._info_from_docs(docs, ko, 'ko_number', abundance=True)
+
+    @staticmethod
+    def _summary_query(group_id, group_type):
+        group_id = group_id.upper() if group_type == 'ko_number' else group_id.lower()
+        return {'_id': ortholog_summary.summary_id(group_type, group_id)}
+
+    @staticmethod
+    def _info_from_summary(doc, group_id, group_type, abundance=False):
+        """Output of get_info_by_ko(_abundance) or get_info_by_orthodb out of a summary document.
+        """
+        name_field = ortholog_summary.GROUPS[group_type]
+        group_id = group_id.upper() if group_type == 'ko_number' else group_id.lower()
+        result = {group_type: group_id, 'uniprot_ids': {} if abundance else []}
+        if doc is None:
+            return [result]
+        group_name = doc.get('group_name')
+        result[name_field] = ['no name'] if group_name is None else group_name
+        for member in doc['members']:
+            if abundance:
+                result['uniprot_ids'][member.get('uniprot_id')] = member['abundances']
+            else:
+                result['uniprot_ids'].append(member.get('uniprot_id'))
+        return [result]
+
+    @staticmethod
+    def _group_members_query(group_id, group_type, abundance=False):
+        """Query and projection of the proteins of a KEGG orthology or OrthoDB group,
+        used by get_info_by_ko(_abundance) and get_info_by_orthodb.
 
+        Return:
+            (:obj:`tuple` of :obj:`dict`)
+        """
+        group_id = group_id.upper() if group_type == 'ko_number' else group_id.lower()
+        projection = {'uniprot_id': 1, '_id': 0, ortholog_summary.GROUPS[group_type]: 1, group_type: 1}
+        if abundance:
+            projection['abundances'] = 1
+        return {group_type: group_id}, projection
+
+    @staticmethod
+    def _info_from_docs(docs, group_id, group_type, abundance=False):
+        """Output of get_info_by_ko(_abundance) or get_info_by_orthodb out of the
+        documents matched by _group_members_query.
+        """
+        name_field = ortholog_summary.GROUPS[group_type]
+        group_id = group_id.upper() if group_type == 'ko_number' else group_id.lower()
+        result = {group_type: group_id, 'uniprot_ids': {} if abundance else []}
         for doc in docs:
-            result[0]['ko_name'] = doc.get('ko_name', ['no name'])
-            abundance_status = 'abundances' in doc
-            result[0]['uniprot_ids'][doc.get('uniprot_id')] = abundance_status
-        return result
+            result[name_field] = doc.get(name_field, ['no name'])
+            if abundance:
+                result['uniprot_ids'][doc.get('uniprot_id')] = 'abundances' in doc
+            else:
+                result['uniprot_ids'].append(doc.get('uniprot_id'))
+        return [result]
+
+    def get_ortholog_summary(self, group_id, group_type='ko_number', members=True):
+        """Get the summary of a KEGG orthology or OrthoDB group from ortholog_abundance_summary
+        (see :mod:`datanator_query_python.aggregate.ortholog_summary`).
+
+        Args:
+            group_id (:obj:`str`): KO number or OrthoDB id.
+            group_type (:obj:`str`, optional): 'ko_number' or 'orthodb_id'. Defaults to 'ko_number'.
+            members (:obj:`bool`, optional): include the members array. Defaults to True.
+
+        Return:
+            (:obj:`dict`): summary document, None if there is none.
+        """
+        projection = None if members else {'members': 0}
+        return self.summary_collection.find_one(filter=self._summary_query(group_id, group_type),
+                                                projection=projection)
+
+    def get_info_by_ko_summary(self, ko, abundance=False):
+        '''
+            get_info_by_ko (abundance=False) and get_info_by_ko_abundance (abundance=True)
+            read from the ortholog summary collection.
+
+            Args:
+                ko (:obj:`str`): kegg orthology ID.
+                abundance (:obj:`bool`, optional): map uniprot ids to whether they have abundances. Defaults to False.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): same as get_info_by_ko or get_info_by_ko_abundance.
+        '''
+        doc = self.summary_collection.find_one(filter=self._summary_query(ko, 'ko_number'),
+                                               projection={'group_name': 1, 'members': 1})
+        return self._info_from_summary(doc, ko, 'ko_number', abundance=abundance)
+
+    def get_info_by_orthodb_summary(self, orthodb, abundance=False):
+        '''
+            get_info_by_orthodb read from the ortholog summary collection.
+
+            Args:
+                orthodb (:obj:`str`): OrthoDB id.
+                abundance (:obj:`bool`, optional): map uniprot ids to whether they have abundances. Defaults to False.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): same as get_info_by_orthodb.
+        '''
+        doc = self.summary_collection.find_one(filter=self._summary_query(orthodb, 'orthodb_id'),
+                                               projection={'group_name': 1, 'members': 1})
+        return self._info_from_summary(doc, orthodb, 'orthodb_id', abundance=abundance)
+
+    def get_uniprot_with_abundance_by_ko(self, ko):
+        '''
+            Uniprot ids of the proteins with the KO number that have abundances,
+            read from the ortholog summary collection, e.g. to page through
+            get_abundance_bulk instead of get_abundance_by_ko.
+
+            Args:
+                ko (:obj:`str`): KO number.
+
+            Returns:
+                (:obj:`list` of :obj:`str`)
+        '''
+        doc = self.summary_collection.find_one(filter=self._summary_query(ko, 'ko_number'),
+                                               projection={'members': 1})
+        if doc is None:
+            return []
+        return [m['uniprot_id'] for m in doc['members'] if m['abundances']]
+
+    @staticmethod
+    def _kinlaw_by_id_query(_id):
+        query = {'uniprot_id': {'$in': _id}}
+        projection = {'_id': 0, 'kinetics': 1, 'taxon': 1, 'uniprot_id': 1}
+        return query, projection
+
+    @staticmethod
+    def _kinlaw_from_doc(doc):
+        """Entry of get_kinlaw_by_id out of a protein document.
+        """
+        return {'uniprot_id': doc.get('uniprot_id'), 'ncbi_taxonomy_id': doc.get('taxon'),
+                'similar_functions': doc.get('kinetics')}
 
     def get_kinlaw_by_id(self, _id):
         '''
@@ -354,14 +509,9 @@ class QueryProtein(mongo_util.MongoUtil):
             Returns:
                 (:obj:`list` of `dict`): list of kinlaw information.
         '''
-        result = []
-        query = {'uniprot_id': {'$in': _id}}
-        projection = {'_id': 0, 'kinetics': 1, 'taxon': 1, 'uniprot_id': 1}
+        query, projection = self._kinlaw_by_id_query(_id)
         docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
-        for doc in docs:
-            result.append({'uniprot_id': doc.get('uniprot_id'), 'ncbi_taxonomy_id': doc.get('taxon'),
-                'similar_functions': doc.get('kinetics')})
-        return result
+        return [self._kinlaw_from_doc(doc) for doc in docs]
 
     def get_kinlaw_by_name(self, name):
         '''
@@ -389,20 +539,112 @@ class QueryProtein(mongo_util.MongoUtil):
 			Returns:
 				(:obj:`list` of `dict`): list of abundance information.
         '''
-        result = []
-        query = {'$and': [{'uniprot_id': {'$in': _id}}, {'abundances': {'$exists': True}}]}
-
-        projection = {'abundances': 1, 'uniprot_id': 1, '_id': 0,
-                      'protein_name': 1, 'gene_name': 1, 'species_name': 1,
-                      "modifications": 1}
-        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
-        count = self.collection.count_documents(query, collation=self.collation)
+        query, projection = self._abundance_by_id_query(_id)
+        docs, count = self.find_with_count(self.collection, query, projection=projection,
+                                           collation=self.collation)
         if count == 0:
             return [{'abundances': [], 'uniprot_id': 'No proteins that match input',
                      "species_name": "No proteins that match input"}]
+        return docs
+
+    def _iter_bulk(self, _id, build_query, meta, chunk_size, max_workers):
+        """Yield (uniprot_id, documents) for every id of _id, in input order,
+        querying chunks of ids concurrently. uniprot_ids are matched case-insensitively,
+        like the collation of the queries.
+        """
+        def fetch(chunk):
+            query, projection = build_query(chunk)
+            docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
+            if meta:
+                docs = [self._sanitize(doc) for doc in docs]
+                ko_numbers = self._ko_numbers(docs)
+                if ko_numbers:
+                    kegg_docs, _ = self.kegg_manager.get_meta_by_kegg_ids(ko_numbers)
+                    self._attach_kegg_meta(docs, kegg_docs)
+            return self._by_uniprot_id(docs)
+
+        for chunk, groups in self.map_chunks(fetch, _id, chunk_size=chunk_size, max_workers=max_workers):
+            for uniprot_id in chunk:
+                yield uniprot_id, groups.get(uniprot_id.casefold(), [])
+
+    @staticmethod
+    def _by_uniprot_id(docs):
+        """Documents grouped by casefolded uniprot_id.
+        """
+        groups = {}
         for doc in docs:
-            result.append(doc)
-        return result
+            groups.setdefault(doc['uniprot_id'].casefold(), []).append(doc)
+        return groups
+
+    @staticmethod
+    def _merge_bulk(pairs):
+        """(documents, ids not found) out of (uniprot_id, documents) pairs.
+        """
+        docs = []
+        missing = []
+        for uniprot_id, found in pairs:
+            if found:
+                docs.extend(found)
+            else:
+                missing.append(uniprot_id)
+        return docs, missing
+
+    def iter_meta_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Metadata of many proteins, e.g. a whole proteome, as get_meta_by_id returns it.
+        The ids are queried in chunks of chunk_size on max_workers threads, which keeps
+        every query far from the BSON size limit, and results are yielded in input order.
+
+        Args:
+            _id (:obj:`Iterable` of :obj:`str`): uniprot ids.
+            chunk_size (:obj:`int`, optional): ids per query. Defaults to 500.
+            max_workers (:obj:`int`, optional): queries run concurrently. Defaults to 4.
+
+        Return:
+            (:obj:`Generator` of :obj:`tuple`): (uniprot_id, list of documents) for every id,
+            with an empty list if the id is not in the collection.
+        """
+        return self._iter_bulk(_id, self._meta_by_id_query, True, chunk_size, max_workers)
+
+    def get_meta_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Metadata of many proteins, see iter_meta_bulk.
+
+        Args:
+            _id (:obj:`Iterable` of :obj:`str`): uniprot ids.
+            chunk_size (:obj:`int`, optional): ids per query. Defaults to 500.
+            max_workers (:obj:`int`, optional): queries run concurrently. Defaults to 4.
+
+        Return:
+            (:obj:`tuple` of :obj:`list`): documents in input order, ids not found.
+        """
+        return self._merge_bulk(self.iter_meta_bulk(_id, chunk_size=chunk_size, max_workers=max_workers))
+
+    def iter_abundance_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Abundances of many proteins, as get_abundance_by_id returns them,
+        queried like iter_meta_bulk.
+
+        Args:
+            _id (:obj:`Iterable` of :obj:`str`): uniprot ids.
+            chunk_size (:obj:`int`, optional): ids per query. Defaults to 500.
+            max_workers (:obj:`int`, optional): queries run concurrently. Defaults to 4.
+
+        Return:
+            (:obj:`Generator` of :obj:`tuple`): (uniprot_id, list of documents) for every id,
+            with an empty list if the id is not in the collection or has no abundances.
+        """
+        return self._iter_bulk(_id, self._abundance_by_id_query, False, chunk_size, max_workers)
+
+    def get_abundance_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Abundances of many proteins, see iter_abundance_bulk.
+
+        Args:
+            _id (:obj:`Iterable` of :obj:`str`): uniprot ids.
+            chunk_size (:obj:`int`, optional): ids per query. Defaults to 500.
+            max_workers (:obj:`int`, optional): queries run concurrently. Defaults to 4.
+
+        Return:
+            (:obj:`tuple` of :obj:`list`): documents in input order, ids without abundances.
+        """
+        return self._merge_bulk(self.iter_abundance_bulk(_id, chunk_size=chunk_size, max_workers=max_workers))
 
     def get_abundance_by_taxon(self, _id):
         '''
@@ -414,13 +656,46 @@ class QueryProtein(mongo_util.MongoUtil):
             Returns:
                 (:obj:`list` of `dict`): list of abundance information
         '''
-        result = []
+        return list(self.iter_abundance_by_taxon(_id))
+
+    def iter_abundance_by_taxon(self, _id, batch_size=None, limit=0):
+        '''
+            Stream protein abundance information in one species.
+
+            Args:
+                id (:obj:`str`): taxonomy id.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`Generator` of `dict`): abundance information
+        '''
         query = {'ncbi_taxonomy_id': _id}
         projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0, 'ncbi_taxonomy_id': 0}
-        docs = self.collection.find(filter=query, projection=projection)
-        for doc in docs:
-            result.append(doc)
-        return result
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
+
+    def iter_protein_under_taxon(self, _id, projection={'_id': 0, 'ancestor_name': 0, 'ancestor_taxon_id': 0},
+                                 batch_size=None, limit=0):
+        '''
+            Stream the proteins of an organism and of all its descendants, with
+            one range query on the nested-interval labels (see
+            :mod:`datanator_query_python.aggregate.taxon_intervals`).
+
+            Args:
+                _id (:obj:`int`): taxonomy id.
+                projection (:obj:`dict`, optional): mongodb query result projection.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`Generator` of `dict`): protein documents, empty if the organism is not labelled.
+        '''
+        labels = taxon_intervals.interval(self.taxon_col, _id)
+        if labels is None:
+            return iter(())
+        return self.iter_find(self.collection, taxon_intervals.subtree_query(labels), projection=projection,
+                              batch_size=batch_size, limit=limit)
 
     def get_proximity_abundance_taxon(self, _id, max_distance=3):
         '''
@@ -479,6 +754,78 @@ class QueryProtein(mongo_util.MongoUtil):
 
         return result
 
+    @staticmethod
+    def _equivalent_query(ko_number, ancestor_ids, levels, checked_ids):
+        """Filter of every protein the per-level searches of the get_equivalent_* methods
+        can return: same KO, with abundances, sharing at least the shallowest
+        common ancestor searched and outside the checked taxa.
+        """
+        return {'$and': [{'ko_number': ko_number}, {'abundances': {'$exists': True} },
+                         {'ancestor_taxon_id': ancestor_ids[len(ancestor_ids) - levels]},
+                         {'ncbi_taxonomy_id': {'$nin': checked_ids} },
+                         {'ancestor_taxon_id': {'$nin': checked_ids} }]}
+
+    @staticmethod
+    def _equivalent_level(doc, ancestor_ids, levels):
+        """Level at which doc is equivalent to the anchor: the anchor has
+        len(ancestor_ids) - level ancestors in common with doc (the longest
+        prefix of ancestor_ids in doc's ancestors), and none of the deeper ones.
+        Level i is what the query of the i-th iteration of the former per-level loop matched.
+
+        Args:
+            doc (:obj:`dict`): protein with ancestor_taxon_id and ncbi_taxonomy_id.
+            ancestor_ids (:obj:`list` of :obj:`int`): anchor's ancestors, root first.
+            levels (:obj:`int`): number of levels searched.
+
+        Return:
+            (:obj:`int`): level, or None if doc is in no level.
+        """
+        ancestors = set(doc['ancestor_taxon_id'])
+        length = len(ancestor_ids)
+        common = 0
+        while common < length and ancestor_ids[common] in ancestors:
+            common += 1
+        level = length - common
+        if level >= levels:
+            return None
+        deeper = ancestor_ids[common:]
+        if doc['ncbi_taxonomy_id'] in deeper or any(_id in ancestors for _id in deeper):
+            return None
+        return level
+
+    def _find_equivalents(self, ko_number, ancestor_ids, levels, checked_ids, projection):
+        """Every candidate of the get_equivalent_* methods, in one query.
+        """
+        if levels <= 0:
+            return []
+        query = self._equivalent_query(ko_number, ancestor_ids, levels, checked_ids)
+        return self.collection.find(filter=query, projection=projection)
+
+    @staticmethod
+    def _bucket_equivalents(docs, ancestor_ids, levels, max_depth, result):
+        """Append docs to result[level], with their depth below the common ancestor.
+
+        Args:
+            docs (:obj:`Iterable` of :obj:`dict`): candidates from _find_equivalents.
+            ancestor_ids (:obj:`list` of :obj:`int`): anchor's ancestors, root first.
+            levels (:obj:`int`): number of levels searched.
+            max_depth (:obj:`int`): max depth allowed from the common node.
+            result (:obj:`list` of :obj:`dict`): [{'distance': ..., 'documents': []}, ...] to fill.
+
+        Return:
+            (:obj:`list` of :obj:`dict`): result
+        """
+        for doc in docs:
+            level = QueryProtein._equivalent_level(doc, ancestor_ids, levels)
+            if level is None:
+                continue
+            depth = len(doc['ancestor_taxon_id']) - (len(ancestor_ids) - level)
+            if 0 <= depth < max_depth:
+                doc['depth'] = depth + 1
+                doc.pop('ancestor_taxon_id')
+                result[level]['documents'].append(doc)
+        return result
+
     def get_equivalent_protein(self, _id, max_distance, max_depth=float('inf')):
         '''
             Get replacement abundance value by taxonomic distance
@@ -520,29 +867,8 @@ class QueryProtein(mongo_util.MongoUtil):
 
         projection = {'abundances': 1, 'ncbi_taxonomy_id': 1, 'species_name': 1,
                     'uniprot_id': 1, '_id': 0, 'ancestor_taxon_id': 1}
-        for level in range(levels):
-            cur_id = ancestor_ids[-(level+1)]
-
-            if level == 0:
-                common_ancestors = ancestor_ids
-            else:
-                common_ancestors = ancestor_ids[:-(level)]
-            length = len(common_ancestors)
-
-            query = {'$and': [{'ancestor_taxon_id': {'$all': common_ancestors} },{'ncbi_taxonomy_id': {'$nin': checked_ids} },
-                              {'ancestor_taxon_id': {'$nin': checked_ids} }, {'ko_number': ko_number},
-                              {'abundances': {'$exists': True} }]}
-
-            equivalents = self.collection.find(filter=query, projection=projection)
-            for equivalent in equivalents:
-                depth = len(equivalent['ancestor_taxon_id']) - length
-                if 0 <= depth < max_depth:
-                    equivalent['depth'] = depth + 1
-                    tmp = equivalent.pop('ancestor_taxon_id')
-                    result[level]['documents'].append(equivalent)
-            checked_ids.append(cur_id)
-
-        return result
+        equivalents = self._find_equivalents(ko_number, ancestor_ids, levels, checked_ids, projection)
+        return self._bucket_equivalents(equivalents, ancestor_ids, levels, max_depth, result)
 
     def get_equivalent_protein_with_anchor(self, _id, max_distance, max_depth=float('inf')):
         '''
@@ -613,29 +939,8 @@ class QueryProtein(mongo_util.MongoUtil):
         projection = {'abundances': 1, 'ncbi_taxonomy_id': 1, 'species_name': 1,
                     'uniprot_id': 1, '_id': 0, 'ancestor_taxon_id': 1, 'ko_number': 1,
                     'ko_name': 1}
-        for level in range(levels):
-            cur_id = ancestor_ids[-(level+1)]
-
-            if level == 0:
-                common_ancestors = ancestor_ids
-            else:
-                common_ancestors = ancestor_ids[:-(level)]
-            length = len(common_ancestors)
-
-            query = {'$and': [{'ancestor_taxon_id': {'$all': common_ancestors} },{'ncbi_taxonomy_id': {'$nin': checked_ids} },
-                              {'ancestor_taxon_id': {'$nin': checked_ids} }, {'ko_number': ko_number.upper()},
-                              {'abundances': {'$exists': True} }]}
-
-            equivalents = self.collection.find(filter=query, projection=projection)
-            for equivalent in equivalents:
-                depth = len(equivalent['ancestor_taxon_id']) - length
-                if 0 <= depth < max_depth:
-                    equivalent['depth'] = depth + 1
-                    tmp = equivalent.pop('ancestor_taxon_id')
-                    result[level]['documents'].append(equivalent)
-            checked_ids.append(cur_id)
-
-        return result
+        equivalents = self._find_equivalents(ko_number.upper(), ancestor_ids, levels, checked_ids, projection)
+        return self._bucket_equivalents(equivalents, ancestor_ids, levels, max_depth, result)
 
     def get_uniprot_by_ko(self, ko):
         '''
@@ -668,6 +973,15 @@ class QueryProtein(mongo_util.MongoUtil):
     '''
 
 
+    @staticmethod
+    def _same_ko_query(ko_number):
+        return {'$and': [{'ko_number': ko_number}, {'abundances': {'$exists': True} }]}
+
+    def _ko_number_of(self, _id):
+        query = {'uniprot_id': _id}
+        projection = {'_id': 0, 'ko_number': 1, 'ncbi_taxonomy_id': 1, 'uniprot_id': 1}
+        return self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+
     def get_abundance_with_same_ko(self, _id):
         '''Find abundance information for protein with the same
             KO number.
@@ -679,10 +993,7 @@ class QueryProtein(mongo_util.MongoUtil):
                 (:obj:`list` of :obj:`dict`): information
                 [{'uniprot_id': , 'abundances': }, {},...,{}].
         '''
-
-        query = {'uniprot_id': _id}
-        projection = {'_id': 0, 'ko_number': 1, 'ncbi_taxonomy_id': 1, 'uniprot_id': 1}
-        doc = self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        doc = self._ko_number_of(_id)
         if doc is None:
             return 'No such protein in the database.'
         else:
@@ -691,13 +1002,30 @@ class QueryProtein(mongo_util.MongoUtil):
         if ko_number is None:
             return 'No kegg information available for this protein.'
 
-        query = {'$and': [{'ko_number': ko_number}, {'abundances': {'$exists': True} }]}
         projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0}
-        result = []
-        docs = self.collection.find(filter=query, projection=projection)
-        for doc in docs:
-            result.append(doc)
-        return result
+        return list(self.iter_find(self.collection, self._same_ko_query(ko_number),
+                                   projection=projection))
+
+    def iter_abundance_with_same_ko(self, _id, batch_size=None, limit=0):
+        '''Stream abundance information for protein with the same
+            KO number. Nothing is yielded if the protein is not in the
+            database or has no KO number.
+
+            Args:
+                _id (:obj:`str`): uniprot ID.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`Generator` of :obj:`dict`): information
+                {'uniprot_id': , 'abundances': }.
+        '''
+        doc = self._ko_number_of(_id)
+        if doc is None or doc.get('ko_number') is None:
+            return
+        projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0}
+        yield from self.iter_find(self.collection, self._same_ko_query(doc['ko_number']),
+                                  projection=projection, batch_size=batch_size, limit=limit)
 
     def get_abundance_by_ko(self, ko):
         ''' Get abundance information of proteins with
@@ -710,16 +1038,26 @@ class QueryProtein(mongo_util.MongoUtil):
                 (:obj:`list` of :obj:`dict`): information
                 [{'uniprot_id': , 'abundances': }, {},...,{}].             
         '''
-        query = {'$and': [{'ko_number': ko.upper()}, {'abundances': {'$exists': True} }]}
+        return list(self.iter_abundance_by_ko(ko))
+
+    def iter_abundance_by_ko(self, ko, batch_size=None, limit=0):
+        ''' Stream abundance information of proteins with
+            the same KO.
+
+            Args:
+                ko (:obj:`str`): KO number.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`Generator` of :obj:`dict`): information
+                {'uniprot_id': , 'abundances': }.
+        '''
         projection = {'abundances': 1, 'uniprot_id': 1, '_id': 0}
-        result = []
-        docs = self.collection.find(filter=query, projection=projection)
-        if docs == None:
-            return {'abundances': [], 'uniprot_id': 'No proteins match input information.'}
-        for doc in docs:
-            result.append(doc)
-        return result
+        return self.iter_find(self.collection, self._same_ko_query(ko.upper()),
+                              projection=projection, batch_size=batch_size, limit=limit)
     
+    @query_cache.cached(ttl=query_cache.TTLS['uniprot'])
     def get_kegg_orthology(self, uniprot_id):
         """Get protein's kegg orthology number given uniprot id.
         
@@ -739,6 +1077,53 @@ class QueryProtein(mongo_util.MongoUtil):
         else:
             return None, []
 
+    def get_kegg_orthology_bulk(self, uniprot_ids, chunk_size=1000, max_workers=4, cache=None):
+        """Get the kegg orthology of many proteins, with one $in query per chunk of ids.
+
+        Results are read from and stored in the cache under the entries of
+        get_kegg_orthology, so ids seen by either method skip the database.
+        Chunks are queried on max_workers threads; the cache is only written
+        from the calling thread.
+
+        Args:
+            uniprot_ids (:obj:`Iterable` of :obj:`str`): proteins' uniprot ids.
+            chunk_size (:obj:`int`, optional): ids per query. Defaults to 1000.
+            max_workers (:obj:`int`, optional): queries run concurrently. Defaults to 4.
+            cache (:obj:`query_cache.CacheBackend`, optional): cache to use. Defaults to None (self.cache).
+
+        Returns:
+            (:obj:`dict`): {uniprot_id: (ko_number, ko_name)} for every id, in input order,
+            (None, []) for ids not in the collection.
+        """
+        cache = self.cache if cache is None else cache
+        name = QueryProtein.get_kegg_orthology.__qualname__
+        result = dict.fromkeys(uniprot_ids)
+        missing = []
+        for uniprot_id in result:
+            value = None if cache is None else cache.get(query_cache.entry_key(name, self.collection, (uniprot_id,)))
+            if value is None:
+                missing.append(uniprot_id)
+            else:
+                result[uniprot_id] = pickle.loads(value)
+
+        def fetch(chunk):
+            query = {'uniprot_id': {'$in': chunk}}
+            projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
+            found = {}
+            for doc in self.collection.find(filter=query, projection=projection):
+                found.setdefault(doc['uniprot_id'], (doc.get('ko_number'), doc.get('ko_name', [])))
+            return found
+
+        for chunk, found in self.map_chunks(fetch, missing, chunk_size=chunk_size, max_workers=max_workers):
+            for uniprot_id in chunk:
+                value = found.get(uniprot_id, (None, []))
+                result[uniprot_id] = value
+                if cache is not None:
+                    cache.set(query_cache.entry_key(name, self.collection, (uniprot_id,)),
+                              pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl=query_cache.TTLS['uniprot'],
+                              tags=(self.collection.name, self.collection.full_name))
+        return result
+
     def get_equivalent_kegg_with_anchor_obsolete(self, ko, anchor, max_distance, max_depth=float('inf')):
         '''
             Get replacement abundance value by taxonomic distance
@@ -800,45 +1185,66 @@ class QueryProtein(mongo_util.MongoUtil):
         projection = {'abundances': 1, 'ncbi_taxonomy_id': 1, 'species_name': 1,
                     'uniprot_id': 1, '_id': 0, 'ancestor_taxon_id': 1, 'ko_number': 1,
                     'ko_name': 1, 'protein_name': 1, 'gene_name': 1}
-        for level in range(levels):
-            cur_id = ancestor_ids[-(level+1)]
-
-            if level == 0:
-                common_ancestors = ancestor_ids
-            else:
-                common_ancestors = ancestor_ids[:-(level)]
-            length = len(common_ancestors)
-
-            query = {'$and': [{'ancestor_taxon_id': {'$all': common_ancestors} },{'ncbi_taxonomy_id': {'$nin': checked_ids} },
-                              {'ancestor_taxon_id': {'$nin': checked_ids} }, {'ko_number': ko_number},
-                              {'abundances': {'$exists': True} }]}
-
-            equivalents = self.collection.find(filter=query, projection=projection)
-            for equivalent in equivalents:
-                depth = len(equivalent['ancestor_taxon_id']) - length
-                if 0 <= depth < max_depth:
-                    equivalent['depth'] = depth + 1
-                    tmp = equivalent.pop('ancestor_taxon_id')
-                    result[level]['documents'].append(equivalent)
-            checked_ids.append(cur_id)
-
-        return result
+        equivalents = self._find_equivalents(ko_number, ancestor_ids, levels, checked_ids, projection)
+        return self._bucket_equivalents(equivalents, ancestor_ids, levels, max_depth, result)
 
     def get_unique_protein(self):
-        """Get number of unique proteins in collection
+        """Get number of unique proteins in collection, up to a day old
+        (see :mod:`datanator_query_python.util.collection_stats`).
 
         Return:
             (:obj:`int`): number of unique proteins.
         """
-        return len(self.collection.distinct('uniprot_id', collation=self.collation))
+        return collection_stats.distinct_count(self.collection, 'uniprot_id', collation=self.collation)
     
     def get_unique_organism(self):
-        """Get number of unique organisms in collection.
+        """Get number of unique organisms in collection, up to a day old
+        (see :mod:`datanator_query_python.util.collection_stats`).
 
         Return:
             (:obj:`int`): number of unique organisms.
         """
-        return len(self.collection.distinct('ncbi_taxonomy_id'))
+        return collection_stats.distinct_count(self.collection, 'ncbi_taxonomy_id')
+
+    @staticmethod
+    def _canon_distance(canon_anc_1, canon_anc_2):
+        """Distance of organism 1 to its closest canonical common ancestor with
+        organism 2, as QueryTaxonTree.get_canon_common_ancestor computes it.
+
+        Args:
+            canon_anc_1 (:obj:`list` of :obj:`str`): canonical ancestor names of organism 1, root first.
+            canon_anc_2 (:obj:`list` of :obj:`str`): canonical ancestor names of organism 2, root first.
+
+        Return:
+            (:obj:`int`): len(canon_anc_1) - index of the common ancestor, -1 if there is none.
+        """
+        ancestor = file_util.FileUtil().get_common(canon_anc_1, canon_anc_2)
+        if ancestor == '':
+            return -1
+        return len(canon_anc_1) - canon_anc_1.index(ancestor)
+
+    def _canon_lineages(self, names, ids):
+        """Canonical ancestor names of taxa, in one query.
+
+        Args:
+            names (:obj:`list` of :obj:`str`): taxon names, matched case-insensitively.
+            ids (:obj:`list` of :obj:`int`): taxon ids.
+
+        Return:
+            (:obj:`tuple` of :obj:`dict`): {casefolded tax_name: canon_anc_names},
+            {tax_id: (tax_name, canon_anc_names)}.
+        """
+        names = list(dict.fromkeys(names))
+        ids = list(dict.fromkeys(ids))
+        query = {'$or': [{'tax_name': {'$in': names}}, {'tax_id': {'$in': ids}}]}
+        projection = {'_id': 0, 'tax_id': 1, 'tax_name': 1, 'canon_anc_names': 1}
+        by_name = {}
+        by_id = {}
+        for doc in self.taxon_col.find(filter=query, projection=projection, collation=self.collation):
+            canon_anc = doc.get('canon_anc_names', [])
+            by_name.setdefault(doc['tax_name'].casefold(), canon_anc)
+            by_id.setdefault(doc['tax_id'], (doc['tax_name'], canon_anc))
+        return by_name, by_id
 
     def get_all_kegg(self, ko, anchor, max_distance):
         '''Get replacement abundance value by taxonomic distance
@@ -881,24 +1287,28 @@ class QueryProtein(mongo_util.MongoUtil):
         con_0 = {'ko_number': ko}
         con_1 = {'abundances': {'$exists': True}}
         query = {'$and': [con_0, con_1]}
-        docs = self.collection.find(filter=query, projection=projection)
-        queried = deque()
-        names = {}
+        docs = [self._sanitize(doc) for doc in self.collection.find(filter=query, projection=projection)]
+        names = [anchor] + [doc['species_name'] for doc in docs if doc.get('species_name') is not None]
+        ids = [doc['ncbi_taxonomy_id'] for doc in docs if doc.get('species_name') is None]
+        by_name, by_id = self._canon_lineages(names, ids)
+        canon_anc_anchor = by_name.get(anchor.casefold())
+        if canon_anc_anchor is None:
+            return result
+        distances = {}
         for doc in docs:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
             species = doc.get('species_name')
-            if species is None and species not in queried:
-                taxon_id = doc['ncbi_taxonomy_id']
-                species = self.db_obj['taxon_tree'].find_one({"tax_id": taxon_id})['tax_name']
-                queried.append(taxon_id)
-                names[taxon_id] = species
-            elif species is None and species in queried:
-                species = names[doc['ncbi_taxonomy_id']]
-            obj = self.taxon_manager.get_canon_common_ancestor(anchor, species, org_format='tax_name')
-            distance = obj[anchor]            
+            if species is None:
+                species, canon_anc_species = by_id.get(doc['ncbi_taxonomy_id'], (None, None))
+            else:
+                canon_anc_species = by_name.get(species.casefold())
+            if canon_anc_species is None:
+                continue
+            distance = distances.get(species)
+            if distance is None:
+                distance = self._canon_distance(canon_anc_anchor, canon_anc_species)
+                distances[species] = distance
             if distance != -1 and distance <= max_distance:
-                species_canon_ancestor = obj[species+'_canon_ancestors']
-                doc['canon_ancestors'] = species_canon_ancestor
+                doc['canon_ancestors'] = canon_anc_species
                 result[distance-1]['documents'].append(doc)
         return result
 
@@ -946,42 +1356,85 @@ class QueryProtein(mongo_util.MongoUtil):
         docs = self.collection.find(filter=query, projection=projection,
                                     hint=[("abu_exist", ASCENDING), ("orthodb_id", ASCENDING)],
                                     batch_size=100)
-        queried = deque()
-        distances = {}
-        names = {}
-        species_anc = {}
         canon_anc_anchor = self.taxon_col.find_one({"tax_name": anchor})['canon_anc_names']
+        first = {}
+        docs = [self._sanitize(doc) for doc in docs]
+        for doc in docs:
+            first.setdefault(doc['ncbi_taxonomy_id'], doc)
+        missing = [taxon_id for taxon_id, doc in first.items() if doc.get('species_name') is None]  # few documents don't have species_name field
+        names = {}
+        if missing:
+            for tmp in self.taxon_col.find({"tax_id": {'$in': missing}}, projection={'_id': 0, 'tax_id': 1, 'tax_name': 1}):
+                names.setdefault(tmp['tax_id'], tmp['tax_name'])
+        taxon_ids = list(first)
+        species = [names.get(taxon_id) if first[taxon_id].get('species_name') is None else first[taxon_id]['species_name']
+                   for taxon_id in taxon_ids]
+        canon_ancs = [first[taxon_id]["canon_anc_names"] for taxon_id in taxon_ids]
+        distances = dict(zip(taxon_ids, self._canon_distances(anchor, species, canon_anc_anchor, canon_ancs).tolist()))
+        canon_ancestors = dict(zip(taxon_ids, canon_ancs))
         for doc in docs:
-            doc = json.loads(json.dumps(doc, ignore_nan=True))
-            species = doc.get('species_name')
             taxon_id = doc['ncbi_taxonomy_id']
-            if species is None and taxon_id not in queried: # few documents don't have species_name field
-                tmp = self.taxon_col.find_one({"tax_id": taxon_id})
-                species = tmp['tax_name']
-                canon_anc_species = tmp["canon_anc_names"]
-                queried.append(taxon_id)
-                names[taxon_id] = species
-                species_anc[taxon_id] = canon_anc_species
-                obj = self._get_common_canon_anc(anchor, species, canon_anc_anchor, doc["canon_anc_names"])
-                distances[taxon_id] = obj
-            elif species is not None and taxon_id not in queried:
-                canon_anc_species = doc["canon_anc_names"]
-                queried.append(taxon_id)
-                names[taxon_id] = species
-                species_anc[taxon_id] = canon_anc_species
-                obj = self._get_common_canon_anc(anchor, species, canon_anc_anchor, doc["canon_anc_names"])
-                distances[taxon_id] = obj                
-            else:
-                species = names[taxon_id]
-                canon_anc_species = species_anc[taxon_id]
-                obj = distances[taxon_id]            
-            distance = obj[anchor]            
+            distance = distances[taxon_id]
             if distance != -1 and distance <= max_distance:
-                species_canon_ancestor = obj[species+'_canon_ancestors']
-                doc['canon_ancestors'] = species_canon_ancestor
+                doc['canon_ancestors'] = canon_ancestors[taxon_id]
                 result[distance-1]['documents'].append(doc)
         return result
 
+    def _canon_distances(self, anchor, species, canon_anc_anchor, canon_ancs):
+        """Distance of the anchor to its closest canonical common ancestor with
+        every species at once, i.e. _get_common_canon_anc(anchor, species[i],
+        canon_anc_anchor, canon_ancs[i])[anchor] for every i.
+
+        Ancestor names are mapped to integer codes (names that are not in the
+        anchor's lineage share one code) and the lineages padded into an int32
+        matrix, one row per species, as wide as the anchor's lineage plus one
+        column; the common prefix of every lineage with the anchor's is the
+        first column where the row differs from the anchor row.
+
+        Args:
+            anchor (:obj:`str`): anchor species' name.
+            species (:obj:`list` of :obj:`str`): species' names.
+            canon_anc_anchor (:obj:`list` of :obj:`str`): canonical ancestor names of the anchor.
+            canon_ancs (:obj:`list` of :obj:`list`): canonical ancestor names of every species.
+
+        Return:
+            (:obj:`numpy.ndarray`): distances, -1 where there is no common ancestor.
+        """
+        codes = {}
+        for name in canon_anc_anchor + [anchor]:
+            codes.setdefault(name, len(codes))
+        other = len(codes)
+        width = len(canon_anc_anchor) + 1
+        # -1 pads the lineages and -2 the anchor row, so every row differs from it in its last column at the latest
+        anchor_row = np.full(width, -2, dtype=np.int32)
+        anchor_row[:width - 1] = [codes[name] for name in canon_anc_anchor]
+        lengths = np.fromiter(map(len, canon_ancs), dtype=np.int64, count=len(canon_ancs))
+        flat = np.fromiter(map(codes.get, itertools.chain.from_iterable(canon_ancs), itertools.repeat(other)),
+                           dtype=np.int32, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(len(canon_ancs)), lengths)
+        columns = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        kept = columns < width
+        matrix = np.full((len(canon_ancs), width), -1, dtype=np.int32)
+        matrix[rows[kept], columns[kept]] = flat[kept]
+        last = np.full(len(canon_ancs), -1, dtype=np.int32)
+        last[lengths > 0] = flat[np.cumsum(lengths)[lengths > 0] - 1]
+        common = np.argmax(matrix != anchor_row, axis=1)
+
+        # the ancestor is the first occurrence of its name in the anchor's lineage
+        first_index = np.array([canon_anc_anchor.index(name) for name in canon_anc_anchor] or [0], dtype=np.int64)
+        distances = np.where(common > 0, len(canon_anc_anchor) - first_index[np.maximum(common - 1, 0)], -1)
+        anchor_is_parent = last == codes[anchor]
+        species_is_parent = np.array([bool(canon_anc_anchor) and canon_anc_anchor[-1] == name for name in species],
+                                     dtype=bool)
+        distances = np.where((common > 0) & anchor_is_parent & ~species_is_parent, 0, distances)
+        distances = np.where((common > 0) & species_is_parent, 1, distances)
+        distances = np.where((lengths == len(canon_anc_anchor)) & (common == lengths), 0, distances)
+        for i, name in enumerate(species):
+            if name == anchor and common[i] > 0:
+                # both organisms share one key of the result, which holds the species' distance
+                distances[i] = self._get_common_canon_anc(anchor, name, canon_anc_anchor, canon_ancs[i])[str(anchor)]
+        return distances
+
     def _get_common_canon_anc(self, org1, org2, canon_anc_1, canon_anc_2):
         """Get canon common ancestors between species.
 
@@ -1036,13 +1489,6 @@ class QueryProtein(mongo_util.MongoUtil):
                 [{'orthodb_id': ... 'orthodb_name': ... 'uniprot_ids': []},
                  {'orthodb_id': ... 'orthodb_name': ... 'uniprot_ids': []}].
         '''
-        ko = orthodb.lower()
-        result = [{'orthodb_id': ko, 'uniprot_ids': []}]
-        query = {'orthodb_id': ko}
-        projection = {'uniprot_id': 1, '_id': 0, 'orthodb_name': 1, 'orthodb_id': 1}
+        query, projection = self._group_members_query(orthodb, 'orthodb_id')
         docs = self.collection.find(filter=query, projection=projection)
-
-        for doc in docs:
-            result[0]['orthodb_name'] = doc.get('orthodb_name', ['no name'])
-            result[0]['uniprot_ids'].append(doc.get('uniprot_id'))
-        return result
\ No newline at end of file
+        return self._info_from_docs(docs, orthodb, 'orthodb_id')
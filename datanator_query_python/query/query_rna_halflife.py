@@ -1,18 +1,44 @@
 from datanator_query_python.util import mongo_util, file_util
+from datanator_query_python.aggregate import taxon_intervals
+from pymongo import ASCENDING
 from pymongo.collation import Collation, CollationStrength
 
 
 class QueryRNA(mongo_util.MongoUtil):
 
+    # (filter field, _id) indexes the *_page methods page on; without them the
+    # server sorts every match on _id in memory. protein_names is matched with
+    # the collation of the class, so its index has to be built with it.
+    page_indexes = [[('protein_names', ASCENDING), ('_id', ASCENDING)],
+                    [('ko_number', ASCENDING), ('_id', ASCENDING)],
+                    [('orthodb_id', ASCENDING), ('_id', ASCENDING)]]
+
     def __init__(self, server=None, username=None, password=None, verbose=False,
                  db=None, collection_str=None, authDB='admin', readPreference='nearest',
-                 replicaSet=None):
+                 replicaSet=None, options=None):
         super().__init__(MongoDB=server, db=db, username=username,
                         password=password, authSource=authDB, readPreference=readPreference,
-                        verbose=verbose, replicaSet=replicaSet)
+                        verbose=verbose, replicaSet=replicaSet, options=options)
         self.collection = self.db_obj[collection_str]
+        self.taxon_collection = self.db_obj['taxon_tree']
         self.collation = Collation('en', strength=CollationStrength.SECONDARY)
 
+    @staticmethod
+    def _doc_by_oln_query(oln):
+        return {'halflives.ordered_locus_name': oln}
+
+    @staticmethod
+    def _doc_by_names_query(name):
+        return {'protein_names': name}
+
+    @staticmethod
+    def _doc_by_ko_query(ko_number):
+        return {'ko_number': ko_number}
+
+    @staticmethod
+    def _doc_by_orthodb_query(orthodb):
+        return {'orthodb_id': orthodb}
+
     def get_doc_by_oln(self, oln, projection={'_id': 0}):
         """Get document by ordered locus name
         
@@ -24,7 +50,7 @@ class QueryRNA(mongo_util.MongoUtil):
             (:obj:`tuple` of :obj:`Pymongo.Cursor` and :obj:`int`):
             Pymongo cursor object and number of documents returned
         """
-        query = {'halflives.ordered_locus_name': oln}
+        query = self._doc_by_oln_query(oln)
         docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
         count = self.collection.count_documents(query, collation=self.collation)
         return docs, count
@@ -40,15 +66,12 @@ class QueryRNA(mongo_util.MongoUtil):
             size (:obj:`int`): number of items per page.
 
         Return:
-            (:obj:`tuple` of :obj:`Pymongo.Cursor` and :obj:`int`):
-            Pymongo cursor object and number of documents returned.
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
         """
-        con_1 = {'protein_names': name}
-        query = con_1
-        docs = self.collection.find(filter=query, projection=projection, collation=self.collation,
-                                    skip=_from, limit=size)
-        count = self.collection.count_documents(query, collation=self.collation)
-        return docs, count
+        query = self._doc_by_names_query(name)
+        return self.find_with_count(self.collection, query, projection=projection,
+                                    skip=_from, limit=size, collation=self.collation)
 
     def get_doc_by_ko(self, ko_number, projection={'_id': 0},
                       _from=0, size=0):
@@ -62,14 +85,12 @@ class QueryRNA(mongo_util.MongoUtil):
             size (:obj:`int`): number of items per page.
 
         Return:
-            (:obj:`tuple` of :obj:`Pymongo.Cursor` and :obj:`int`):
-            pymongo interable and number of documents.
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
         """
-        query = {'ko_number': ko_number}
-        docs = self.collection.find(filter=query, projection=projection,
+        query = self._doc_by_ko_query(ko_number)
+        return self.find_with_count(self.collection, query, projection=projection,
                                     skip=_from, limit=size)
-        count = self.collection.count_documents(query)
-        return docs, count
 
     def get_doc_by_orthodb(self, orthodb, projection={'_id': 0},
                       _from=0, size=0):
@@ -83,11 +104,85 @@ class QueryRNA(mongo_util.MongoUtil):
             size (:obj:`int`): number of items per page.
 
         Return:
-            (:obj:`tuple` of :obj:`Pymongo.Cursor` and :obj:`int`):
-            pymongo interable and number of documents.
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
         """
-        query = {'orthodb_id': orthodb}
-        docs = self.collection.find(filter=query, projection=projection,
+        query = self._doc_by_orthodb_query(orthodb)
+        return self.find_with_count(self.collection, query, projection=projection,
                                     skip=_from, limit=size)
-        count = self.collection.count_documents(query)
-        return docs, count
\ No newline at end of file
+
+    def get_doc_by_names_page(self, name, size=10, page_token=None, projection={'_id': 0}):
+        """Get one page of documents by protein name, paging by _id
+        (cost does not grow with page depth, unlike get_doc_by_names' _from).
+        Needs the (protein_names, _id) index of :attr:`page_indexes`.
+
+        Args:
+            name (:obj:`str`): name of the protein
+            size (:obj:`int`, optional): number of items per page. Defaults to 10.
+            page_token (:obj:`str`, optional): token returned with the previous page. Defaults to None (first page).
+            projection (:obj:`dict`, optional): mongodb query result projection. Defaults to {'_id': 0}.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`):
+            documents and token of the next page (None on the last page).
+        """
+        query = self._doc_by_names_query(name)
+        return self.find_page(self.collection, query, size=size, page_token=page_token,
+                              projection=projection, collation=self.collation)
+
+    def get_doc_by_ko_page(self, ko_number, size=10, page_token=None, projection={'_id': 0}):
+        """Get one page of documents by ko_number, paging by _id.
+        Needs the (ko_number, _id) index of :attr:`page_indexes`.
+
+        Args:
+            ko_number (:obj:`str`): Kegg ortholog number.
+            size (:obj:`int`, optional): number of items per page. Defaults to 10.
+            page_token (:obj:`str`, optional): token returned with the previous page. Defaults to None (first page).
+            projection (:obj:`dict`, optional): mongodb query result projection. Defaults to {'_id': 0}.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`):
+            documents and token of the next page (None on the last page).
+        """
+        query = self._doc_by_ko_query(ko_number)
+        return self.find_page(self.collection, query, size=size, page_token=page_token,
+                              projection=projection)
+
+    def get_doc_by_orthodb_page(self, orthodb, size=10, page_token=None, projection={'_id': 0}):
+        """Get one page of documents by orthodb group ID, paging by _id.
+        Needs the (orthodb_id, _id) index of :attr:`page_indexes`.
+
+        Args:
+            orthodb (:obj:`str`): Orthodb group ID.
+            size (:obj:`int`, optional): number of items per page. Defaults to 10.
+            page_token (:obj:`str`, optional): token returned with the previous page. Defaults to None (first page).
+            projection (:obj:`dict`, optional): mongodb query result projection. Defaults to {'_id': 0}.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`):
+            documents and token of the next page (None on the last page).
+        """
+        query = self._doc_by_orthodb_query(orthodb)
+        return self.find_page(self.collection, query, size=size, page_token=page_token,
+                              projection=projection)
+
+    def iter_doc_under_taxon(self, _id, projection={'_id': 0}, batch_size=None, limit=0):
+        """Stream the documents with half-lives measured in an organism or in any
+        of its descendants, with one range query on the nested-interval labels
+        (see :mod:`datanator_query_python.aggregate.taxon_intervals`). Half-lives
+        of other organisms are dropped from the documents.
+
+        Args:
+            _id (:obj:`int`): NCBI Taxonomy ID.
+            projection (:obj:`dict`, optional): mongodb query result projection. Defaults to {'_id': 0}.
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Return:
+            (:obj:`Generator` of :obj:`dict`): documents, none if the organism is not labelled.
+        """
+        labels = taxon_intervals.interval(self.taxon_collection, _id)
+        if labels is None:
+            return iter(())
+        return taxon_intervals.iter_subtree_docs(self.collection, labels, 'halflives', projection=projection,
+                                                 batch_size=batch_size, limit=limit, max_time_ms=self.max_time_ms)
@@ -1,4 +1,4 @@
-from datanator_query_python.util import mongo_util, file_util
+from datanator_query_python.util import mongo_util, file_util, query_cache
 from pymongo.collation import Collation, CollationStrength
 import json
 
@@ -7,13 +7,13 @@ class QuerySabioCompound(mongo_util.MongoUtil):
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', max_entries=float('inf'), verbose=True, collection_str='sabio_compound',
-                 readPreference='nearest', replicaSet=None):
+                 readPreference='nearest', replicaSet=None, options=None, cache=None):
 
         super().__init__(MongoDB=server,
                          db=database,
                          verbose=verbose, max_entries=max_entries, username=username,
                          password=password, authSource=authSource, readPreference=readPreference,
-                         replicaSet=replicaSet)
+                         replicaSet=replicaSet, options=options, cache=cache)
         self.file_manager = file_util.FileUtil()
         self.max_entries = max_entries
         self.verbose = verbose
@@ -22,6 +22,7 @@ class QuerySabioCompound(mongo_util.MongoUtil):
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
         self.collection_str = collection_str
 
+    @query_cache.cached(ttl=query_cache.TTLS['sabio_compound'], casefold=True)
     def get_id_by_name(self, names):
         """Get sabio compound id given compound name
         
@@ -43,6 +44,7 @@ class QuerySabioCompound(mongo_util.MongoUtil):
             result.append(doc['_id'])
         return result
 
+    @query_cache.cached(ttl=query_cache.TTLS['sabio_compound'], casefold=True)
     def get_inchikey_by_name(self, names):
         """Get compound InChIKey using compound names.
         
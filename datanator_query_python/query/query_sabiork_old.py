@@ -1,5 +1,5 @@
-from datanator_query_python.util import mongo_util, chem_util, file_util
-from datanator_query_python.aggregate import lookups
+from datanator_query_python.util import mongo_util, chem_util, file_util, collection_stats
+from datanator_query_python.aggregate import lookups, taxon_intervals
 from pymongo.collation import Collation, CollationStrength
 from . import query_taxon_tree, query_sabio_compound
 import json
@@ -14,42 +14,34 @@ class QuerySabioOld(mongo_util.MongoUtil):
 
     def __init__(self, cache_dirname=None, MongoDB=None, replicaSet=None, db='datanator',
                  collection_str='sabio_rk_old', verbose=False, max_entries=float('inf'), username=None,
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None, cache=None):
         self.max_entries = max_entries
         super().__init__(cache_dirname=cache_dirname, MongoDB=MongoDB,
                         replicaSet=replicaSet, db=db,
                         verbose=verbose, max_entries=max_entries, username=username,
-                        password=password, authSource=authSource, readPreference=readPreference)
+                        password=password, authSource=authSource, readPreference=readPreference,
+                        options=options, cache=cache)
         self.u = self.client["datanator-test"]["uniprot"]
         self.chem_manager = chem_util.ChemUtil()
         self.file_manager = file_util.FileUtil()
         self.collection = self.db_obj[collection_str]
         self.collection_str = collection_str
         self.taxon_manager = query_taxon_tree.QueryTaxonTree(username=username, password=password,
-        authSource=authSource, readPreference=readPreference, MongoDB=MongoDB, replicaSet=replicaSet)
+        authSource=authSource, readPreference=readPreference, MongoDB=MongoDB, replicaSet=replicaSet,
+        options=options, cache=cache)
         self.compound_manager = query_sabio_compound.QuerySabioCompound(server=MongoDB, database=db,
                                                                         username=username, password=password, 
                                                                         readPreference=readPreference, authSource=authSource,
-                                                                        replicaSet=replicaSet)
+                                                                        replicaSet=replicaSet, options=options, cache=cache)
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
-    def get_kinlaw_by_environment(self, taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
-                          name_space=None, param_type=None, projection={'_id': 0}):
-        """get kinlaw info based on experimental conditions
-        
-        Args:
-            taxon (:obj:`list`, optional): list of ncbi taxon id
-            taxon_wildtype (:obj:`list` of :obj:`bool`, optional): True indicates wildtype and False indicates mutant
-            ph_range (:obj:`list`, optional): range of pH
-            temp_range (:obj:`list`, optional): range of temperature
-            name_space (:obj:`dict`, optional): cross_reference key/value pair, i.e. {'ec-code': '3.4.21.62'}
-            param_type (:obj:`list`, optional): possible values for parameters.type
-            projection (:obj:`dict`, optional): mongodb query result projection
+    @staticmethod
+    def _environment_query(taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
+                           name_space=None, param_type=None):
+        """Query used by get_kinlaw_by_environment.
 
-        Returns:
-            (:obj:`tuple`) consisting of 
-            docs (:obj:`list` of :obj:`dict`): list of docs;
-            count (:obj:`int`): number of documents found 
+        Return:
+            (:obj:`dict`)
         """
         all_constraints = []
         taxon_wildtype = [int(x) for x in taxon_wildtype]
@@ -67,12 +59,195 @@ class QuerySabioOld(mongo_util.MongoUtil):
             all_constraints.append({"resource": {'$elemMatch': {'namespace': key, 'id': val}}})
         if param_type:
             all_constraints.append({'parameter': {'$elemMatch': {'type': {'$in': param_type}}}})
+        return {'$and': all_constraints}
+
+    @staticmethod
+    def _truncate_inchikeys(inchikeys, dof):
+        """Turn inchikeys into prefix patterns according to the
+        degree of freedom allowed.
+
+        Args:
+            inchikeys (:obj:`list` of :obj:`str`): list of inchikeys.
+            dof (:obj:`int`): number of parts of inchikey to truncate.
+
+        Return:
+            (:obj:`list`)
+        """
+        if dof == 0:
+            return inchikeys
+        elif dof == 1:
+            return [re.compile('^' + x[:-2]) for x in inchikeys]
+        else:
+            return [re.compile('^' + x[:14]) for x in inchikeys]
+
+    @classmethod
+    def _rxn_query(cls, substrates, products, dof=0, bound='loose'):
+        """Query used by get_kinlaw_by_rxn and get_kinlaw_by_rxn_ortho.
+
+        Return:
+            (:obj:`dict`)
+        """
+        substrate = 'reaction_participant.substrate_aggregate'
+        product = 'reaction_participant.product_aggregate'
+        substrates = cls._truncate_inchikeys(substrates, dof)
+        products = cls._truncate_inchikeys(products, dof)
+        if bound == 'loose':
+            constraint_0 = {substrate: {'$all': substrates}}
+            constraint_1 = {product: {'$all': products}}
+        else:
+            constraint_0 = {substrate: substrates}
+            constraint_1 = {product: products}
+        constraint_2 = {"taxon_id": {"$ne": None}}
+        return {'$and': [constraint_0, constraint_1, constraint_2]}
+
+    @staticmethod
+    def _rxn_name_query(substrates, products, bound='loose'):
+        """Query used by get_kinlaw_by_rxn_name.
+
+        Return:
+            (:obj:`dict`)
+        """
+        sub_key_field = 'substrate_names'
+        pro_key_field = 'product_names'
+        s_constraint = {sub_key_field: {'$all': substrates}}
+        p_constraint = {pro_key_field: {'$all': products}}
+        if bound == 'loose':
+            return {'$and': [s_constraint, p_constraint]}
+        bounded_s = {sub_key_field: {'$size': len(substrates)}}
+        bounded_p = {pro_key_field: {'$size': len(products)}}
+        return {'$and': [s_constraint, p_constraint, bounded_s, bounded_p]}
+
+    @staticmethod
+    def _kegg_meta_lookup():
+        """$lookup joining kegg_orthology documents as kegg_meta.
+
+        Return:
+            (:obj:`dict`)
+        """
+        return lookups.Lookups().simple_lookup("kegg_orthology", "resource.id", "definition.ec_code", "kegg_meta")
 
-        query = {'$and': all_constraints}
+    @classmethod
+    def _kegg_meta_pipeline(cls, query, projection, skip=0, limit=0):
+        """Pipeline matching query and joining kegg_orthology documents as kegg_meta.
+
+        Return:
+            (:obj:`list` of :obj:`dict`)
+        """
+        lookup = cls._kegg_meta_lookup()
+        if limit > 0:
+            return [{"$match": query}, {"$limit": limit}, {"$skip": skip}, lookup, {"$project": projection}]
+        else:
+            return [{"$match": query}, {"$skip": skip}, lookup, {"$project": projection}]
+
+    @staticmethod
+    def _entryid_query(entry_id):
+        """Query matching documents of a sabio entry id.
+
+        Return:
+            (:obj:`dict`)
+        """
+        constraint_0 = {'namespace': 'sabiork.reaction', 'id': str(entry_id)}
+        return {'resource': {'$elemMatch': constraint_0}}
+
+    @staticmethod
+    def _prm_query(kinlaw_ids):
+        """Query used by get_rxn_with_prm.
+
+        Return:
+            (:obj:`dict`)
+        """
+        con_0 = {'parameter.observed_name': {'$in': ['Km', 'kcat']}}
+        con_1 = {'kinlaw_id': {'$in': kinlaw_ids}}
+        return {'$and': [con_0, con_1]}
+
+    @staticmethod
+    def _subunit_pipeline(_ids):
+        """Pipeline used by get_reaction_by_subunit.
+
+        Return:
+            (:obj:`list` of :obj:`dict`)
+        """
+        projection = {'_id': 0, 'ec_meta': 1, 'substrates': 1, 'products': 1, 
+                      'kinlaw_id': 1, 'resource': 1, 'reaction_participant.substrate_aggregate': 1,
+                      'reaction_participant.product_aggregate': 1}
+        return [
+             {'$match': {'enzymes.subunit.uniprot_id': {'$in': _ids}}},
+             {'$addFields': {"__order": {'$indexOfArray': [_ids, "$enzymes.subunit.uniprot_id"]},
+                             "substrates": "$reaction_participant.substrate",
+                             "products": "$reaction_participant.product"}},
+             {'$sort': {"__order": 1}},
+             {"$project": projection}
+            ]
+
+    def get_kinlaw_by_environment(self, taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
+                          name_space=None, param_type=None, projection={'_id': 0}):
+        """get kinlaw info based on experimental conditions
+        
+        Args:
+            taxon (:obj:`list`, optional): list of ncbi taxon id
+            taxon_wildtype (:obj:`list` of :obj:`bool`, optional): True indicates wildtype and False indicates mutant
+            ph_range (:obj:`list`, optional): range of pH
+            temp_range (:obj:`list`, optional): range of temperature
+            name_space (:obj:`dict`, optional): cross_reference key/value pair, i.e. {'ec-code': '3.4.21.62'}
+            param_type (:obj:`list`, optional): possible values for parameters.type
+            projection (:obj:`dict`, optional): mongodb query result projection
+
+        Returns:
+            (:obj:`tuple`) consisting of 
+            docs (:obj:`list` of :obj:`dict`): list of docs;
+            count (:obj:`int`): number of documents found 
+        """
+        query = self._environment_query(taxon=taxon, taxon_wildtype=taxon_wildtype, ph_range=ph_range,
+                                        temp_range=temp_range, name_space=name_space, param_type=param_type)
         docs = self.collection.find(filter=query, projection=projection)
         count = self.collection.count_documents(query)
         return docs, count
 
+    def iter_kinlaw_by_environment(self, taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
+                                   name_space=None, param_type=None, projection={'_id': 0},
+                                   batch_size=None, limit=0):
+        """Stream kinlaw info based on experimental conditions, without counting
+        the matches first.
+
+        Args:
+            taxon (:obj:`list`, optional): list of ncbi taxon id
+            taxon_wildtype (:obj:`list` of :obj:`bool`, optional): True indicates wildtype and False indicates mutant
+            ph_range (:obj:`list`, optional): range of pH
+            temp_range (:obj:`list`, optional): range of temperature
+            name_space (:obj:`dict`, optional): cross_reference key/value pair, i.e. {'ec-code': '3.4.21.62'}
+            param_type (:obj:`list`, optional): possible values for parameters.type
+            projection (:obj:`dict`, optional): mongodb query result projection
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Returns:
+            (:obj:`Generator` of :obj:`dict`): docs found
+        """
+        query = self._environment_query(taxon=taxon, taxon_wildtype=taxon_wildtype, ph_range=ph_range,
+                                        temp_range=temp_range, name_space=name_space, param_type=param_type)
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
+
+    def iter_kinlaw_under_taxon(self, taxon, projection={'_id': 0}, batch_size=None, limit=0):
+        """Stream the kinetic laws measured in an organism or in any of its
+        descendants, with one range query on the nested-interval labels
+        (see :mod:`datanator_query_python.aggregate.taxon_intervals`).
+
+        Args:
+            taxon (:obj:`int`): ncbi taxon id
+            projection (:obj:`dict`, optional): mongodb query result projection
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Returns:
+            (:obj:`Generator` of :obj:`dict`): docs found, none if the organism is not labelled
+        """
+        labels = self.taxon_manager.get_interval(taxon)
+        if labels is None:
+            return iter(())
+        return self.iter_find(self.collection, taxon_intervals.subtree_query(labels), projection=projection,
+                              batch_size=batch_size, limit=limit)
+
     def get_reaction_doc(self, kinlaw_id, projection={'_id': 0}):
         '''Find a document on reaction with the kinlaw_id
         Args:
@@ -107,15 +282,8 @@ class QuerySabioOld(mongo_util.MongoUtil):
         substrate = 'reaction_participant.substrate_aggregate'
         product = 'reaction_participant.product_aggregate'
         projection = {'kinlaw_id': 1, '_id': 0}
-        if dof == 0:
-            substrates = substrates
-            products = products
-        elif dof == 1:
-            substrates = [re.compile('^' + x[:-2]) for x in substrates]
-            products = [re.compile('^' + x[:-2]) for x in products]
-        else:
-            substrates = [re.compile('^' + x[:14]) for x in substrates]
-            products = [re.compile('^' + x[:14]) for x in products]
+        substrates = self._truncate_inchikeys(substrates, dof)
+        products = self._truncate_inchikeys(products, dof)
 
         constraint_0 = {substrate: {'$all': substrates}}
         constraint_1 = {product: {'$all': products}}
@@ -143,36 +311,35 @@ class QuerySabioOld(mongo_util.MongoUtil):
             Return:
                 (:obj:`list` of :obj:`dict`): list of kinlaws that satisfy the condition
         '''
-        substrate = 'reaction_participant.substrate_aggregate'
-        product = 'reaction_participant.product_aggregate'
-        if dof == 0:
-            substrates = substrates
-            products = products
-        elif dof == 1:
-            substrates = [re.compile('^' + x[:-2]) for x in substrates]
-            products = [re.compile('^' + x[:-2]) for x in products]
-        else:
-            substrates = [re.compile('^' + x[:14]) for x in substrates]
-            products = [re.compile('^' + x[:14]) for x in products]
-
-        if bound == 'loose':
-            constraint_0 = {substrate: {'$all': substrates}}
-            constraint_1 = {product: {'$all': products}}
-            constraint_2 = {"taxon_id": {"$ne": None}}
-        else:
-            constraint_0 = {substrate: substrates}
-            constraint_1 = {product: products}
-            constraint_2 = {"taxon_id": {"$ne": None}}            
-        query = {'$and': [constraint_0, constraint_1, constraint_2]}
-        lookup = lookups.Lookups().simple_lookup("kegg_orthology", "resource.id", "definition.ec_code", "kegg_meta")
-        if limit > 0:
-            pipeline = [{"$match": query}, {"$limit": limit}, {"$skip": skip}, lookup, {"$project": projection}]
-        else:
-            pipeline = [{"$match": query}, {"$skip": skip}, lookup, {"$project": projection}]
-        docs = self.collection.aggregate(pipeline)
-        count = self.collection.count_documents(query)
+        query = self._rxn_query(substrates, products, dof=dof, bound=bound)
+        pipeline = self._kegg_meta_pipeline(query, projection, skip=skip, limit=limit)
+        docs, count = self.find_with_count(self.collection, query, stages=pipeline[1:],
+                                           skip=skip, limit=limit, filters=False)
         return count, docs
 
+    def get_kinlaw_by_rxn_page(self, substrates, products, dof=0,
+                               projection={'kinlaw_id': 1, '_id': 0},
+                               bound='loose', size=10, page_token=None):
+        ''' One page of get_kinlaw_by_rxn's results, paging by kinlaw_id
+            (cost does not grow with page depth, unlike skip).
+
+            Args:
+                substrates (:obj:`list`): list of substrates' inchikey
+                products (:obj:`list`): list of products' inchikey
+                dof (:obj:`int`, optional): degree of freedom allowed (number of parts of
+                                  inchikey to truncate); the default is 0
+                projection (:obj:`dict`): pymongo query projection 
+                bound (:obj:`str`): limit substrates/products to include only input values
+                size (:obj:`int`, optional): number of kinlaws per page. Defaults to 10.
+                page_token (:obj:`str`, optional): token returned with the previous page. Defaults to None (first page).
+
+            Return:
+                (:obj:`tuple` of :obj:`list` and :obj:`str`): kinlaws and token of the next page (None on the last page).
+        '''
+        query = self._rxn_query(substrates, products, dof=dof, bound=bound)
+        return self.find_page(self.collection, query, key='kinlaw_id', size=size, page_token=page_token,
+                              projection=projection, stages=[self._kegg_meta_lookup()])
+
     def get_kinlaw_by_rxn_ortho(self, substrates, products, dof=0,
                           projection={'kinlaw_id': 1, '_id': 0, "enzymes": 1},
                           bound='loose', skip=0, limit=0):
@@ -190,27 +357,7 @@ class QuerySabioOld(mongo_util.MongoUtil):
             Return:
                 (:obj:`list` of :obj:`dict`): list of kinlaws that satisfy the condition
         '''
-        substrate = 'reaction_participant.substrate_aggregate'
-        product = 'reaction_participant.product_aggregate'
-        if dof == 0:
-            substrates = substrates
-            products = products
-        elif dof == 1:
-            substrates = [re.compile('^' + x[:-2]) for x in substrates]
-            products = [re.compile('^' + x[:-2]) for x in products]
-        else:
-            substrates = [re.compile('^' + x[:14]) for x in substrates]
-            products = [re.compile('^' + x[:14]) for x in products]
-
-        if bound == 'loose':
-            constraint_0 = {substrate: {'$all': substrates}}
-            constraint_1 = {product: {'$all': products}}
-            constraint_2 = {"taxon_id": {"$ne": None}}
-        else:
-            constraint_0 = {substrate: substrates}
-            constraint_1 = {product: products}
-            constraint_2 = {"taxon_id": {"$ne": None}}            
-        query = {'$and': [constraint_0, constraint_1, constraint_2]}
+        query = self._rxn_query(substrates, products, dof=dof, bound=bound)
         # lookup = lookups.Lookups().simple_lookup("kegg_orthology", "resource.id", "definition.ec_code", "kegg_meta")
         # if limit > 0:
         #     pipeline = [{"$match": query}, {"$limit": limit}, {"$skip": skip}, lookup, {"$project": projection}]
@@ -259,8 +406,7 @@ class QuerySabioOld(mongo_util.MongoUtil):
         kinlaw_id = deque()
         substrates = deque()
         products = deque()
-        constraint_0 = {'namespace': 'sabiork.reaction', 'id': str(entry_id)}
-        query = {'resource': {'$elemMatch': constraint_0}}
+        query = self._entryid_query(entry_id)
         projection = {'_id': 0, 'kinlaw_id': 1, 'reaction_participant.substrate_aggregate': 1,
                      'reaction_participant.product_aggregate': 1}
         docs = self.collection.find(filter=query, projection=projection)
@@ -287,8 +433,7 @@ class QuerySabioOld(mongo_util.MongoUtil):
         Return:
             (:obj:`list` of :obj:`dict`): list of documents of entry id
         """
-        constraint_0 = {'namespace': 'sabiork.reaction', 'id': str(entry_id)}
-        query = {'resource': {'$elemMatch': constraint_0}}
+        query = self._entryid_query(entry_id)
         projection = {'_id': 0}
         sort = [('kinlaw_id', ASCENDING)]
         taxon_name = None
@@ -326,44 +471,31 @@ class QuerySabioOld(mongo_util.MongoUtil):
             Return:
                 (:obj:`list` of :obj:`dict`): list of kinlaws that satisfy the condition
         '''
-        sub_key_field = 'substrate_names'
-        pro_key_field = 'product_names'
-        bounded_s = {sub_key_field: {'$size': len(substrates)}}
-        bounded_p = {pro_key_field: {'$size': len(products)}}
-
-        s_constraint = {sub_key_field: {'$all': substrates}}
-        p_constraint = {pro_key_field: {'$all': products}}
-
-        if bound == 'loose':
-            query = {'$and': [s_constraint, p_constraint]}
-        else:
-            query = {'$and': [s_constraint, p_constraint, bounded_s, bounded_p]}
+        query = self._rxn_name_query(substrates, products, bound=bound)
         # docs = self.collection.find(filter=query, projection=projection,
         #                             skip=skip, limit=limit)
-        lookup = lookups.Lookups().simple_lookup("kegg_orthology", "resource.id", "definition.ec_code", "kegg_meta")
-        if limit > 0:
-            pipeline = [{"$match": query}, {"$limit": limit}, {"$skip": skip}, lookup, {"$project": projection}]
-        else:
-            pipeline = [{"$match": query}, {"$skip": skip}, lookup, {"$project": projection}]
+        pipeline = self._kegg_meta_pipeline(query, projection, skip=skip, limit=limit)
         docs = self.collection.aggregate(pipeline)
         count = self.collection.count_documents(query)
         return count, docs
 
     def get_unique_entries(self):
-        """Get number of unique curated entries.
+        """Get number of unique curated entries, up to a day old
+        (see :mod:`datanator_query_python.util.collection_stats`).
 
         Return:
             (:obj:`int`): Number of unique entries.
         """
-        return len(self.collection.distinct('kinlaw_id'))
+        return collection_stats.distinct_count(self.collection, 'kinlaw_id')
 
     def get_unique_organisms(self):
-        """Get number of unique organisms.
+        """Get number of unique organisms, up to a day old
+        (see :mod:`datanator_query_python.util.collection_stats`).
 
         Return:
             (:obj:`int`): Number of unique organisms.
         """
-        return len(self.collection.distinct('taxon_id'))
+        return collection_stats.distinct_count(self.collection, 'taxon_id')
 
     def get_rxn_with_prm(self, kinlaw_ids, _from=0, size=10):
         """Given a list of kinlaw ids, return documents where
@@ -379,9 +511,7 @@ class QuerySabioOld(mongo_util.MongoUtil):
         """
         result = deque()
         have = deque()
-        con_0 = {'parameter.observed_name': {'$in': ['Km', 'kcat']}}
-        con_1 = {'kinlaw_id': {'$in': kinlaw_ids}}
-        query = {'$and': [con_0, con_1]}
+        query = self._prm_query(kinlaw_ids)
         projection = {'_id': 0}
         cursor = self.collection.find(filter=query, projection=projection, collation=self.collation,
                                       skip=_from, limit=size)
@@ -392,6 +522,25 @@ class QuerySabioOld(mongo_util.MongoUtil):
             have.append(r['kinlaw_id'])
         return result, have
 
+    def get_rxn_with_prm_page(self, kinlaw_ids, size=10, page_token=None):
+        """Same as get_rxn_with_prm, paging by kinlaw_id instead of offset.
+        kinlaw_id is both filtered and sorted on, so its index serves the page.
+        
+        Args:
+            kinlaw_ids (:obj:`list` of :obj:`int`): List of kinlaw IDs.
+            size (:obj:`int`): number of records to be returned. Defaults to 10.
+            page_token (:obj:`str`, optional): token returned with the previous page. Defaults to None (first page).
+
+        Return:
+            (:obj:`tuple` of :obj:`list` of :obj:`dict`, :obj:`list` of :obj:`int` and :obj:`str`): list of rxn documents,
+            ids that have parameter and token of the next page (None on the last page).
+        """
+        query = self._prm_query(kinlaw_ids)
+        docs, next_token = self.find_page(self.collection, query, key='kinlaw_id', size=size,
+                                          page_token=page_token, projection={'_id': 0},
+                                          collation=self.collation)
+        return docs, [doc['kinlaw_id'] for doc in docs], next_token
+
     def get_reaction_by_subunit(self, _ids):
         """Get reactions by enzyme subunit uniprot IDs
         
@@ -401,22 +550,24 @@ class QuerySabioOld(mongo_util.MongoUtil):
         Return:
             (:obj:`list` of :obj:`str`): List of kinlaw IDs.
         """
-        result = deque()
-        entry_ids = set()
-        projection = {'_id': 0, 'ec_meta': 1, 'substrates': 1, 'products': 1, 
-                      'kinlaw_id': 1, 'resource': 1, 'reaction_participant.substrate_aggregate': 1,
-                      'reaction_participant.product_aggregate': 1}
-        pipeline = [
-             {'$match': {'enzymes.subunit.uniprot_id': {'$in': _ids}}},
-             {'$addFields': {"__order": {'$indexOfArray': [_ids, "$enzymes.subunit.uniprot_id"]},
-                             "substrates": "$reaction_participant.substrate",
-                             "products": "$reaction_participant.product"}},
-             {'$sort': {"__order": 1}},
-             {"$project": projection}
-            ]
+        pipeline = self._subunit_pipeline(_ids)
         docs = self.collection.aggregate(pipeline)
         if docs is None:
             return ['No reaction found.']
+        return self._unique_by_entry(docs)
+
+    @staticmethod
+    def _unique_by_entry(docs):
+        """Keep the first document of every sabio entry id.
+
+        Args:
+            docs (:obj:`Iter` of :obj:`dict`): reaction documents.
+
+        Return:
+            (:obj:`collections.deque` of :obj:`dict`)
+        """
+        result = deque()
+        entry_ids = set()
         for doc in docs:
             try:
                 entry_id = doc['resource'][-1]['id']
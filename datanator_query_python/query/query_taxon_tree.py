@@ -1,6 +1,7 @@
-from datanator_query_python.util import mongo_util, chem_util, file_util
-from datanator_query_python.aggregate import pipelines
+from datanator_query_python.util import mongo_util, chem_util, file_util, query_cache, taxonomy_index, rank_service
+from datanator_query_python.aggregate import pipelines, taxon_intervals
 import os
+import itertools
 import json
 from pymongo.collation import Collation, CollationStrength
 import pymongo
@@ -13,18 +14,37 @@ class QueryTaxonTree(mongo_util.MongoUtil):
     def __init__(self, cache_dirname=None, collection_str='taxon_tree', 
                 verbose=False, max_entries=float('inf'), username=None, MongoDB=None, 
                 password=None, db='datanator-test', authSource='admin', readPreference='nearest',
-                replicaSet=None):
+                replicaSet=None, options=None, cache=None, use_taxonomy_index=False,
+                taxonomy_index_names=False):
         self.collection_str = collection_str
+        self.use_taxonomy_index = use_taxonomy_index
+        self.taxonomy_index_names = taxonomy_index_names
         super().__init__(cache_dirname=cache_dirname, MongoDB=MongoDB,
                         db=db, verbose=verbose, max_entries=max_entries, username=username,
                         password=password, authSource=authSource, readPreference=readPreference,
-                        replicaSet=replicaSet)
+                        replicaSet=replicaSet, options=options, cache=cache)
         self.pipeline_manager = pipelines.Pipeline()
         self.chem_manager = chem_util.ChemUtil()
         self.file_manager = file_util.FileUtil()
         self.collection = self.db_obj[self.collection_str]
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
+    def taxonomy_index(self):
+        '''Process-wide in-memory index of the collection, when the object
+            was created with use_taxonomy_index=True. The tree methods answer
+            from it instead of querying anc_id arrays; see
+            :mod:`datanator_query_python.util.taxonomy_index`. With
+            taxonomy_index_names=True, an index built by this object keeps
+            the names too, so that the canonical rank distances need no
+            database call either.
+
+            Return:
+                (:obj:`TaxonomyIndex`): None if the index is not used.
+        '''
+        if not self.use_taxonomy_index:
+            return None
+        return taxonomy_index.get(self.collection, names=self.taxonomy_index_names)
+
     def get_all_species(self):
         ''' Get all organisms in taxon_tree collection
             Return:
@@ -73,6 +93,32 @@ class QueryTaxonTree(mongo_util.MongoUtil):
             names[_id] = doc['tax_name']
         return names
 
+    @staticmethod
+    def _ancestors_in_order(keys, docs, key_field, fold=None, missing=([-1], ['not in database'])):
+        """(anc_id lists, anc_name lists) in the order of keys, out of the
+        documents one $in query matched; the first document of a key wins,
+        as with find_one.
+        """
+        fold = fold or (lambda key: key)
+        found = {}
+        for doc in docs:
+            found.setdefault(fold(doc[key_field]), doc)
+        result_id = []
+        result_name = []
+        for key in keys:
+            doc = found.get(fold(key))
+            if doc is None:
+                result_id.append(list(missing[0]))
+                result_name.append(list(missing[1]))
+            else:
+                result_id.append(list(doc['anc_id']))
+                result_name.append(list(doc['anc_name']))
+        return result_id, result_name
+
+    @staticmethod
+    def _casefold(name):
+        return name.casefold() if isinstance(name, str) else name
+
     def get_anc_by_name(self, names):
         ''' Get organism's ancestor ids by
             using organism's names
@@ -82,21 +128,36 @@ class QueryTaxonTree(mongo_util.MongoUtil):
                 result_id: list of ancestors ids in order of the farthest to the closest
                 result_name: list of ancestors' names in order of the farthest to the closest
         '''
-        result_id = []
-        result_name = []
-        projection = {'_id': 0, 'anc_id': 1, 'anc_name': 1}
-        for name in names:
-            query = {'tax_name': name}
-            doc = self.collection.find_one(filter=query, collation=self.collation,
-                                        projection=projection)
-            if doc is not None:
-                result_id.append(doc['anc_id'])
-                result_name.append(doc['anc_name'])
-            else:
-                result_id.append([])
-                result_name.append([])
-        return result_id, result_name
+        projection = {'_id': 0, 'tax_name': 1, 'anc_id': 1, 'anc_name': 1}
+        query = {'tax_name': {'$in': list(names)}}
+        docs = self.collection.find(filter=query, collation=self.collation, projection=projection)
+        return self._ancestors_in_order(names, docs, 'tax_name', fold=self._casefold, missing=([], []))
+
+    def get_anc_by_name_bulk(self, names, chunk_size=1000, max_workers=4):
+        ''' get_anc_by_name for thousands of names: distinct names are
+            queried in chunks of chunk_size, up to max_workers chunks at a time.
+
+            Args:
+                names (:obj:`list` of :obj:`str`): organisms' names.
+                chunk_size (:obj:`int`, optional): names per query. Defaults to 1000.
+                max_workers (:obj:`int`, optional): concurrent queries. Defaults to 4.
+
+            Return:
+                (:obj:`tuple` of :obj:`list`): same as get_anc_by_name.
+        '''
+        names = list(names)
+        keys = list({self._casefold(name): name for name in names}.values())
+        projection = {'_id': 0, 'tax_name': 1, 'anc_id': 1, 'anc_name': 1}
+
+        def fetch(chunk):
+            return list(self.collection.find(filter={'tax_name': {'$in': chunk}}, collation=self.collation,
+                                             projection=projection))
+
+        docs = itertools.chain.from_iterable(
+            docs for _, docs in self.map_chunks(fetch, keys, chunk_size=chunk_size, max_workers=max_workers))
+        return self._ancestors_in_order(names, docs, 'tax_name', fold=self._casefold, missing=([], []))
 
+    @query_cache.cached(ttl=query_cache.TTLS['taxon_tree'])
     def get_anc_by_id(self, ids):
         ''' Get organism's ancestor ids by
             using organism's ids
@@ -106,21 +167,33 @@ class QueryTaxonTree(mongo_util.MongoUtil):
             Return:
                 (:obj:`tuple` of :obj:`list`): list of ancestors in order of the farthest to the closest
         '''
-        result_name = []
-        result_id = []
-        projection = {'_id': 0, 'anc_id': 1, 'anc_name': 1}
-        query = {'tax_id': {'$in': ids}}
-        for _id in ids:
-            query = {'tax_id': _id}
-            cursor = self.collection.find_one(query,
-                                              projection=projection)
-            if cursor is None:
-                result_id.append([-1])
-                result_name.append(['not in database'])
-            else:                
-                result_id.append(cursor['anc_id'])
-                result_name.append(cursor['anc_name'])
-        return result_id, result_name
+        projection = {'_id': 0, 'tax_id': 1, 'anc_id': 1, 'anc_name': 1}
+        query = {'tax_id': {'$in': list(ids)}}
+        docs = self.collection.find(query, projection=projection)
+        return self._ancestors_in_order(ids, docs, 'tax_id')
+
+    def get_anc_by_id_bulk(self, ids, chunk_size=1000, max_workers=4):
+        ''' get_anc_by_id for thousands of ids: distinct ids are
+            queried in chunks of chunk_size, up to max_workers chunks at a time.
+
+            Args:
+                ids (:obj:`list` of :obj:`int`): organisms' tax ids.
+                chunk_size (:obj:`int`, optional): ids per query. Defaults to 1000.
+                max_workers (:obj:`int`, optional): concurrent queries. Defaults to 4.
+
+            Return:
+                (:obj:`tuple` of :obj:`list`): same as get_anc_by_id.
+        '''
+        ids = list(ids)
+        projection = {'_id': 0, 'tax_id': 1, 'anc_id': 1, 'anc_name': 1}
+
+        def fetch(chunk):
+            return list(self.collection.find({'tax_id': {'$in': chunk}}, projection=projection))
+
+        docs = itertools.chain.from_iterable(
+            docs for _, docs in self.map_chunks(fetch, list(dict.fromkeys(ids)), chunk_size=chunk_size,
+                                                max_workers=max_workers))
+        return self._ancestors_in_order(ids, docs, 'tax_id')
 
     def get_common_ancestor(self, org1, org2, org_format='name'):
         ''' Get the closest common ancestor between
@@ -143,6 +216,9 @@ class QueryTaxonTree(mongo_util.MongoUtil):
             else:
                 anc_ids, _ = self.get_anc_by_name([org1, org2])
         else:
+            index = self.taxonomy_index()
+            if index is not None and org1 in index and org2 in index:
+                return index.common_ancestor(org1, org2) or ('No common ancestor', [-1, -1])
             anc_ids, _ = self.get_anc_by_id([org1, org2])
 
         org1_anc = anc_ids[0]
@@ -167,22 +243,17 @@ class QueryTaxonTree(mongo_util.MongoUtil):
             Return:
                 ranks: list of ranks ['kingdom', '+', 'phylum']
         '''
-        ranks = []
-        roi = ['species', 'genus', 'family', 'order', 'class', 'phylum', 'kingdom', 'superkingdom']
-        projection = {'rank': 1, 'tax_id': 1}
-        for _id in ids:
-            query = {'tax_id': _id}
-            cursor = self.collection.find_one(filter=query, projection=projection)
-            rank = cursor.get('rank', None)
-            tax_id = cursor.get('tax_id', None)
-            if rank in roi:
-                ranks.append(rank)
-            elif tax_id == 131567:
-                ranks.append('cellular organisms')
-            else:
-                ranks.append('+')
+        return rank_service.labels(self.collection, ids)
+
+    def preload_ranks(self):
+        '''Read the ranks of all organisms into the process-wide rank map
+            (see :mod:`datanator_query_python.util.rank_service`), so that
+            rank lookups no longer query the collection.
 
-        return ranks
+            Return:
+                (:obj:`int`): number of organisms.
+        '''
+        return rank_service.preload(self.collection)
 
     def get_equivalent_species(self, _id, max_distance, max_depth=float('inf')):
         '''
@@ -231,40 +302,80 @@ class QueryTaxonTree(mongo_util.MongoUtil):
 
         return ids, names
 
-    def get_canon_rank_distance(self, _id, front_end=False):
-        '''Given the ncbi_id, return canonically-ranked ancestors
-            along the lineage and their non-canonical distances
+    def _canon_rank_distance(self, anc, front_end=False, with_rank=False):
+        """Canonically-ranked ancestors of a taxon_tree document and their
+        non-canonical distances, with the ranks and names of all ancestors
+        read from the taxonomy index when it holds them, else with one query.
 
         Args:
-            _id (:obj:`int`): ncbi_id of the organism.
+            anc (:obj:`dict`): document with tax_id, tax_name, anc_id and anc_name.
             front_end (:obj:`bool`): meets front_end request
+            with_rank (:obj:`bool`): add the rank to each ancestor
 
         Return:
-            (:obj:`list` of :obj:`dict`): canonical organisms and distances
-            e.g. [{'a':1}, {'b': 3}, ...]
-        '''
-        roi = ['species', 'genus', 'family', 'order', 'class', 'phylum', 'kingdom', 'superkingdom']
-        projection = {'rank': 1, '_id': 0, 'tax_name': 1}
-        query = {'tax_id': _id}
-        anc = self.collection.find_one(filter=query, projection={'anc_id':1, 'tax_name': 1, 'anc_name': 1})
+            (:obj:`list` of :obj:`dict`)
+        """
+        index = self.taxonomy_index()
+        if index is not None and index.names is not None and anc['tax_id'] in index:
+            ancestors = {tax_id: (index.rank_of(tax_id), index.name(tax_id)) for tax_id in anc['anc_id']}
+        else:
+            docs = list(self.collection.find(filter={'tax_id': {'$in': anc['anc_id']}},
+                                             projection={'_id': 0, 'tax_id': 1, 'rank': 1, 'tax_name': 1}))
+            rank_service.default.remember(self.collection, docs)
+            ancestors = {doc['tax_id']: (doc.get('rank'), doc.get('tax_name')) for doc in docs}
+        roi = taxonomy_index.CANON_RANKS
         result = []
         if front_end:
             result.append({anc['tax_name']: 0})
         for i, tax_id in enumerate(reversed(anc['anc_id'])):
-            query = {'tax_id': tax_id}
-            doc = self.collection.find_one(filter=query, projection=projection)
-            rank = doc.get('rank', None)
+            rank, name = ancestors.get(tax_id, (None, None))
             if rank in roi:
-                result.append({doc['tax_name']: i + 1})
-            else:
-                continue
+                if with_rank:
+                    result.append({name: i + 1, 'rank': rank})
+                else:
+                    result.append({name: i + 1})
         if front_end:
             result.append({anc['anc_name'][0]: len(anc['anc_name'])})
         return result
 
+    def _lineage_from_index(self, tax_id):
+        """Document with tax_id, tax_name, anc_id and anc_name built from the
+        taxonomy index, None if the index does not hold names or the tax id.
+        """
+        index = self.taxonomy_index()
+        if index is None or index.names is None or tax_id not in index:
+            return None
+        anc_id = index.ancestors(tax_id)
+        return {'tax_id': tax_id, 'tax_name': index.name(tax_id), 'anc_id': anc_id,
+                'anc_name': [index.name(_id) for _id in anc_id]}
+
+    def get_canon_rank_distance(self, _id, front_end=False):
+        '''Given the ncbi_id, return canonically-ranked ancestors
+            along the lineage and their non-canonical distances.
+            Served without database calls when the object was created
+            with use_taxonomy_index=True and taxonomy_index_names=True.
+
+        Args:
+            _id (:obj:`int`): ncbi_id of the organism.
+            front_end (:obj:`bool`): meets front_end request
+
+        Return:
+            (:obj:`list` of :obj:`dict`): canonical organisms and distances
+            e.g. [{'a':1}, {'b': 3}, ...], empty if the organism is not found.
+        '''
+        anc = self._lineage_from_index(_id)
+        if anc is None:
+            query = {'tax_id': _id}
+            anc = self.collection.find_one(filter=query, projection={'tax_id': 1, 'anc_id': 1, 'tax_name': 1, 'anc_name': 1})
+        if anc is None:
+            return []
+        return self._canon_rank_distance(anc, front_end=front_end)
+
     def get_canon_rank_distance_by_name(self, name, front_end=False):
         '''Given the name of species, return canonically-ranked ancestors
-            along the lineage and their non-canonical distances
+            along the lineage and their non-canonical distances.
+            With the taxonomy index (see :meth:`get_canon_rank_distance`)
+            only the name is looked up in the database.
 
         Args:
             name (:obj:`str`): name of the organism.
@@ -274,28 +385,46 @@ class QueryTaxonTree(mongo_util.MongoUtil):
             (:obj:`list` of :obj:`dict`): canonical organisms and distances
             e.g. [{'a':1}, {'b': 3}, ...]
         '''
-        roi = ['species', 'genus', 'family', 'order', 'class', 'phylum', 'kingdom', 'superkingdom']
-        projection = {'rank': 1, '_id': 0, 'tax_name': 1}
         query = {'tax_name': name}
-        anc = self.collection.find_one(filter=query, projection={'anc_id':1, 'tax_name': 1, 'anc_name': 1},
+        anc = self.collection.find_one(filter=query, projection={'tax_id': 1, 'anc_id':1, 'tax_name': 1, 'anc_name': 1},
                                         collation=self.collation)
-        result = []
         if anc is None:
             return [{name: 0}]
-        if front_end:
-            result.append({anc['tax_name']: 0})
-        for i, tax_id in enumerate(reversed(anc['anc_id'])):
-            query = {'tax_id': tax_id}
-            doc = self.collection.find_one(filter=query, projection=projection)
-            rank = doc.get('rank', None)
-            if rank in roi:
-                result.append({doc['tax_name']: i + 1,
-                                    'rank': rank})
-            else:
-                continue
-        if front_end:
-            result.append({anc['anc_name'][0]: len(anc['anc_name'])})
-        return result
+        return self._canon_rank_distance(anc, front_end=front_end, with_rank=True)
+
+    def get_interval(self, tax_id):
+        """Nested-interval labels of an organism, assigned by
+        :mod:`datanator_query_python.aggregate.taxon_intervals`.
+
+        Args:
+            tax_id (:obj:`int`): NCBI Taxonomy ID.
+
+        Return:
+            (:obj:`tuple` of :obj:`int`): (left, right), None if the organism is missing or not labelled.
+        """
+        return taxon_intervals.interval(self.collection, tax_id)
+
+    def iter_subtree(self, tax_id, projection={'_id': 0, 'tax_id': 1, 'tax_name': 1, 'rank': 1},
+                     strict=False, batch_size=None, limit=0):
+        """Stream an organism and all its descendants with one range query
+        on the nested-interval labels.
+
+        Args:
+            tax_id (:obj:`int`): NCBI Taxonomy ID.
+            projection (:obj:`dict`, optional): mongodb query result projection.
+            strict (:obj:`bool`, optional): leave the organism itself out. Defaults to False.
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Return:
+            (:obj:`Generator` of :obj:`dict`): taxon_tree documents, empty if the organism is not labelled.
+        """
+        labels = self.get_interval(tax_id)
+        if labels is None:
+            return iter(())
+        query = taxon_intervals.subtree_query(labels, field='left', strict=strict)
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
 
     def under_category(self, src_tax_id, target_tax_id):
         """Given source taxonomy id, check if it is among the
@@ -308,13 +437,20 @@ class QueryTaxonTree(mongo_util.MongoUtil):
         Return:
             (:obj:`bool`): whether source is under target organism.
         """
-        query = {'tax_id': src_tax_id}
-        projection = {'anc_id': 1}
-        doc = self.collection.find_one(filter=query, projection=projection)
-        if doc is not None:
-            return target_tax_id in doc['anc_id']
-        else:
+        index = self.taxonomy_index()
+        if index is not None:
+            return index.is_under(src_tax_id, target_tax_id)
+        # nested-interval labels (see :mod:`datanator_query_python.aggregate.taxon_intervals`),
+        # with the lineage of the source read along in case they are missing
+        docs = {doc['tax_id']: doc for doc in self.collection.find(
+            filter={'tax_id': {'$in': [src_tax_id, target_tax_id]}},
+            projection={'_id': 0, 'tax_id': 1, 'left': 1, 'right': 1, 'anc_id': 1})}
+        if src_tax_id not in docs:
             return False
+        src, target = docs[src_tax_id], docs.get(target_tax_id, {})
+        if 'left' in src and 'left' in target:
+            return taxon_intervals.in_subtree((target['left'], target['right']), src['left'], strict=True)
+        return target_tax_id in src.get('anc_id', [])
 
     def each_under_category(self, src_tax_ids, target_tax_id):
         """Given a list of source organism IDs, check if each ID
@@ -327,26 +463,21 @@ class QueryTaxonTree(mongo_util.MongoUtil):
         Return:
             (:obj:`list` of :obj:`bool`): Boolean indicating if source is the child or target.
         """
-        projection = {'anc_id': 1, '_id': 0}
-        result = []
-        # projection['__order'] = 0
-        pipeline = [
-             {'$match': {'tax_id': {'$in': src_tax_ids}}},
-             {'$addFields': {"__order": {'$indexOfArray': [src_tax_ids, "$tax_id"]}}},
-             {'$sort': {"__order": 1}},
-             {"$project": projection}
-            ]
-        docs = self.collection.aggregate(pipeline)
-        if docs is None:
-            return [False]
-        for doc in docs:
-            if doc is None:
-                result.append(False)
-            elif target_tax_id in doc['anc_id']:
-                result.append(True)
-            else:
-                result.append(False)
-        return result
+        index = self.taxonomy_index()
+        if index is not None:
+            # one result per distinct organism in the collection, as below
+            found = [_id for _id in dict.fromkeys(src_tax_ids) if _id in index]
+            return index.each_under(found, target_tax_id).tolist()
+        # one query for the labels and the lineages, used when a label is missing
+        docs = {doc['tax_id']: doc for doc in self.collection.find(
+            filter={'tax_id': {'$in': list(src_tax_ids) + [target_tax_id]}},
+            projection={'_id': 0, 'tax_id': 1, 'left': 1, 'right': 1, 'anc_id': 1})}
+        found = [docs[_id] for _id in dict.fromkeys(src_tax_ids) if _id in docs]
+        target = docs.get(target_tax_id, {})
+        if 'left' in target and all('left' in doc for doc in found):
+            labels = (target['left'], target['right'])
+            return [taxon_intervals.in_subtree(labels, doc['left'], strict=True) for doc in found]
+        return [target_tax_id in doc.get('anc_id', []) for doc in found]
 
     def get_canon_common_ancestor(self, org1, org2, org_format='tax_id'):
         ''' Get the closest common ancestor between
@@ -366,6 +497,17 @@ class QueryTaxonTree(mongo_util.MongoUtil):
         # if org1 == org2:
         #     return (org1, [0, 0])
 
+        index = self.taxonomy_index()
+        if org_format == 'tax_id' and index is not None and org1 in index and org2 in index:
+            distances = index.canon_distance(org1, org2)
+            if distances is None:
+                return {str(org1): -1, str(org2): -1, 'reason': 'No common ancestor'}
+            lineages = [index.ancestors(org1, canonical=True), index.ancestors(org2, canonical=True)]
+            names = self.get_name_by_id(list(set(lineages[0] + lineages[1])))
+            canon_anc_1, canon_anc_2 = ([names.get(_id) for _id in lineage] for lineage in lineages)
+            return {str(org1): distances[0], str(org2): distances[1],
+                    str(org1)+'_canon_ancestors': canon_anc_1, str(org2)+'_canon_ancestors': canon_anc_2}
+
         if org_format == 'tax_id':
             anc_ids, anc_names = self.get_anc_by_id([org1, org2])
             org1_anc = anc_ids[0]
@@ -384,12 +526,10 @@ class QueryTaxonTree(mongo_util.MongoUtil):
         elif org2_anc == [-1]:
             return {str(org1): -1, str(org2): -1, 'reason': 'No such organism found: {}'.format(org2)}
 
-        rank1_anc = self.get_rank(org1_anc)
-        rank2_anc = self.get_rank(org2_anc)
-        canon_anc_1 = []
-        canon_anc_2 = []
-        [canon_anc_1.append(anc) for (anc, rank) in zip(org1_anc_name, rank1_anc) if rank != '+']
-        [canon_anc_2.append(anc) for (anc, rank) in zip(org2_anc_name, rank2_anc) if rank != '+']
+        # resolve the ranks of both lineages at once
+        labels = dict(zip(org1_anc + org2_anc, self.get_rank(org1_anc + org2_anc)))
+        canon_anc_1 = [anc for (_id, anc) in zip(org1_anc, org1_anc_name) if labels[_id] != '+']
+        canon_anc_2 = [anc for (_id, anc) in zip(org2_anc, org2_anc_name) if labels[_id] != '+']
 
         ancestor = self.file_manager.get_common(canon_anc_1, canon_anc_2)
         if ancestor == '':                
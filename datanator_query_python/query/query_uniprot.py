@@ -11,17 +11,31 @@ class QueryUniprot:
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', collection_str=None, readPreference='nearest',
-                 replicaSet=None):
+                 replicaSet=None, options=None, cache=None):
 
         self.mongo_manager = mongo_util.MongoUtil(MongoDB=server, username=username,
                                                   password=password, authSource=authSource, db=database,
-                                                  readPreference=readPreference, replicaSet=replicaSet)
+                                                  readPreference=readPreference, replicaSet=replicaSet,
+                                                  options=options, cache=cache)
         self.koc_manager = query_kegg_organism_code.QueryKOC(username=username, password=password,
         server=server, authSource=authSource, collection_str='kegg_organism_code', readPreference=readPreference,
-        replicaSet=replicaSet)
+        replicaSet=replicaSet, options=options, cache=cache)
         self.client, self.db, self.collection = self.mongo_manager.con_db(collection_str)
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
 
+    @staticmethod
+    def _name_search(gene_name):
+        """Query matching any of the gene name fields.
+
+        Args:
+            gene_name (:obj:`str`): gene name.
+
+        Return:
+            (:obj:`dict`)
+        """
+        return {'$or': [{'gene_name': gene_name}, {'gene_name_alt': gene_name},
+                        {'gene_name_orf': gene_name}, {'gene_name_oln': gene_name}]}
+
     def get_doc_by_locus(self, locus, projection={'_id':0}):
         """Get preferred gene name by locus name
         
@@ -32,11 +46,7 @@ class QueryUniprot:
         Return:
             (:obj:`tuple` of :obj:`Iter` and `int`): pymongo cursor object and number of documents.
         """
-        con_0 = {'gene_name': locus}
-        con_1 = {'gene_name_alt': locus}
-        con_2 = {'gene_name_orf': locus}
-        con_3 = {'gene_name_oln': locus}
-        query = {'$or': [con_0, con_1, con_2, con_3]}
+        query = self._name_search(locus)
         docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
         count = self.collection.count_documents(query, collation=self.collation)
         return docs, count
@@ -73,11 +83,7 @@ class QueryUniprot:
         Return:
             (:obj:`tuple` of :obj:`str`): gene_name and protein_name
         """
-        con_0 = {'gene_name': gene_name}
-        con_1 = {'gene_name_alt': gene_name}
-        con_2 = {'gene_name_orf': gene_name}
-        con_3 = {'gene_name_oln': gene_name}
-        name_search = {'$or': [con_0, con_1, con_2, con_3]}
+        name_search = self._name_search(gene_name)
         if species is None:
             query = {'gene_name': gene_name}
         else:
@@ -140,11 +146,7 @@ class QueryUniprot:
         _list = org_gene.split(':')
         org = _list[0]
         gene_name = _list[1]
-        con_0 = {'gene_name': gene_name}
-        con_1 = {'gene_name_alt': gene_name}
-        con_2 = {'gene_name_orf': gene_name}
-        con_3 = {'gene_name_oln': gene_name}
-        name_search = {'$or': [con_0, con_1, con_2, con_3]}
+        name_search = self._name_search(gene_name)
         ncbi_id = self.koc_manager.get_ncbi_by_org_code(org)
         query = {'$and': [name_search, {'ncbi_taxonomy_id': ncbi_id}]}
         projection = {'_id': 0, 'uniprot_id': 1}
@@ -6,10 +6,11 @@ class QueryXmdb:
 
     def __init__(self, username=None, password=None, server=None, authSource='admin',
                  database='datanator', max_entries=float('inf'), verbose=True, collection_str='ecmdb',
-                 readPreference='nearest', replicaSet=None):
+                 readPreference='nearest', replicaSet=None, options=None):
         self.mongo_manager = mongo_util.MongoUtil(MongoDB=server, username=username,
                                              password=password, authSource=authSource, db=database,
-                                             readPreference=readPreference, replicaSet=replicaSet)
+                                             readPreference=readPreference, replicaSet=replicaSet,
+                                             options=options)
         self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
         self.max_entries = max_entries
         self.verbose = verbose
@@ -26,12 +27,24 @@ class QueryXmdb:
         Returns:
             (list): all results that meet the constraint.
         """
-        result = []
+        return list(self.iter_all_concentrations(projection=projection))
+
+    def iter_all_concentrations(self, projection={'_id': 0, 'inchi': 1,
+                                'inchikey': 1, 'smiles': 1, 'name': 1},
+                                batch_size=None, limit=0):
+        """Stream all entries that have concentration values
+        
+        Args:
+            projection (dict, optional): mongodb query projection. Defaults to {'_id': 0, 'inchi': 1,'inchikey': 1, 'smiles': 1, 'name': 1}.
+            batch_size (int, optional): documents per server round trip. Defaults to None.
+            limit (int, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Returns:
+            (Generator): results that meet the constraint.
+        """
         query = {'concentrations': {'$ne': None} }
-        docs = self.collection.find(filter=query, projection=projection)
-        for doc in docs:
-            result.append(doc)
-        return result
+        return self.mongo_manager.iter_find(self.collection, query, projection=projection,
+                                            batch_size=batch_size, limit=limit)
 
     def get_name_by_inchikey(self, inchikey):
         """Get metabolite's name by its inchikey
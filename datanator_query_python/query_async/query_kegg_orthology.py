@@ -0,0 +1,113 @@
+from datanator_query_python.util import motor_util
+from datanator_query_python.query.query_kegg_orthology import QueryKO
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryKO(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_kegg_orthology.QueryKO`
+    '''
+
+    def __init__(self, username=None, password=None, server=None, authSource='admin',
+                 database='datanator', max_entries=float('inf'), verbose=True,
+                 readPreference='nearest', replicaSet=None, options=None):
+
+        super().__init__(MongoDB=server, username=username,
+                        password=password, authSource=authSource, db=database,
+                        readPreference=readPreference, replicaSet=replicaSet, options=options)
+        self.max_entries = max_entries
+        self.verbose = verbose
+        self.collection = self.db_obj['kegg_orthology']
+        self.ortho = self.db_obj["orthodb"]
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+    async def get_ko_by_name(self, name):
+        '''Get a gene's ko number by its gene name
+
+        Args:
+            name: (:obj:`str`): gene name
+                
+        Returns:
+            result: (:obj:`str`): ko number of the gene
+        '''
+        query = {'gene_name': name}
+        projection = {'gene_name': 1, 'kegg_orthology_id': 1}
+        doc = await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is not None:
+            return doc['kegg_orthology_id']
+        else:
+            return None
+
+    async def get_def_by_kegg_id(self, kegg_id):
+        """Get kegg definition by kegg id
+        
+        Args:
+            kegg_id (:obj:`str`): kegg orthology
+
+        Returns:
+            (:obj:`list` of :obj:`str`): list of kegg orthology definitions
+        """
+        query = {'kegg_orthology_id': kegg_id}
+        projection = {'definition.name': 1, '_id': 0}
+        doc = await self.collection.find_one(filter=query, projection=projection)
+        if doc is None:
+            return [None]
+        return doc['definition']['name']
+
+    async def get_loci_by_id_org(self, kegg_id, org, gene_id):
+        """Get ortholog locus id given kegg_id, organism code and gene_id.
+        
+        Args:
+            kegg_id (:obj:`str`): Kegg ortholog id.
+            org (:obj:`str`): Kegg organism code.
+            gene_id (:obj:`str`): Gene id.
+
+        Return:
+            (:obj:`str`): locus id.
+        """
+        query = QueryKO._loci_query(kegg_id, org, gene_id)
+        projection = {'_id': 0, 'gene_ortholog.$': 1}
+        doc = await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        return QueryKO._loci_from_doc(doc, gene_id)
+
+    async def get_meta_by_kegg_ids(self, kegg_ids, projection={'_id': 0, 'gene_ortholog': 0}):
+        """Get meta given kegg ids
+        
+        Args:
+            kegg_ids (:obj:`list` of :obj:`str`): List of kegg ids.
+            projection (:obj:`dict`): MongoDB result projection.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`): documents and number of documents found.
+        """
+        query, pipeline = QueryKO._ordered_in_pipeline('kegg_orthology_id', kegg_ids, projection)
+        return await self.find_with_count(self.collection, query, stages=pipeline[1:],
+                                          collation=self.collation, filters=False)
+
+    async def get_meta_by_ortho_ids(self, orthodb_ids, projection={'_id': 0, 'gene_ortholog': 0},
+                                    limit=0):
+        """Get meta given orthodb ids
+        
+        Args:
+            orthodb_ids (:obj:`list` of :obj:`str`): List of orthodb ids.
+            projection (:obj:`dict`): MongoDB result projection.
+
+        Return:
+            (:obj:`tuple` of :obj:`motor.motor_asyncio.AsyncIOMotorCommandCursor` and :obj:`int`): cursor and number of documents found.
+        """
+        query, pipeline = QueryKO._ordered_in_pipeline('orthodb_id', orthodb_ids, projection)
+        docs = self.ortho.aggregate(pipeline)
+        count = await self.ortho.count_documents(query)
+        return docs, count
+
+    async def get_meta_by_kegg_id(self, kegg_id):
+        """Get meta information by kegg_id
+        
+        Args:
+            kegg_id (:obj:`str`): Kegg ID.
+
+        Return:
+            (:obj:`Obj`): Kegg meta object.
+        """
+        projection = {'_id': 0}
+        query = {'kegg_orthology_id': kegg_id}
+        return await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
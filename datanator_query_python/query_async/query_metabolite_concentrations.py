@@ -0,0 +1,79 @@
+from datanator_query_python.util import motor_util
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryMetaboliteConcentrations(motor_util.MotorUtil):
+    '''Asyncio counterpart of
+    :class:`datanator_query_python.query.query_metabolite_concentrations.QueryMetaboliteConcentrations`
+    '''
+
+    def __init__(self, MongoDB=None, db=None, collection_str=None, username=None,
+                 password=None, authSource='admin', readPreference='nearest',
+                 verbose=True, replicaSet=None, options=None):
+        super().__init__(MongoDB=MongoDB, db=db, verbose=verbose, username=username,
+                         password=password, authSource=authSource, readPreference=readPreference,
+                         replicaSet=replicaSet, options=options)
+        self._collection = self.db_obj[collection_str]
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+    async def get_similar_concentrations(self, metabolite, threshold=0.6):
+        """Get metabolite's similar compounds' concentrations above
+        threshold tanimoto value.
+
+        Args:
+            metabolite(:obj:`str`): InChIKey of metabolite.
+            threshold(:obj:`float`, optional): Threshold value (inclusive).
+
+        Return:
+            (:obj:`list` of :obj:`Obj`): [{'inchikey': xxxx, 'similarity_score': ..., 'concentrations': []}]
+        """
+        result = []
+        meta_collection = self.client.get_database("datanator-test")['metabolites_meta']
+        doc = await meta_collection.find_one(filter={'InChI_Key': metabolite},
+                                             projection={'similar_compounds': 1},
+                                             collation=self.collation)
+        if not doc:
+            return result
+        r_inchikeys = []
+        scores = []
+        for obj in doc["similar_compounds"]:
+            if obj["similarity_score"] >= threshold:
+                r_inchikeys.append(obj["inchikey"])
+                scores.append(obj["similarity_score"])
+            else:
+                break
+        pipeline = [
+            {"$match": {"inchikey": {"$in": r_inchikeys}}},
+            {"$addFields": {"__order": {"$indexOfArray": [r_inchikeys, "$inchikey" ]}}},
+            {"$sort": {"__order": -1}}
+        ]
+        i = 0
+        async for doc in self._collection.aggregate(pipeline):
+            result.append({'inchikey': doc['inchikey'],
+                           'similarity_score': scores[i],
+                           'metabolite': doc['metabolite'],
+                           'concentrations': doc['concentrations']})
+            i += 1
+        return result
+
+    async def get_conc_count(self):
+        """Get total number of concentration data points.
+        """
+        project = {"$project": {"conc_len": {"$size": "$concentrations"}}}
+        group = {"$group": {"_id": None,
+                            "total": {"$sum": "$conc_len"},
+                            "count": {"$sum": 1}}}
+        async for doc in self._collection.aggregate([project, group]):
+            return doc['total']
+
+    def get_conc_by_taxon(self, _id):
+        """Get concentrations by ncbi taxonomy ID.
+
+        Args:
+            _id(:obj:`int`): NCBI Taxonomy ID.
+
+        Return:
+            (:obj:`motor.motor_asyncio.AsyncIOMotorCursor`)
+        """
+        query = {"concentrations.ncbi_taxonomy_id": _id}
+        return self._collection.find(filter=query)
@@ -0,0 +1,95 @@
+from datanator_query_python.util import motor_util, chem_util
+from datanator_query_python.query.query_metabolites import QueryMetabolites
+from datanator_query_python.query_async import query_metabolites_meta
+from bson.objectid import ObjectId
+import asyncio
+
+
+class AsyncQueryMetabolites(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_metabolites.QueryMetabolites`
+    '''
+
+    def __init__(self, MongoDB=None, replicaSet=None, db=None,
+                 verbose=True, max_entries=float('inf'), username=None,
+                 password=None, authSource='admin', readPreference='nearest', options=None):
+        self.verbose = verbose
+        super().__init__(MongoDB=MongoDB, replicaSet=replicaSet, db=db,
+                         verbose=verbose, max_entries=max_entries, username=username,
+                         password=password, authSource=authSource,
+                         readPreference=readPreference, options=options)
+        self.collection_ecmdb = self.db_obj['ecmdb']
+        self.collection_ymdb = self.db_obj['ymdb']
+        self.metabolites_meta_manager = query_metabolites_meta.AsyncQueryMetabolitesMeta(
+            MongoDB=MongoDB, replicaSet=replicaSet, db=db,
+            collection_str='metabolites_meta', verbose=verbose, max_entries=max_entries,
+            username=username, password=password, authSource=authSource,
+            readPreference=readPreference, options=options)
+        self.chem_manager = chem_util.ChemUtil()
+
+    async def get_conc_from_inchi(self, inchi, inchi_key=False, consensus=False, projection={'_id': 0}):
+        ''' Given inchi, find the metabolite's concentration
+            values. ECMDB and YMDB are queried concurrently.
+
+            Args:
+                inchi (:obj:`str`): inchi or inchi key of metabolite.
+                inchi_key (:obj:`bool`): input is InChI Key or not.
+                consensus (`obj`: bool): whether to return consensus values or list of
+                                        individual values.
+
+            Return:
+                (`obj`: list of `obj`: dict): concentration values separated by collections
+                e.g. [{'ymdb': }, {'ecmdb': }]
+        '''
+        if not inchi_key:
+            hashed_inchi = self.chem_manager.inchi_to_inchikey(inchi)
+        else:
+            hashed_inchi = inchi
+        ids = await self.metabolites_meta_manager.get_ids_from_hash(hashed_inchi)
+        docs = await asyncio.gather(
+            self.collection_ecmdb.find_one(filter={'m2m_id': ids['m2m_id']}, projection=projection),
+            self.collection_ymdb.find_one(filter={'ymdb_id': ids['ymdb_id']}, projection=projection))
+        return QueryMetabolites._conc_result(docs, consensus)
+
+    async def get_meta_from_inchis(self, inchis, species, last_id='000000000000000000000000', page_size=20):
+        ''' Get all information about metabolites given
+            a list of inchi strings
+
+            Args:
+                inchis (`obj`: list of `obj`: str): list of inchi strings
+                species (`obj`: str): name of species in which the metabolite resides
+                last_id (`obj`: str): hex encoded version of ObjectId o, which is the last item of the previous page
+                page_size (`obj`: int): number of items per page
+
+            Return:
+                result (`obj`: list of `obj`: dict): list of information
+        '''
+        if species == 'Escherichia coli':
+            collection = self.collection_ecmdb
+        elif species == 'Saccharomyces cerevisiae':
+            collection = self.collection_ymdb
+        else:
+            return [{'name': 'Species name not supported yet.',
+                    'inchikey': 'Species name not supported yet.',
+                    'description': 'Species name not supported yet.'}]
+
+        inchikeys = [self.chem_manager.inchi_to_inchikey(x) for x in inchis]
+        query = {'$and': [{'inchikey': {'$in': inchikeys} },
+                          {'_id': {'$gt': ObjectId(last_id)} }]}
+        result = []
+        async for doc in collection.find(filter=query, limit=page_size):
+            doc['_id'] = str(doc['_id'])
+            result.append(doc)
+        return result
+
+    async def get_concentration_count(self):
+        """Get number of metabolites with concentration values.
+
+        Return:
+            (:obj:`int`): Number of metabolites with concentrations.
+        """
+        query = {'concentrations.concentration': {'$exists': True}}
+        projection = {'inchikey': 1}
+        ecmdb, ymdb = await asyncio.gather(
+            self.collection_ecmdb.find(filter=query, projection=projection).to_list(None),
+            self.collection_ymdb.find(filter=query, projection=projection).to_list(None))
+        return len({m['inchikey'] for m in ecmdb + ymdb})
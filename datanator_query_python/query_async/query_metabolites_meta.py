@@ -0,0 +1,158 @@
+from datanator_query_python.util import motor_util, collection_stats
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryMetabolitesMeta(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_metabolites_meta.QueryMetabolitesMeta`
+    '''
+
+    def __init__(self, MongoDB=None, replicaSet=None, db=None,
+                 collection_str='metabolites_meta', verbose=False, max_entries=float('inf'), username=None,
+                 password=None, authSource='admin', readPreference='nearest', options=None):
+        self._collection_str = collection_str
+        self.verbose = verbose
+        super().__init__(MongoDB=MongoDB, replicaSet=replicaSet, db=db,
+                         verbose=verbose, max_entries=max_entries, username=username,
+                         password=password, authSource=authSource,
+                         readPreference=readPreference, options=options)
+        self._collection = self.client.get_database("datanator-test")[collection_str]
+        self.e_collection = self.db_obj['ecmdb']
+        self.y_collection = self.db_obj['ymdb']
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+    async def get_metabolite_inchi(self, compounds):
+        '''Given a list of compound name(s) Return the corrensponding inchi string
+
+            Args:
+                compounds: list of compounds
+                ['ATP', '2-Ketobutanoate']
+
+            Returns:
+                ['....', 'InChI=1S/C4H6O3/c1-2-3(5)4(6)7/...']
+        '''
+        inchi = []
+        projection = {'_id': 0, 'inchi': 1, 'm2m_id': 1, 'ymdb_id': 1}
+        collation = {'locale': 'en', 'strength': 2}
+        for compound in compounds:
+            cursor = await self._collection.find_one({'$or': [{'synonyms': compound},
+                                                             {'name': compound}]},
+                                                     projection=projection, collation=collation)
+            if cursor is None:
+                inchi.append(
+                    {"inchi": 'No inchi found.', "m2m_id": 'No ECMDB record found.',
+                    "ymdb_id": 'No YMDB record found.'})
+            else:
+                inchi.append(
+                    {"inchi": cursor['inchi'], "m2m_id": cursor.get('m2m_id', None),
+                    "ymdb_id": cursor.get('ymdb_id', None)})
+        return inchi
+
+    async def get_ids_from_hash(self, hashed_inchi):
+        ''' Given a hashed inchi string, find its
+            corresponding m2m_id and/or ymdb_id
+
+            Args:
+                hashed_inchi (`obj`: str): string of hashed inchi
+
+            Returns:
+                result (`obj`: dict): dictionary of ids and their keys
+                    {'m2m_id': ..., 'ymdb_id': ...}
+        '''
+        doc = await self._collection.find_one(filter={'InChI_Key': hashed_inchi}, projection={'_id': 0})
+        return {'m2m_id': doc.get('m2m_id', None), 'ymdb_id': doc.get('ymdb_id', None)}
+
+    async def get_ids_from_hashes(self, hashed_inchi):
+        ''' Given a list of hashed inchi string, find their
+            corresponding m2m_id and/or ymdb_id
+
+            Args:
+                hashed_inchi (`obj`: list of `obj`: str): list of hashed inchi
+
+            Returns:
+                result (`obj`: list of `obj`: dict): dictionary of ids and their keys
+                    [{'m2m_id': ..., 'ymdb_id': ..., 'InChI_Key': ...}, {}, ..]
+        '''
+        query = {'InChI_Key': {'$in': hashed_inchi}}
+        projection = {'m2m_id': 1, 'ymdb_id': 1, 'InChI_Key': 1}
+        docs = self._collection.find(filter=query, projection=projection)
+        return [{'m2m_id': doc.get('m2m_id', None), 'ymdb_id': doc.get('ymdb_id', None),
+                 'InChI_Key': doc.get('InChI_Key', None)} async for doc in docs]
+
+    async def get_metabolite_hashed_inchi(self, compounds):
+        ''' Given a list of compound name(s)
+            Return the corresponding hashed inchi string
+
+            Args:
+                compounds: ['ATP', '2-Ketobutanoate']
+
+            Return:
+                hashed_inchi: ['3e23df....', '7666ffa....']
+        '''
+        hashed_inchi = []
+        projection = {'_id': 0, 'InChI_Key': 1}
+        collation = {'locale': 'en', 'strength': 2}
+        for compound in compounds:
+            cursor = await self._collection.find_one({'$or': [{'synonyms': compound},
+                                                             {'name': compound}]},
+                                                     projection=projection, collation=collation)
+            if cursor is None:
+                hashed_inchi.append('No inchi key found.')
+            else:
+                hashed_inchi.append(cursor['InChI_Key'])
+        return hashed_inchi
+
+    async def get_unique_metabolites(self):
+        """Get number of unique metabolites.
+
+        Return:
+            (:obj:`int`): number of unique metabolites.
+        """
+        return await collection_stats.distinct_count_async(self._collection, 'InChI_Key', collation=self.collation)
+
+    async def get_metabolites_meta(self, inchi_key):
+        """Get metabolite's meta information given inchi_key.
+
+        Args:
+            (:obj:`str`): InChI Key of metabolites
+
+        Return:
+            (:obj:`dict`): meta information object.
+        """
+        projection = {'_id': 0, 'reaction_participants': 0, 'similar_compounds': 0}
+        query = {'InChI_Key': inchi_key}
+        doc = await self._collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is None:
+            return {}
+        else:
+            return doc
+
+    async def get_eymeta(self, inchi_key):
+        """Get meta info from ECMDB or YMDB
+
+        Args:
+            inchi_key (:obj:`str`): inchikey / name of metabolite molecule.
+
+        Return:
+            (:obj:`Obj`): meta information.
+        """
+        projection = {'_id': 0, 'concentrations': 0}
+        con_0 = {'name': inchi_key}
+        con_1 = {'synonyms.synonym': inchi_key}
+        con_2 = {'inchikey': inchi_key}
+        query = {'$or': [con_0, con_1, con_2]}
+        doc = await self.e_collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is not None:
+            return doc
+        return await self.y_collection.find_one(filter=query, projection=projection, collation=self.collation)
+
+    async def get_doc_by_name(self, names):
+        """Get document by metabolite's list of possible names.
+
+        Args:
+            names(:obj:`list` of :obj:`str`): Name of possible names.
+
+        Return:
+            (:obj:`Obj`)
+        """
+        query = {'$or': [{'name': {'$in': names}}, {'synonyms': {'$in': names}}]}
+        return await self._collection.find_one(filter=query, collation=self.collation)
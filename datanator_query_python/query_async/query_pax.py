@@ -0,0 +1,123 @@
+from datanator_query_python.util import motor_util
+from datanator_query_python.query.query_pax import QueryPax
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryPax(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_pax.QueryPax`
+    '''
+
+    def __init__(self, MongoDB=None, replicaSet=None, db='datanator',
+                 collection_str='pax', verbose=False, max_entries=float('inf'), username=None,
+                 password=None, authSource='admin', readPreference='nearest', options=None):
+        super().__init__(MongoDB=MongoDB, replicaSet=replicaSet, db=db,
+                         verbose=verbose, max_entries=max_entries, username=username,
+                         password=password, authSource=authSource, readPreference=readPreference,
+                         options=options)
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+        self.max_entries = max_entries
+        self.verbose = verbose
+        self.collection = self.db_obj[collection_str]
+
+    async def get_all_species(self):
+        '''
+            Get a list of all species in pax collection
+
+            Returns:
+                results (:obj:`list` of :obj:`str`): list of specie names
+                                            with no duplicates
+        '''
+        docs = self.collection.find(filter={}, projection={'species_name': 1})
+        return list({doc['species_name'] async for doc in docs})
+
+    async def get_file_by_name(self, file_name: list, projection={'_id': 0}) -> list:
+        """Given file name, get the information attached to the file.
+
+        Args:
+            file_name (:obj:`list`): list of file names, e.g. ['9606/9606-iPS_(DF19.11)_iTRAQ-114_Phanstiel_2011_gene.txt']
+
+        Returns:
+            :obj:`list`: files that meet the requirement
+        """
+        query = {'file_name': {'$in': file_name}}
+        return await self.collection.find(filter=query, projection=projection).to_list(None)
+
+    async def get_file_by_ncbi_id(self, taxon: list, projection={'_id': 0}) -> list:
+        """Given the list of taxon ncbi ID, get all the files associated to the taxon.
+
+        Args:
+            taxon (:obj:`list`): list of taxon ncbi ID
+
+        Returns:
+            :obj:`list`: files that meet the requirement
+        """
+        query = {'ncbi_id': {'$in': taxon}}
+        return await self.collection.find(filter=query, projection=projection).to_list(None)
+
+    def iter_file_by_ncbi_id(self, taxon: list, projection={'_id': 0}, batch_size=None, limit=0):
+        """Given the list of taxon ncbi ID, stream the files associated to the taxon.
+
+        Args:
+            taxon (:obj:`list`): list of taxon ncbi ID
+            batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+        Returns:
+            :obj:`AsyncGenerator`: files that meet the requirement
+        """
+        query = {'ncbi_id': {'$in': taxon}}
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
+
+    async def get_file_by_quality(self, organ, score=4.0, coverage=20, ncbi_id=None,
+                                  projection={'_id': 0, 'weight': 0}):
+        """Get 'organ's' paxdb file by quality of data
+
+        Args:
+            organ (:obj:`str`): organ type in paxdb, e.g. WHOLE_ORGANISM, CELL_LINE, etc
+            score (:obj:`float`, optional): paxdb data quality score. Defaults to 4.0.
+            coverage (:obj:`int`, optional): paxdb data coverage. Defaults to 20.
+            ncbi_id (:obj:`int`, optional): ncbi taxonomy id of organism. Defaults to None.
+            projection (:obj:`dict`, optional): mongodb query projection. Defaults to {'_id': 0, 'weight': 0}
+
+        Returns:
+            (:obj:`tuple`): tuple containing:
+                docs (:obj:`list`): mongodb docs;
+                count (:obj:`int`): total number of documents that meet the query conditions.
+        """
+        query = QueryPax._quality_query(organ, score, coverage, ncbi_id)
+        return await self.find_with_count(self.collection, query, projection=projection)
+
+    async def get_file_by_publication(self, publication, projection={'_id': 0}):
+        """Get documents by publication
+
+        Args:
+            publication (:obj:`str`): URL of publication
+            projection (:obj:`dict`, optional): mongodb query projection. Defaults to {'_id': 0}.
+
+        Returns:
+            (:obj:`tuple`): tuple containing:
+                docs (:obj:`motor.motor_asyncio.AsyncIOMotorCursor`): mongodb docs cursor;
+                count (:obj:`int`): total number of documents that meet the query conditions.
+        """
+        query = {'publication': publication}
+        docs = self.collection.find(filter=query, projection=projection)
+        count = await self.collection.count_documents(query)
+        return docs, count
+
+    async def get_file_by_organ(self, organ, projection={'_id': 0}):
+        """Get documents by organ
+
+        Args:
+            organ (:obj:`str`): organ type in paxdb
+            projection (dict, optional): mongodb query projection. Defaults to {'_id': 0}.
+
+        Returns:
+            (:obj:`tuple`): tuple containing:
+                docs (:obj:`motor.motor_asyncio.AsyncIOMotorCursor`): mongodb docs cursor;
+                count (:obj:`int`): total number of documents that meet the query conditions.
+        """
+        query = {'organ': organ}
+        docs = self.collection.find(filter=query, projection=projection)
+        count = await self.collection.count_documents(query)
+        return docs, count
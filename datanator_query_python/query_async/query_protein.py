@@ -0,0 +1,480 @@
+from datanator_query_python.util import motor_util, collection_stats
+from datanator_query_python.query.query_protein import QueryProtein
+from datanator_query_python.query_async import query_kegg_orthology
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryProtein(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_protein.QueryProtein`
+    '''
+
+    def __init__(self, username=None, password=None, server=None, authSource='admin',
+                 database='datanator', max_entries=float('inf'), verbose=True, collection_str='uniprot',
+                 readPreference='nearest', replicaSet=None, options=None):
+
+        super().__init__(MongoDB=server, username=username,
+                        password=password, authSource=authSource, db=database,
+                        readPreference=readPreference, replicaSet=replicaSet, options=options)
+        self.kegg_manager = query_kegg_orthology.AsyncQueryKO(username=username, password=password, server=server,
+                                                              authSource=authSource, replicaSet=replicaSet,
+                                                              options=options)
+        self.taxon_col = self.db_obj['taxon_tree']
+        self.max_entries = max_entries
+        self.verbose = verbose
+        self.collection = self.db_obj[collection_str]
+        self.summary_collection = self.db_obj['ortholog_abundance_summary']
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+        self.collection_str = collection_str
+
+    async def get_meta_by_id(self, _id):
+        '''
+            Get protein's metadata given uniprot id
+
+            Args:
+                _id (:obj:`list` of :obj:`str`): list of uniprot id.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): list of information.
+        '''
+        query, projection = QueryProtein._meta_by_id_query(_id)
+        docs = await self.collection.find(filter=query, projection=projection,
+                                          collation=self.collation).to_list(None)
+        if len(docs) == 0:
+            return QueryProtein._empty_meta()
+
+        docs = [QueryProtein._sanitize(doc) for doc in docs]
+        ko_numbers = QueryProtein._ko_numbers(docs)
+        if ko_numbers:
+            kegg_docs, _ = await self.kegg_manager.get_meta_by_kegg_ids(ko_numbers)
+            QueryProtein._attach_kegg_meta(docs, kegg_docs)
+        return docs
+
+    async def _iter_bulk(self, _id, build_query, meta, chunk_size, max_workers):
+        """Asyncio counterpart of :meth:`QueryProtein._iter_bulk`.
+        """
+        async def fetch(chunk):
+            query, projection = build_query(chunk)
+            docs = await self.collection.find(filter=query, projection=projection,
+                                              collation=self.collation).to_list(None)
+            if meta:
+                docs = [QueryProtein._sanitize(doc) for doc in docs]
+                ko_numbers = QueryProtein._ko_numbers(docs)
+                if ko_numbers:
+                    kegg_docs, _ = await self.kegg_manager.get_meta_by_kegg_ids(ko_numbers)
+                    QueryProtein._attach_kegg_meta(docs, kegg_docs)
+            return QueryProtein._by_uniprot_id(docs)
+
+        async for chunk, groups in self.map_chunks(fetch, _id, chunk_size=chunk_size, max_workers=max_workers):
+            for uniprot_id in chunk:
+                yield uniprot_id, groups.get(uniprot_id.casefold(), [])
+
+    def iter_meta_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Asyncio counterpart of :meth:`QueryProtein.iter_meta_bulk`.
+
+        Return:
+            (:obj:`AsyncGenerator` of :obj:`tuple`): (uniprot_id, list of documents) for every id.
+        """
+        return self._iter_bulk(_id, QueryProtein._meta_by_id_query, True, chunk_size, max_workers)
+
+    async def get_meta_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Asyncio counterpart of :meth:`QueryProtein.get_meta_bulk`.
+
+        Return:
+            (:obj:`tuple` of :obj:`list`): documents in input order, ids not found.
+        """
+        pairs = [pair async for pair in self.iter_meta_bulk(_id, chunk_size=chunk_size, max_workers=max_workers)]
+        return QueryProtein._merge_bulk(pairs)
+
+    def iter_abundance_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Asyncio counterpart of :meth:`QueryProtein.iter_abundance_bulk`.
+
+        Return:
+            (:obj:`AsyncGenerator` of :obj:`tuple`): (uniprot_id, list of documents) for every id.
+        """
+        return self._iter_bulk(_id, QueryProtein._abundance_by_id_query, False, chunk_size, max_workers)
+
+    async def get_abundance_bulk(self, _id, chunk_size=500, max_workers=4):
+        """Asyncio counterpart of :meth:`QueryProtein.get_abundance_bulk`.
+
+        Return:
+            (:obj:`tuple` of :obj:`list`): documents in input order, ids without abundances.
+        """
+        pairs = [pair async for pair in self.iter_abundance_bulk(_id, chunk_size=chunk_size, max_workers=max_workers)]
+        return QueryProtein._merge_bulk(pairs)
+
+    async def get_ortho_by_id(self, _id):
+        '''
+            Get protein's metadata given uniprot id
+
+            Args:
+                _id (:obj:`str`): uniprot id.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): list of information.
+        '''
+        doc = await self.collection.find_one(filter={'uniprot_id': _id}, projection={"_id": 0})
+        if doc is None:
+            return QueryProtein._empty_meta()
+        return [QueryProtein._sanitize(doc)]
+
+    async def get_meta_by_name_taxon(self, name, taxon_id):
+        '''
+            Get protein's metadata given protein name
+            and its ncbi taxonomy ID
+
+            Args:
+                name (:obj:`str`): protein's complete/partial name.
+                taxon_id (:obj:`int`): protein's ncbi taxonomy id.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): protein's metadata.
+        '''
+        query, projection = QueryProtein._meta_by_name_taxon_query(name, taxon_id)
+        docs = self.collection.find(filter=query, projection=projection)
+        return [QueryProtein._sanitize(doc) async for doc in docs]
+
+    async def get_id_by_name(self, name):
+        '''
+            Get proteins whose name contains string 'name'.
+
+            Args:
+                name (:obj:`str`): complete/incomplete protein name.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): list of dictionary containing
+                protein's uniprot_id and name.
+        '''
+        query = QueryProtein._text_query(name)
+        projection = {'_id': 0, 'uniprot_id': 1, 'protein_name': 1}
+        docs = self.collection.find(filter=query, projection=projection)
+        return [{'uniprot_id': doc['uniprot_id'], 'protein_name': doc['protein_name']} async for doc in docs]
+
+    async def get_info_by_text(self, name, max_groups=None):
+        '''
+            Get proteins whose name or kegg name contains string 'name'.
+
+            Args:
+                name (:obj:`str`): complete/incomplete protein name.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []}, ...].
+        '''
+        query = QueryProtein._text_query(name)
+        projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
+        docs = await self.collection.find(filter=query, projection=projection).to_list(None)
+        return QueryProtein._group_by_ko(docs, max_groups=max_groups)
+
+    async def get_info_by_text_abundances(self, name, max_groups=None):
+        '''
+            Get proteins whose name or kegg name contains string 'name'.
+
+            Args:
+                name (:obj:`str`): complete/incomplete protein name.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': True, ...}}, ...].
+        '''
+        query = QueryProtein._text_query(name)
+        projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1, 'abundances': 1}
+        docs = await self.collection.find(filter=query, projection=projection).to_list(None)
+        return QueryProtein._group_by_ko(docs, abundance=True, check_nan=True, max_groups=max_groups)
+
+    async def get_info_by_taxonid(self, _id, max_groups=None):
+        '''
+            Get proteins associated with ncbi id.
+
+            Args:
+                _id (:obj:`int`): ncbi taxonomy id.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []}, ...].
+        '''
+        projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
+        docs = await self.collection.find(filter={'ncbi_taxonomy_id': _id}, projection=projection).to_list(None)
+        return QueryProtein._group_by_ko(docs, max_groups=max_groups)
+
+    async def get_info_by_taxonid_abundance(self, _id, max_groups=None):
+        '''
+            Get proteins associated with ncbi id.
+
+            Args:
+                _id (:obj:`int`): ncbi taxonomy id.
+                max_groups (:obj:`int`, optional): return at most this many KO groups. Defaults to None (all).
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {'id0': True, ...}}, ...].
+        '''
+        projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1, 'abundances': 1}
+        docs = await self.collection.find(filter={'ncbi_taxonomy_id': _id}, projection=projection).to_list(None)
+        return QueryProtein._group_by_ko(docs, abundance=True, max_groups=max_groups)
+
+    async def get_info_by_ko(self, ko):
+        '''
+            Find all proteins with the same kegg orthology id.
+
+            Args:
+                ko (:obj:`str`): kegg orthology ID.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': []}].
+        '''
+        query, projection = QueryProtein._group_members_query(ko, 'ko_number')
+        docs = await self.collection.find(filter=query, projection=projection).to_list(None)
+        return QueryProtein._info_from_docs(docs, ko, 'ko_number')
+
+    async def get_info_by_ko_abundance(self, ko):
+        '''
+            Find all proteins with the same kegg orthology id.
+
+            Args:
+                ko (:obj:`str`): kegg orthology ID.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'ko_number': ... 'ko_name': ... 'uniprot_ids': {}}].
+        '''
+        query, projection = QueryProtein._group_members_query(ko, 'ko_number', abundance=True)
+        docs = await self.collection.find(filter=query, projection=projection).to_list(None)
+        return QueryProtein._info_from_docs(docs, ko, 'ko_number', abundance=True)
+
+    async def get_info_by_orthodb(self, orthodb):
+        '''
+            Find all proteins with the same orthodb group id.
+
+            Args:
+                orthodb(:obj:`str`): orthodb group ID.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'orthodb_id': ... 'orthodb_name': ... 'uniprot_ids': []}].
+        '''
+        query, projection = QueryProtein._group_members_query(orthodb, 'orthodb_id')
+        docs = await self.collection.find(filter=query, projection=projection).to_list(None)
+        return QueryProtein._info_from_docs(docs, orthodb, 'orthodb_id')
+
+    async def get_ortholog_summary(self, group_id, group_type='ko_number', members=True):
+        """Get the summary of a KEGG orthology or OrthoDB group from ortholog_abundance_summary.
+
+        Args:
+            group_id (:obj:`str`): KO number or OrthoDB id.
+            group_type (:obj:`str`, optional): 'ko_number' or 'orthodb_id'. Defaults to 'ko_number'.
+            members (:obj:`bool`, optional): include the members array. Defaults to True.
+
+        Return:
+            (:obj:`dict`): summary document, None if there is none.
+        """
+        projection = None if members else {'members': 0}
+        return await self.summary_collection.find_one(filter=QueryProtein._summary_query(group_id, group_type),
+                                                      projection=projection)
+
+    async def get_info_by_ko_summary(self, ko, abundance=False):
+        '''
+            get_info_by_ko (abundance=False) and get_info_by_ko_abundance (abundance=True)
+            read from the ortholog summary collection.
+
+            Args:
+                ko (:obj:`str`): kegg orthology ID.
+                abundance (:obj:`bool`, optional): map uniprot ids to whether they have abundances. Defaults to False.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): same as get_info_by_ko or get_info_by_ko_abundance.
+        '''
+        doc = await self.summary_collection.find_one(filter=QueryProtein._summary_query(ko, 'ko_number'),
+                                                     projection={'group_name': 1, 'members': 1})
+        return QueryProtein._info_from_summary(doc, ko, 'ko_number', abundance=abundance)
+
+    async def get_info_by_orthodb_summary(self, orthodb, abundance=False):
+        '''
+            get_info_by_orthodb read from the ortholog summary collection.
+
+            Args:
+                orthodb (:obj:`str`): OrthoDB id.
+                abundance (:obj:`bool`, optional): map uniprot ids to whether they have abundances. Defaults to False.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): same as get_info_by_orthodb.
+        '''
+        doc = await self.summary_collection.find_one(filter=QueryProtein._summary_query(orthodb, 'orthodb_id'),
+                                                     projection={'group_name': 1, 'members': 1})
+        return QueryProtein._info_from_summary(doc, orthodb, 'orthodb_id', abundance=abundance)
+
+    async def get_kinlaw_by_id(self, _id):
+        '''
+            Get protein kinetic law information by uniprot_id.
+
+            Args:
+                _id (:obj:`list` of :obj:`str`): list of uniprot IDs.
+
+            Returns:
+                (:obj:`list` of `dict`): list of kinlaw information.
+        '''
+        query, projection = QueryProtein._kinlaw_by_id_query(_id)
+        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
+        return [QueryProtein._kinlaw_from_doc(doc) async for doc in docs]
+
+    async def get_abundance_by_id(self, _id):
+        '''
+            Get protein abundance information by uniprot_id.
+
+            Args:
+                _id (:obj:`list` of :obj:`str`): list of uniprot_id.
+
+            Returns:
+                (:obj:`list` of `dict`): list of abundance information.
+        '''
+        query, projection = QueryProtein._abundance_by_id_query(_id)
+        docs = await self.collection.find(filter=query, projection=projection,
+                                          collation=self.collation).to_list(None)
+        if len(docs) == 0:
+            return [{'abundances': [], 'uniprot_id': 'No proteins that match input',
+                     "species_name": "No proteins that match input"}]
+        return docs
+
+    async def get_abundance_by_taxon(self, _id):
+        '''
+            Get protein abundance information in one species.
+
+            Args:
+                _id (:obj:`str`): taxonomy id.
+
+            Returns:
+                (:obj:`list` of `dict`): list of abundance information
+        '''
+        projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0, 'ncbi_taxonomy_id': 0}
+        return await self.collection.find(filter={'ncbi_taxonomy_id': _id}, projection=projection).to_list(None)
+
+    def iter_abundance_by_taxon(self, _id, batch_size=None, limit=0):
+        '''
+            Stream protein abundance information in one species.
+
+            Args:
+                _id (:obj:`str`): taxonomy id.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`AsyncGenerator` of `dict`): abundance information
+        '''
+        projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0, 'ncbi_taxonomy_id': 0}
+        return self.iter_find(self.collection, {'ncbi_taxonomy_id': _id}, projection=projection,
+                              batch_size=batch_size, limit=limit)
+
+    async def get_uniprot_by_ko(self, ko):
+        '''
+            Find all proteins with the same kegg orthology id.
+
+            Args:
+                ko (:obj:`str`): kegg orthology ID.
+
+            Return:
+                (:obj:`list` of :obj:`str`): list of uniprot_id.
+        '''
+        projection = {'uniprot_id': 1, '_id': 0}
+        docs = await self.collection.find(filter={'ko_number': ko.upper()}, projection=projection).to_list(None)
+        if len(docs) == 0:
+            return 'No information available for this KO.'
+        return [doc['uniprot_id'] for doc in docs]
+
+    async def get_abundance_with_same_ko(self, _id):
+        '''Find abundance information for protein with the same
+            KO number.
+
+            Args:
+                _id (:obj:`str`): uniprot ID.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'uniprot_id': , 'abundances': }, {},...,{}].
+        '''
+        projection = {'_id': 0, 'ko_number': 1, 'ncbi_taxonomy_id': 1, 'uniprot_id': 1}
+        doc = await self.collection.find_one(filter={'uniprot_id': _id}, projection=projection,
+                                             collation=self.collation)
+        if doc is None:
+            return 'No such protein in the database.'
+        ko_number = doc.get('ko_number')
+        if ko_number is None:
+            return 'No kegg information available for this protein.'
+        query = QueryProtein._same_ko_query(ko_number)
+        projection = {'ancestor_name': 0, 'ancestor_taxon_id': 0, '_id': 0}
+        return await self.collection.find(filter=query, projection=projection).to_list(None)
+
+    async def get_abundance_by_ko(self, ko):
+        ''' Get abundance information of proteins with
+            the same KO.
+
+            Args:
+                ko (:obj:`str`): KO number.
+
+            Returns:
+                (:obj:`list` of :obj:`dict`): [{'uniprot_id': , 'abundances': }, {},...,{}].
+        '''
+        query = QueryProtein._same_ko_query(ko.upper())
+        projection = {'abundances': 1, 'uniprot_id': 1, '_id': 0}
+        return await self.collection.find(filter=query, projection=projection).to_list(None)
+
+    def iter_abundance_by_ko(self, ko, batch_size=None, limit=0):
+        ''' Stream abundance information of proteins with
+            the same KO.
+
+            Args:
+                ko (:obj:`str`): KO number.
+                batch_size (:obj:`int`, optional): documents per server round trip. Defaults to None.
+                limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+
+            Returns:
+                (:obj:`AsyncGenerator` of :obj:`dict`): {'uniprot_id': , 'abundances': }.
+        '''
+        projection = {'abundances': 1, 'uniprot_id': 1, '_id': 0}
+        return self.iter_find(self.collection, QueryProtein._same_ko_query(ko.upper()),
+                              projection=projection, batch_size=batch_size, limit=limit)
+
+    async def get_kegg_orthology(self, uniprot_id):
+        """Get protein's kegg orthology number given uniprot id.
+
+        Args:
+            uniprot_id (:obj:`str`): protein's uniprot id.
+
+        Returns:
+            (:obj:`tuple`): kegg orthology id and list of kegg orthology descriptions.
+        """
+        projection = {'_id': 0, 'ko_number': 1, 'ko_name': 1}
+        doc = await self.collection.find_one(filter={'uniprot_id': uniprot_id}, projection=projection)
+        if doc is not None:
+            return doc.get('ko_number'), doc.get('ko_name', [])
+        else:
+            return None, []
+
+    async def get_kegg_orthology_bulk(self, uniprot_ids, chunk_size=1000, max_workers=4):
+        """Asyncio counterpart of :meth:`QueryProtein.get_kegg_orthology_bulk`, without cache.
+
+        Returns:
+            (:obj:`dict`): {uniprot_id: (ko_number, ko_name)} for every id, in input order.
+        """
+        async def fetch(chunk):
+            projection = {'_id': 0, 'uniprot_id': 1, 'ko_number': 1, 'ko_name': 1}
+            found = {}
+            async for doc in self.collection.find(filter={'uniprot_id': {'$in': chunk}}, projection=projection):
+                found.setdefault(doc['uniprot_id'], (doc.get('ko_number'), doc.get('ko_name', [])))
+            return found
+
+        result = dict.fromkeys(uniprot_ids)
+        async for chunk, found in self.map_chunks(fetch, list(result), chunk_size=chunk_size, max_workers=max_workers):
+            for uniprot_id in chunk:
+                result[uniprot_id] = found.get(uniprot_id, (None, []))
+        return result
+
+    async def get_unique_protein(self):
+        """Get number of unique proteins in collection
+
+        Return:
+            (:obj:`int`): number of unique proteins.
+        """
+        return await collection_stats.distinct_count_async(self.collection, 'uniprot_id', collation=self.collation)
+
+    async def get_unique_organism(self):
+        """Get number of unique organisms in collection.
+
+        Return:
+            (:obj:`int`): number of unique organisms.
+        """
+        return await collection_stats.distinct_count_async(self.collection, 'ncbi_taxonomy_id')
@@ -0,0 +1,89 @@
+from datanator_query_python.util import motor_util
+from datanator_query_python.query.query_rna_halflife import QueryRNA
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryRNA(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_rna_halflife.QueryRNA`
+    '''
+
+    def __init__(self, server=None, username=None, password=None, verbose=False,
+                 db=None, collection_str=None, authDB='admin', readPreference='nearest',
+                 replicaSet=None, options=None):
+        super().__init__(MongoDB=server, db=db, username=username,
+                        password=password, authSource=authDB, readPreference=readPreference,
+                        verbose=verbose, replicaSet=replicaSet, options=options)
+        self.collection = self.db_obj[collection_str]
+        self.collation = Collation('en', strength=CollationStrength.SECONDARY)
+
+    async def get_doc_by_oln(self, oln, projection={'_id': 0}):
+        """Get document by ordered locus name
+        
+        Args:
+            oln (:obj:`str`): odered locus name.
+            projection (:obj:`dict`): pymongo query projection.
+
+        Return:
+            (:obj:`tuple` of :obj:`motor.motor_asyncio.AsyncIOMotorCursor` and :obj:`int`):
+            Motor cursor object and number of documents returned
+        """
+        query = QueryRNA._doc_by_oln_query(oln)
+        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
+        count = await self.collection.count_documents(query, collation=self.collation)
+        return docs, count
+
+    async def get_doc_by_names(self, name, projection={'_id': 0},
+                               _from=0, size=0):
+        """Get document by protein name
+        
+        Args:
+            name (:obj:`str`): name of the protein
+            projection (:obj:`dict`, optional): mongodb query result projection. Defaults to {'_id': 0}.
+            _from (:obj:`int`): first page (0-indexed).
+            size (:obj:`int`): number of items per page.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
+        """
+        query = QueryRNA._doc_by_names_query(name)
+        return await self.find_with_count(self.collection, query, projection=projection,
+                                          skip=_from, limit=size, collation=self.collation)
+
+    async def get_doc_by_ko(self, ko_number, projection={'_id': 0},
+                            _from=0, size=0):
+        """Get documents by ko_number
+        
+        Args:
+            ko_number (:obj:`str`): Kegg ortholog number.
+            projection (:obj:`dict`, optional): mongodb query result
+            projection. Defaults to {'_id': 0}.
+            _from (:obj:`int`): first page (0-indexed).
+            size (:obj:`int`): number of items per page.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
+        """
+        query = QueryRNA._doc_by_ko_query(ko_number)
+        return await self.find_with_count(self.collection, query, projection=projection,
+                                          skip=_from, limit=size)
+
+    async def get_doc_by_orthodb(self, orthodb, projection={'_id': 0},
+                                 _from=0, size=0):
+        """Get documents by orthodb group ID.
+        
+        Args:
+            orthodb (:obj:`str`): Orthodb group ID.
+            projection (:obj:`dict`, optional): mongodb query result
+            projection. Defaults to {'_id': 0}.
+            _from (:obj:`int`): first page (0-indexed).
+            size (:obj:`int`): number of items per page.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`):
+            documents of the page and total number of documents.
+        """
+        query = QueryRNA._doc_by_orthodb_query(orthodb)
+        return await self.find_with_count(self.collection, query, projection=projection,
+                                          skip=_from, limit=size)
@@ -0,0 +1,208 @@
+from datanator_query_python.util import motor_util, collection_stats
+from datanator_query_python.query.query_sabiork_old import QuerySabioOld
+from pymongo.collation import Collation, CollationStrength
+from pymongo import ASCENDING
+from collections import deque
+
+
+class AsyncQuerySabioOld(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_sabiork_old.QuerySabioOld`
+    '''
+
+    def __init__(self, MongoDB=None, replicaSet=None, db='datanator',
+                 collection_str='sabio_rk_old', verbose=False, max_entries=float('inf'), username=None,
+                 password=None, authSource='admin', readPreference='nearest', options=None):
+        super().__init__(MongoDB=MongoDB, replicaSet=replicaSet, db=db,
+                         verbose=verbose, max_entries=max_entries, username=username,
+                         password=password, authSource=authSource, readPreference=readPreference,
+                         options=options)
+        self.max_entries = max_entries
+        self.collection = self.db_obj[collection_str]
+        self.collection_str = collection_str
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+    async def get_kinlaw_by_environment(self, taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
+                                        name_space=None, param_type=None, projection={'_id': 0}):
+        """get kinlaw info based on experimental conditions
+
+        Args:
+            taxon (:obj:`list`, optional): list of ncbi taxon id
+            taxon_wildtype (:obj:`list` of :obj:`bool`, optional): True indicates wildtype and False indicates mutant
+            ph_range (:obj:`list`, optional): range of pH
+            temp_range (:obj:`list`, optional): range of temperature
+            name_space (:obj:`dict`, optional): cross_reference key/value pair, i.e. {'ec-code': '3.4.21.62'}
+            param_type (:obj:`list`, optional): possible values for parameters.type
+            projection (:obj:`dict`, optional): mongodb query result projection
+
+        Returns:
+            (:obj:`tuple`) consisting of
+            docs (:obj:`motor.motor_asyncio.AsyncIOMotorCursor`): cursor of docs;
+            count (:obj:`int`): number of documents found
+        """
+        query = QuerySabioOld._environment_query(taxon=taxon, taxon_wildtype=taxon_wildtype, ph_range=ph_range,
+                                                 temp_range=temp_range, name_space=name_space, param_type=param_type)
+        docs = self.collection.find(filter=query, projection=projection)
+        count = await self.collection.count_documents(query)
+        return docs, count
+
+    def iter_kinlaw_by_environment(self, taxon=None, taxon_wildtype=None, ph_range=None, temp_range=None,
+                                   name_space=None, param_type=None, projection={'_id': 0},
+                                   batch_size=None, limit=0):
+        """Asyncio counterpart of :meth:`QuerySabioOld.iter_kinlaw_by_environment`.
+
+        Returns:
+            (:obj:`AsyncGenerator` of :obj:`dict`): docs found
+        """
+        query = QuerySabioOld._environment_query(taxon=taxon, taxon_wildtype=taxon_wildtype, ph_range=ph_range,
+                                                 temp_range=temp_range, name_space=name_space, param_type=param_type)
+        return self.iter_find(self.collection, query, projection=projection,
+                              batch_size=batch_size, limit=limit)
+
+    async def get_reaction_doc(self, kinlaw_id, projection={'_id': 0}):
+        '''Find a document on reaction with the kinlaw_id
+
+        Args:
+            kinlaw_id (:obj:`list` of :obj:`int`) list of kinlaw_id to search for
+            projection (:obj:`dict`): mongodb query result projection
+
+        Returns:
+            (:obj:`tuple`) consisting of
+            docs (:obj:`motor.motor_asyncio.AsyncIOMotorCursor`): cursor of docs;
+            count (:obj:`int`): number of documents found
+        '''
+        query = {'kinlaw_id': {'$in': kinlaw_id}}
+        docs = self.collection.find(filter=query, projection=projection)
+        count = await self.collection.count_documents(query)
+        return docs, count
+
+    async def get_kinlaw_by_rxn(self, substrates, products, dof=0,
+                                projection={'kinlaw_id': 1, '_id': 0},
+                                bound='loose', skip=0, limit=0):
+        ''' Find the kinlaw_id defined in sabio_rk using
+            rxn participants' inchikey
+
+            Args:
+                substrates (:obj:`list`): list of substrates' inchikey
+                products (:obj:`list`): list of products' inchikey
+                dof (:obj:`int`, optional): degree of freedom allowed (number of parts of
+                                  inchikey to truncate); the default is 0
+                projection (:obj:`dict`): pymongo query projection
+                bound (:obj:`str`): limit substrates/products to include only input values
+
+            Return:
+                (:obj:`tuple`): number of documents and list of kinlaws that satisfy the condition
+        '''
+        query = QuerySabioOld._rxn_query(substrates, products, dof=dof, bound=bound)
+        pipeline = QuerySabioOld._kegg_meta_pipeline(query, projection, skip=skip, limit=limit)
+        docs, count = await self.find_with_count(self.collection, query, stages=pipeline[1:],
+                                                 skip=skip, limit=limit, filters=False)
+        return count, docs
+
+    async def get_kinlaw_by_rxn_name(self, substrates, products,
+                                     projection={"kegg_meta.gene_ortholog": 0, 'kegg_meta._id': 0, '_id': 0},
+                                     bound='loose', skip=0, limit=0):
+        ''' Find the kinlaw_id defined in sabio_rk using
+            rxn participants' names
+
+            Args:
+                substrates (:obj:`list`): list of substrates' names
+                products (:obj:`list`): list of products' names
+                projection (:obj:`dict`): pymongo query projection
+                bound (:obj:`str`): limit substrates/products to include only input values
+
+            Return:
+                (:obj:`tuple`): number of documents and cursor of kinlaws that satisfy the condition
+        '''
+        query = QuerySabioOld._rxn_name_query(substrates, products, bound=bound)
+        pipeline = QuerySabioOld._kegg_meta_pipeline(query, projection, skip=skip, limit=limit)
+        docs = self.collection.aggregate(pipeline)
+        count = await self.collection.count_documents(query)
+        return count, docs
+
+    async def get_kinlaw_by_entryid(self, entry_id):
+        """Find reactions by sabio entry id
+
+        Args:
+            entry_id (:obj:`int`): entry_id
+
+            Return:
+                (:obj:`dict`): {'kinlaw_id': [], 'substrates': [], 'products': []}
+        """
+        kinlaw_id = deque()
+        substrates = deque()
+        products = deque()
+        query = QuerySabioOld._entryid_query(entry_id)
+        projection = {'_id': 0, 'kinlaw_id': 1, 'reaction_participant.substrate_aggregate': 1,
+                     'reaction_participant.product_aggregate': 1}
+        async for doc in self.collection.find(filter=query, projection=projection):
+            kinlaw_id.append(doc['kinlaw_id'])
+            substrates.append(doc['reaction_participant'][3]['substrate_aggregate'])
+            products.append(doc['reaction_participant'][4]['product_aggregate'])
+        return {'kinlaw_id': kinlaw_id, 'substrates': substrates, 'products': products}
+
+    async def get_info_by_entryid(self, entry_id, size=10):
+        """Find reactions by sabio entry id, return all information.
+        Taxonomic distances (target_organism) are only offered by the
+        synchronous class.
+
+        Args:
+            entry_id (:obj:`int`): entry_id
+            size (:obj:`int`): pagination page size
+
+        Return:
+            (:obj:`list` of :obj:`dict`): list of documents of entry id
+        """
+        query = QuerySabioOld._entryid_query(entry_id)
+        sort = [('kinlaw_id', ASCENDING)]
+        return await self.collection.find(filter=query, projection={'_id': 0},
+                                          sort=sort, limit=size).to_list(None)
+
+    async def get_unique_entries(self):
+        """Get number of unique curated entries.
+
+        Return:
+            (:obj:`int`): Number of unique entries.
+        """
+        return await collection_stats.distinct_count_async(self.collection, 'kinlaw_id')
+
+    async def get_unique_organisms(self):
+        """Get number of unique organisms.
+
+        Return:
+            (:obj:`int`): Number of unique organisms.
+        """
+        return await collection_stats.distinct_count_async(self.collection, 'taxon_id')
+
+    async def get_rxn_with_prm(self, kinlaw_ids, _from=0, size=10):
+        """Given a list of kinlaw ids, return documents where
+        kinlaw has at least one Km or kcat.
+
+        Args:
+            kinlaw_ids (:obj:`list` of :obj:`int`): List of kinlaw IDs.
+            _from (:obj:`int`): record offset. Defaults to 0.
+            size (:obj:`int`): number of records to be returned. Defaults to 10.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` of :obj:`dict` and :obj:`list` of :obj:`int`): list of rxn documents, and ids that have parameter
+        """
+        result = deque()
+        have = deque()
+        query = QuerySabioOld._prm_query(kinlaw_ids)
+        cursor = self.collection.find(filter=query, projection={'_id': 0}, collation=self.collation,
+                                      skip=_from, limit=size)
+        async for r in cursor:
+            result.append(r)
+            have.append(r['kinlaw_id'])
+        return result, have
+
+    async def get_reaction_by_subunit(self, _ids):
+        """Get reactions by enzyme subunit uniprot IDs
+
+        Args:
+            _ids (:obj:`list` of :obj:`str`): List of uniprot IDs.
+
+        Return:
+            (:obj:`list` of :obj:`str`): List of kinlaw IDs.
+        """
+        docs = await self.collection.aggregate(QuerySabioOld._subunit_pipeline(_ids)).to_list(None)
+        return QuerySabioOld._unique_by_entry(docs)
@@ -0,0 +1,128 @@
+from datanator_query_python.util import motor_util
+from datanator_query_python.query.query_uniprot import QueryUniprot
+from pymongo.collation import Collation, CollationStrength
+
+
+class AsyncQueryUniprot(motor_util.MotorUtil):
+    '''Asyncio counterpart of :class:`datanator_query_python.query.query_uniprot.QueryUniprot`
+    '''
+
+    def __init__(self, username=None, password=None, server=None, authSource='admin',
+                 database='datanator', collection_str=None, readPreference='nearest',
+                 replicaSet=None, options=None):
+        super().__init__(MongoDB=server, username=username,
+                         password=password, authSource=authSource, db=database,
+                         readPreference=readPreference, replicaSet=replicaSet, options=options)
+        self.collection = self.db_obj[collection_str]
+        self.koc_collection = self.db_obj['kegg_organism_code']
+        self.collation = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+    async def get_doc_by_locus(self, locus, projection={'_id':0}):
+        """Get preferred gene name by locus name
+
+        Args:
+            locus (:obj:`str`): Gene locus name
+            projection (:obj:`dict`, optional): MongoDB query projection. Defaults to {'_id':0}.
+
+        Return:
+            (:obj:`tuple` of :obj:`motor.motor_asyncio.AsyncIOMotorCursor` and `int`): cursor and number of documents.
+        """
+        query = QueryUniprot._name_search(locus)
+        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
+        count = await self.collection.count_documents(query, collation=self.collation)
+        return docs, count
+
+    async def get_gene_protein_name_by_oln(self, oln, species=None, projection={'_id': 0}):
+        """Get documents by ordered locus name
+
+        Args:
+            oln (:obj:`str`): Ordered locus name.
+            species (:obj:`list`): NCBI taxonomy id. Defaults to None.
+            projection (:obj:`dict`, optional): Pymongo projection. Defaults to {'_id': 0}.
+
+        Return:
+            (:obj:`tuple` of :obj:`str`): gene_name and protein_name
+        """
+        if species is None:
+            query = {'gene_name_oln': oln}
+        else:
+            query = {'$and': [{'gene_name_oln': oln}, {'ncbi_taxonomy_id': {'$in': species}}]}
+        doc = await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is None:
+            return None, None
+        else:
+            return doc['gene_name'], doc['protein_name']
+
+    async def get_protein_name_by_gn(self, gene_name, species=None, projection={'_id': 0}):
+        """Get documents by gene name.
+
+        Args:
+            gene_name (:obj:`str`): gene name.
+            species (:obj:`list`): NCBI taxonomy id. Defaults to None.
+            projection (:obj:`dict`, optional): Pymongo projection. Defaults to {'_id': 0}.
+
+        Return:
+            (:obj:`str`): protein_name
+        """
+        if species is None:
+            query = {'gene_name': gene_name}
+        else:
+            query = {'$and': [QueryUniprot._name_search(gene_name), {'ncbi_taxonomy_id': {'$in': species}}]}
+        doc = await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is None:
+            return None
+        else:
+            return doc['protein_name']
+
+    async def get_names_by_gene_name(self, gene_name):
+        """Get standard gene name by gene name.
+
+        Args:
+            gene_name (:obj:`list` of :obj:`str`): list of gene names belonging to one protein.
+
+        Return:
+            (:obj:`tuple` of :obj:`str`): standard gene_name, protein_name
+        """
+        query = {'gene_name': {'$in': gene_name}}
+        projection = {'uniprot_id': 1, 'gene_name': 1, 'protein_name': 1}
+        doc = await self.collection.find_one(filter=query, projection=projection, collation=self.collation)
+        if doc is None:
+            return None, None
+        else:
+            return doc['gene_name'], doc['protein_name']
+
+    async def get_id_by_org_gene(self, org_gene):
+        """Convert kegg org_gene into uniprot id.
+
+        Args:
+            org_gene (:obj:`str`): Kegg org_gene format, e.g. aly:ARALYDRAFT_486312.
+
+        Return:
+            (:obj:`tuple` of :obj:`motor.motor_asyncio.AsyncIOMotorCursor` and `int`): cursor and number of documents.
+        """
+        org, gene_name = org_gene.split(':')[:2]
+        koc = await self.koc_collection.find_one(filter={'kegg_organism_id': org},
+                                                 projection={'_id': 0, 'ncbi_taxonomy_id': 1},
+                                                 collation=self.collation)
+        ncbi_id = -1 if koc is None else koc['ncbi_taxonomy_id']
+        query = {'$and': [QueryUniprot._name_search(gene_name), {'ncbi_taxonomy_id': ncbi_id}]}
+        projection = {'_id': 0, 'uniprot_id': 1}
+        docs = self.collection.find(filter=query, projection=projection, collation=self.collation)
+        count = await self.collection.count_documents(query, collation=self.collation)
+        return docs, count
+
+    async def get_info_by_entrez_id(self, entrez_id):
+        """Get protein info by gene entrez information
+
+        Args:
+            entrez_id (:obj:`str`): Gene entrez id.
+
+        Return:
+            (:obj:`str`): Uniprot ID.
+        """
+        doc = await self.collection.find_one(filter={'entrez_id': entrez_id}, projection={'_id': 0, 'uniprot_id': 1},
+                                             collation=self.collation)
+        if doc is None:
+            return None
+        else:
+            return doc['uniprot_id']
@@ -7,6 +7,17 @@ class QueryEn(query_schema_2_manager.QM):
         super().__init__()
         self.db = db
 
+    @staticmethod
+    def _entity_query(identifier, datatype):
+        """Query used by query_entity.
+
+        Return:
+            (:obj:`dict`)
+        """
+        con_0 = {"identifiers": {"$elemMatch": identifier}}
+        con_1 = {"type": datatype}
+        return {"$and": [con_0, con_1]}
+
     def query_entity(self, 
                     identifier,
                     datatype="metabolite",
@@ -28,9 +39,7 @@ class QueryEn(query_schema_2_manager.QM):
             (:obj:`list`): pymongo iterables.
         """
         col = self.client[self.db][collection]
-        con_0 = {"identifiers": {"$elemMatch": identifier}}
-        con_1 = {"type": datatype}
-        query = {"$and": [con_0, con_1]}
+        query = self._entity_query(identifier, datatype)
         result = []
         docs = col.find(filter=query,
                         limit=limit,
@@ -38,4 +47,30 @@ class QueryEn(query_schema_2_manager.QM):
                         projection=projection)
         for doc in docs:
             result.append(doc)
-        return result
\ No newline at end of file
+        return result
+
+    def query_entity_page(self,
+                          identifier,
+                          datatype="metabolite",
+                          collection="entity",
+                          size=10,
+                          page_token=None,
+                          projection={"_id": 0}):
+        """Get one page of entities with identifier, paging by _id
+        (cost does not grow with page depth, unlike skip).
+
+        Args:
+            identifier(:obj:`Obj`): identifier used for the entity.
+            datatype(:obj:`Obj`, optional): Datatype to be retrieved.
+            collection(:obj:`str`): name of the collection in which data resides.
+            size(:obj:`int`, optional): number of results to return.
+            page_token(:obj:`str`, optional): token returned with the previous page.
+            projection(:obj:`Obj`, optional): MongoDB projection.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`): documents and token of the next page.
+        """
+        col = self.client[self.db][collection]
+        query = self._entity_query(identifier, datatype)
+        return self.find_page(col, query, size=size, page_token=page_token,
+                              projection=projection)
@@ -3,11 +3,38 @@ from pymongo import ASCENDING
 
 
 class QueryObs(query_schema_2_manager.QM):
+
+    datatype_hint = [("identifier", ASCENDING),
+                     ("entity.type", ASCENDING),
+                     ("values.type", ASCENDING)]
+    # get_entity_datatype_page sorts on _id: with _id last in the index the
+    # matches are read in page order instead of being sorted in memory.
+    # Build it with the collation of the class.
+    datatype_page_index = datatype_hint + [("_id", ASCENDING)]
+
     def __init__(self,
                  db="datanator-demo"):
         super().__init__()
         self.db = db
 
+    @staticmethod
+    def _datatype_query(identifier, entity, datatype):
+        """Query used by get_entity_datatype.
+
+        Return:
+            (:obj:`dict`)
+        """
+        con_0 = {"entity.type": entity}
+        con_1 = {}
+        if entity == "protein" and datatype != "localization":
+            con_1["values.type"] = datatype
+        elif entity == "protein" and datatype == "localization":
+            words = ["intramembrane_localization", "secretome location"]
+            con_1["values.type"] = {"$in": words}
+        elif entity == "RNA" and datatype == "localization":
+            con_1["values.type"] = "subcellular_localization"
+        return {"$and": [{"identifier": identifier}, con_0, con_1]}
+
     def get_entity_datatype(self, 
                               identifier,
                               entity="protein",
@@ -31,22 +58,39 @@ class QueryObs(query_schema_2_manager.QM):
         """
         results = []
         col = self.client[self.db][collection]
-        con_0 = {"entity.type": entity}
-        con_1 = {}
-        if entity == "protein" and datatype != "localization":
-            con_1["values.type"] = datatype
-        elif entity == "protein" and datatype == "localization":
-            words = ["intramembrane_localization", "secretome location"]
-            con_1["values.type"] = {"$in": words}
-        elif entity == "RNA" and datatype == "localization":
-            con_1["values.type"] = "subcellular_localization"
-        query = {"$and": [{"identifier": identifier}, con_0, con_1]}
+        query = self._datatype_query(identifier, entity, datatype)
         docs = col.find(filter=query, limit=limit, skip=skip,
                         collation=self.collation,
                         projection=projection,
-                        hint=[("identifier", ASCENDING), 
-                              ("entity.type", ASCENDING),
-                              ("values.type", ASCENDING)])
+                        hint=self.datatype_hint)
         for doc in docs:
             results.append(doc)
         return results
+
+    def get_entity_datatype_page(self,
+                                 identifier,
+                                 entity="protein",
+                                 datatype="half-life",
+                                 collection="observation",
+                                 size=10,
+                                 page_token=None,
+                                 projection={"_id": 0}):
+        """Get one page of entity datatype, paging by _id
+        (cost does not grow with page depth, unlike skip). Needs
+        :attr:`datatype_page_index`, which the query planner picks on its own.
+
+        Args:
+            identifier(:obj:`Obj`): identifier used for the entity.
+            entity(:obj:`Obj`, optional): entity type. i.e. "protein", "RNA", etc. 
+            datatype(:obj:`Obj`, optional): Datatype to be retrieved.
+            collection(:obj:`str`, optional): name of collection in which values reside.
+            size(:obj:`int`, optional): number of results to return.
+            page_token(:obj:`str`, optional): token returned with the previous page.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`): documents and token of the next page.
+        """
+        col = self.client[self.db][collection]
+        query = self._datatype_query(identifier, entity, datatype)
+        return self.find_page(col, query, size=size, page_token=page_token,
+                              projection=projection, collation=self.collation)
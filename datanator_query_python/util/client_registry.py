@@ -0,0 +1,163 @@
+"""Process-wide registry of MongoDB clients.
+
+Every pymongo/motor client owns its own connection pool and server monitoring
+threads, so query managers that connect with the same parameters share one
+client from this registry instead of creating their own. Clients are keyed
+by connection string without the database path (managers pick their
+database with get_database, and authSource is explicit), so managers of
+different databases on the same server share a pool. A motor client is
+bound to the event loop it was created under, so motor clients are shared
+only by managers created under the same loop.
+"""
+import asyncio
+import threading
+import pymongo
+
+
+_lock = threading.Lock()
+_clients = {}
+_overrides = {}  # client class -> client handed out instead of a registered one
+
+
+def _server_uri(uri):
+    """Connection string without its database path.
+    """
+    scheme, sep, rest = uri.partition('://')
+    address, question, params = rest.partition('?')
+    slash = address.find('/', address.rfind('@') + 1)
+    if slash >= 0:
+        address = address[:slash]
+    return scheme + sep + address + '/' + question + params
+
+
+def _is_async(client_class):
+    return client_class.__module__.split('.')[0] == 'motor'
+
+
+def _event_loop():
+    """Loop a motor client created now is bound to (motor uses get_event_loop).
+    """
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.get_event_loop()
+
+
+def _make_key(uri, client_class, replicaSet, options, kwargs):
+    return (client_class.__module__ + '.' + client_class.__name__,
+            _server_uri(uri),
+            replicaSet,
+            options,
+            tuple(sorted(kwargs.items())),
+            _event_loop() if _is_async(client_class) else None)
+
+
+def _prune_closed_loops():
+    """Forget the motor clients of closed event loops; they cannot be used
+    (nor closed) any more.
+    """
+    for key in [key for key in _clients if key[-1] is not None and key[-1].is_closed()]:
+        del _clients[key]
+
+
+def get_client(uri, client_class=pymongo.MongoClient, replicaSet=None, options=None, **kwargs):
+    """Get the shared client for a set of connection parameters (and, for
+    motor clients, the current event loop), creating it on first use.
+
+    Args:
+        uri (:obj:`str`): MongoDB connection string (carries auth and read preference).
+        client_class (:obj:`type`, optional): Client class, e.g. pymongo.MongoClient or
+        motor.motor_asyncio.AsyncIOMotorClient. Defaults to pymongo.MongoClient.
+        replicaSet (:obj:`str`, optional): Name of replica set, passed to the client. Defaults to None.
+        options (:obj:`ConnectionOptions`, optional): Pool, timeout and compression settings. Defaults to None.
+        kwargs (:obj:`dict`): Extra keyword arguments passed to client_class; must be hashable.
+
+    Return:
+        (:obj:`pymongo.MongoClient` or :obj:`motor.motor_asyncio.AsyncIOMotorClient`)
+    """
+    key = _make_key(uri, client_class, replicaSet, options, kwargs)
+    with _lock:
+        override = _overrides.get(client_class)
+        if override is not None:
+            return override
+        client = _clients.get(key)
+        if client is None:
+            _prune_closed_loops()
+            if options is not None:
+                kwargs = dict(options.client_kwargs(), **kwargs)
+            if replicaSet is not None:
+                kwargs['replicaSet'] = replicaSet
+            client = client_class(uri, **kwargs)
+            _clients[key] = client
+        return client
+
+
+def set_override(client, client_class=pymongo.MongoClient):
+    """Hand out client from every get_client call for client_class, whatever
+    the connection parameters, e.g. a local mongod or mongomock client for
+    offline benchmarks. Calls for other client classes (e.g. motor) still get
+    registered clients. The override is not registered, so close_all leaves it open.
+
+    Args:
+        client (:obj:`pymongo.MongoClient`): Client to use, None to go back to the registry.
+        client_class (:obj:`type`, optional): Client class the override stands in for. Defaults to pymongo.MongoClient.
+
+    Return:
+        (:obj:`pymongo.MongoClient`): the previous override of client_class, if any.
+    """
+    with _lock:
+        previous = _overrides.pop(client_class, None)
+        if client is not None:
+            _overrides[client_class] = client
+    return previous
+
+
+def close_client(uri, client_class=pymongo.MongoClient, replicaSet=None, options=None, **kwargs):
+    """Close and forget the client registered for a set of connection parameters.
+
+    Args:
+        uri (:obj:`str`): MongoDB connection string.
+        client_class (:obj:`type`, optional): Client class. Defaults to pymongo.MongoClient.
+        replicaSet (:obj:`str`, optional): Name of replica set. Defaults to None.
+        options (:obj:`ConnectionOptions`, optional): Settings the client was created with. Defaults to None.
+        kwargs (:obj:`dict`): Extra keyword arguments the client was created with.
+
+    Return:
+        (:obj:`bool`): whether a client was closed.
+    """
+    key = _make_key(uri, client_class, replicaSet, options, kwargs)
+    with _lock:
+        client = _clients.pop(key, None)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+def close_all():
+    """Close every registered client and empty the registry.
+    """
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def reset():
+    """Forget every registered client without closing it,
+    e.g. in a child process after fork, where the parent's
+    sockets must not be touched.
+    """
+    with _lock:
+        _clients.clear()
+
+
+def live_pools():
+    """Number of clients (connection pools) currently registered.
+
+    Return:
+        (:obj:`int`)
+    """
+    with _lock:
+        return len(_clients)
@@ -0,0 +1,286 @@
+"""Collection statistics (number of unique proteins, organisms, ...) for
+the home page, served without touching the data collections.
+
+A statistic is the number of distinct values of a field. It is computed
+server side with $group + $count, so no distinct array is shipped to the
+client (distinct fails once its result exceeds 16MB), and kept in memory
+with a time stamp. Services created with persist=True also store it in the
+collection_stats collection of the same database, one document per
+statistic: {'_id': 'uniprot.uniprot_id', 'value': ...,
+'computed_at': ...}, where every process reads it. Query classes usually
+connect with read-only credentials, so persistence is opt-in and a failed
+write only leaves the value in memory; :func:`refresh_all` (the
+collection-stats command) stores the statistics they serve.
+
+Calls are served from memory. Once a value is older than max_age, the
+stale value is still returned and a refresh runs in the background; only
+the very first call for a statistic, when there is no stored value yet,
+waits for the count.
+"""
+import asyncio
+import datetime
+import threading
+from pymongo.collation import Collation, CollationStrength
+from pymongo.errors import OperationFailure
+
+
+STATS_COLLECTION = 'collection_stats'
+CASE_INSENSITIVE = Collation(locale='en', strength=CollationStrength.SECONDARY)
+# statistics served by the query classes: (collection, field, collation);
+# the collation must match the query class for stored values to agree
+STATS = [('uniprot', 'uniprot_id', CASE_INSENSITIVE),
+         ('uniprot', 'ncbi_taxonomy_id', None),
+         ('sabio_rk_old', 'kinlaw_id', None),
+         ('sabio_rk_old', 'taxon_id', None),
+         ('metabolites_meta', 'InChI_Key', CASE_INSENSITIVE)]
+
+
+def distinct_count_pipeline(field):
+    """Pipeline counting the distinct values of a field, as len(distinct(field)) would.
+
+    Args:
+        field (:obj:`str`): field name.
+
+    Return:
+        (:obj:`list` of :obj:`dict`)
+    """
+    return [{'$match': {field: {'$exists': True}}},
+            {'$group': {'_id': '$' + field}},
+            {'$count': 'n'}]
+
+
+def stat_id(collection, field):
+    """_id of a statistic in the stats collection.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): counted collection.
+        field (:obj:`str`): counted field.
+
+    Return:
+        (:obj:`str`)
+    """
+    return '{}.{}'.format(collection.name, field)
+
+
+class StatsService:
+    """Process-wide cache of collection statistics.
+
+    Args:
+        max_age (:obj:`float`, optional): seconds after which a value is refreshed. Defaults to one day.
+        stats_collection (:obj:`str`, optional): name of the stats collection. Defaults to 'collection_stats'.
+        persist (:obj:`bool`, optional): store computed values in the stats collection. Defaults to False.
+    """
+
+    def __init__(self, max_age=24 * 3600, stats_collection=STATS_COLLECTION, persist=False):
+        self.max_age = max_age
+        self.stats_collection = stats_collection
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._values = {}  # (collection full name, field) -> (value, computed_at)
+        self._refreshing = set()
+
+    def _fresh(self, computed_at):
+        age = datetime.datetime.utcnow() - computed_at
+        return age.total_seconds() < self.max_age
+
+    def _remember(self, collection, field, value, computed_at):
+        with self._lock:
+            self._values[(collection.full_name, field)] = (value, computed_at)
+
+    @staticmethod
+    def _now():
+        # BSON dates have millisecond precision
+        now = datetime.datetime.utcnow()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    def _stored(self, collection, field, value, computed_at):
+        """Stats collection, filter and replacement of a statistic.
+        """
+        return (collection.database[self.stats_collection], {'_id': stat_id(collection, field)},
+                {'value': value, 'computed_at': computed_at, 'collection': collection.name, 'field': field})
+
+    def _store(self, collection, field, value, computed_at):
+        if not self.persist:
+            return
+        stats, query, doc = self._stored(collection, field, value, computed_at)
+        try:
+            stats.replace_one(query, doc, upsert=True)
+        except OperationFailure:
+            # read-only user: the value stays in memory
+            pass
+
+    def refresh(self, collection, field, collation=None):
+        """Count the distinct values of a field now and keep the count
+        (and store it if the service persists values).
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): counted collection.
+            field (:obj:`str`): counted field.
+            collation (:obj:`pymongo.collation.Collation`, optional): collation values are compared with. Defaults to None.
+
+        Return:
+            (:obj:`int`)
+        """
+        docs = list(collection.aggregate(distinct_count_pipeline(field), collation=collation, allowDiskUse=True))
+        value = docs[0]['n'] if docs else 0
+        computed_at = self._now()
+        self._store(collection, field, value, computed_at)
+        self._remember(collection, field, value, computed_at)
+        return value
+
+    def _load(self, collection, field):
+        """Stored (value, computed_at), None if the statistic was never computed.
+        """
+        doc = collection.database[self.stats_collection].find_one({'_id': stat_id(collection, field)})
+        if doc is None:
+            return None
+        self._remember(collection, field, doc['value'], doc['computed_at'])
+        return doc['value'], doc['computed_at']
+
+    def _claim(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _release(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _refresh_stale(self, collection, field, collation):
+        key = (collection.full_name, field)
+        try:
+            # another process may have refreshed it already
+            stored = self._load(collection, field)
+            if stored is None or not self._fresh(stored[1]):
+                self.refresh(collection, field, collation=collation)
+        finally:
+            self._release(key)
+
+    def get(self, collection, field, collation=None):
+        """Number of distinct values of a field.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): counted collection.
+            field (:obj:`str`): counted field.
+            collation (:obj:`pymongo.collation.Collation`, optional): collation values are compared with. Defaults to None.
+
+        Return:
+            (:obj:`int`)
+        """
+        key = (collection.full_name, field)
+        cached = self._values.get(key)
+        if cached is None:
+            cached = self._load(collection, field)
+            if cached is None:
+                return self.refresh(collection, field, collation=collation)
+        value, computed_at = cached
+        if not self._fresh(computed_at) and self._claim(key):
+            threading.Thread(target=self._refresh_stale, args=(collection, field, collation),
+                             daemon=True).start()
+        return value
+
+    async def _store_async(self, collection, field, value, computed_at):
+        if not self.persist:
+            return
+        stats, query, doc = self._stored(collection, field, value, computed_at)
+        try:
+            await stats.replace_one(query, doc, upsert=True)
+        except OperationFailure:
+            pass
+
+    async def refresh_async(self, collection, field, collation=None):
+        """Asyncio counterpart of :meth:`refresh` for motor collections.
+        """
+        docs = await collection.aggregate(distinct_count_pipeline(field), collation=collation,
+                                          allowDiskUse=True).to_list(None)
+        value = docs[0]['n'] if docs else 0
+        computed_at = self._now()
+        await self._store_async(collection, field, value, computed_at)
+        self._remember(collection, field, value, computed_at)
+        return value
+
+    async def _load_async(self, collection, field):
+        doc = await collection.database[self.stats_collection].find_one({'_id': stat_id(collection, field)})
+        if doc is None:
+            return None
+        self._remember(collection, field, doc['value'], doc['computed_at'])
+        return doc['value'], doc['computed_at']
+
+    async def _refresh_stale_async(self, collection, field, collation):
+        key = (collection.full_name, field)
+        try:
+            stored = await self._load_async(collection, field)
+            if stored is None or not self._fresh(stored[1]):
+                await self.refresh_async(collection, field, collation=collation)
+        finally:
+            self._release(key)
+
+    async def get_async(self, collection, field, collation=None):
+        """Asyncio counterpart of :meth:`get` for motor collections; the
+        refresh of a stale value runs as a task of the event loop.
+        """
+        key = (collection.full_name, field)
+        cached = self._values.get(key)
+        if cached is None:
+            cached = await self._load_async(collection, field)
+            if cached is None:
+                return await self.refresh_async(collection, field, collation=collation)
+        value, computed_at = cached
+        if not self._fresh(computed_at) and self._claim(key):
+            asyncio.ensure_future(self._refresh_stale_async(collection, field, collation))
+        return value
+
+    def clear(self):
+        """Forget the values held in memory (the stored ones are kept).
+        """
+        with self._lock:
+            self._values.clear()
+
+
+default = StatsService()
+
+
+def distinct_count(collection, field, collation=None):
+    """Number of distinct values of a field, from the process-wide :class:`StatsService`.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): counted collection.
+        field (:obj:`str`): counted field.
+        collation (:obj:`pymongo.collation.Collation`, optional): collation values are compared with. Defaults to None.
+
+    Return:
+        (:obj:`int`)
+    """
+    return default.get(collection, field, collation=collation)
+
+
+async def distinct_count_async(collection, field, collation=None):
+    """Asyncio counterpart of :func:`distinct_count` for motor collections.
+    """
+    return await default.get_async(collection, field, collation=collation)
+
+
+def refresh_all(database, collections=None, max_age=24 * 3600):
+    """Recompute the statistics of :data:`STATS` found in a database and store
+    them, so that query processes read them instead of counting; run it with
+    read-write credentials, e.g. after the ETL of a collection.
+
+    Args:
+        database (:obj:`pymongo.database.Database`): database of the counted collections.
+        collections (:obj:`Iterable` of :obj:`str`, optional): only these collections. Defaults to None (all).
+        max_age (:obj:`float`, optional): max_age of the service. Defaults to one day.
+
+    Return:
+        (:obj:`dict`): stat id -> value.
+    """
+    service = StatsService(max_age=max_age, persist=True)
+    names = set(database.list_collection_names())
+    result = {}
+    for name, field, collation in STATS:
+        if name not in names or (collections is not None and name not in collections):
+            continue
+        collection = database[name]
+        result[stat_id(collection, field)] = service.refresh(collection, field, collation=collation)
+    return result
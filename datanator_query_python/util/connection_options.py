@@ -0,0 +1,57 @@
+"""Tunable connection pool, timeout and compression settings
+shared by MongoUtil and MotorUtil.
+"""
+from typing import NamedTuple, Optional
+
+
+class ConnectionOptions(NamedTuple):
+    """Connection settings applied to pymongo and motor clients.
+
+    Instances are hashable, so clients created with equal options are shared
+    by :mod:`datanator_query_python.util.client_registry`.
+
+    Attributes:
+        max_pool_size (:obj:`int`): max number of connections per server (maxPoolSize).
+        min_pool_size (:obj:`int`): number of connections kept open per server (minPoolSize).
+        max_idle_time_ms (:obj:`int`): close connections idle longer than this (maxIdleTimeMS).
+        server_selection_timeout_ms (:obj:`int`): how long to wait for a suitable server (serverSelectionTimeoutMS).
+        socket_timeout_ms (:obj:`int`): how long to wait for a reply on a socket (socketTimeoutMS).
+        connect_timeout_ms (:obj:`int`): how long to wait for a connection to open (connectTimeoutMS).
+        wait_queue_timeout_ms (:obj:`int`): how long to wait for a free connection in the pool (waitQueueTimeoutMS).
+        compressors (:obj:`str`): comma separated wire compressors, e.g. 'zstd,snappy'.
+        max_time_ms (:obj:`int`): default server-side time limit for queries run through MongoUtil helpers.
+        pool_metrics (:obj:`datanator_query_python.util.pool_metrics.PoolMetrics`): listener collecting pool statistics.
+        query_metrics (:obj:`datanator_query_python.util.query_metrics.QueryMetrics`): listener collecting per query method statistics.
+    """
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    socket_timeout_ms: Optional[int] = None
+    connect_timeout_ms: int = 20000
+    wait_queue_timeout_ms: Optional[int] = None
+    compressors: Optional[str] = None
+    max_time_ms: Optional[int] = None
+    pool_metrics: Optional[object] = None
+    query_metrics: Optional[object] = None
+
+    def client_kwargs(self):
+        """Keyword arguments for pymongo.MongoClient / AsyncIOMotorClient.
+
+        Return:
+            (:obj:`dict`)
+        """
+        kwargs = {'maxPoolSize': self.max_pool_size,
+                  'minPoolSize': self.min_pool_size,
+                  'maxIdleTimeMS': self.max_idle_time_ms,
+                  'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+                  'socketTimeoutMS': self.socket_timeout_ms,
+                  'connectTimeoutMS': self.connect_timeout_ms,
+                  'waitQueueTimeoutMS': self.wait_queue_timeout_ms,
+                  'compressors': self.compressors}
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        listeners = [listener for listener in (self.pool_metrics, self.query_metrics)
+                     if listener is not None]
+        if listeners:
+            kwargs['event_listeners'] = listeners
+        return kwargs
@@ -0,0 +1,224 @@
+"""Check that the filters and pipelines of the query methods use indexes,
+by running them through the explain command against a target database.
+
+Each :class:`Audit` rebuilds the filter (or pipeline) of one query method
+with values taken from a document of the collection, so the plan is the
+one the method would get. A plan is flagged when it contains a COLLSCAN,
+sorts in memory, or examines many more documents than it returns.
+"""
+from typing import Callable, NamedTuple, Optional
+from pymongo import ASCENDING
+from datanator_query_python.query.query_protein import QueryProtein
+from datanator_query_python.query.query_sabiork_old import QuerySabioOld
+from datanator_query_python.query.query_rna_halflife import QueryRNA
+from datanator_query_python.query.query_pax import QueryPax
+from datanator_query_python.query_schema_2.query_observation import QueryObs
+
+
+COLLATION = {'locale': 'en', 'strength': 2}
+
+
+class Audit(NamedTuple):
+    """One query method's filter to explain.
+
+    Attributes:
+        name (:obj:`str`): query method, e.g. 'QueryProtein.get_meta_by_id'.
+        collection (:obj:`str`): collection the method reads.
+        sample (:obj:`dict`): filter selecting a document to take query values from.
+        build (:obj:`Callable`): sample document -> {'filter': ..., 'sort': ..., 'hint': ..., 'collation': ...}
+        or {'pipeline': [...], 'collation': ...}.
+        db (:obj:`str`): database the method hard-codes, None for the target database.
+        allow (:obj:`tuple`): problems expected by design, e.g. ('COLLSCAN',).
+    """
+    name: str
+    collection: str
+    sample: dict
+    build: Callable
+    db: Optional[str] = None
+    allow: tuple = ()
+
+
+AUDITS = [
+    Audit('QueryProtein.get_meta_by_id', 'uniprot', {'uniprot_id': {'$exists': True}},
+          lambda d: {'filter': QueryProtein._meta_by_id_query([d['uniprot_id']])[0], 'collation': COLLATION}),
+    Audit('QueryProtein.get_abundance_by_taxon', 'uniprot', {'ncbi_taxonomy_id': {'$exists': True}},
+          lambda d: {'filter': {'ncbi_taxonomy_id': d['ncbi_taxonomy_id']}}),
+    Audit('QueryProtein.get_abundance_by_ko', 'uniprot', {'ko_number': {'$type': 'string'}},
+          lambda d: {'filter': QueryProtein._same_ko_query(d['ko_number'])}),
+    Audit('QueryProtein.get_proximity_abundance_taxon', 'uniprot', {'ancestor_taxon_id': {'$exists': True}},
+          lambda d: {'filter': {'$and': [{'uniprot_id': d['uniprot_id']}, {'ancestor_taxon_id': {'$exists': True}}]},
+                     'collation': COLLATION}),
+    Audit('QueryProtein.get_proximity_abundance_taxon:relatives', 'uniprot',
+          {'ancestor_taxon_id': {'$exists': True}, 'ko_number': {'$type': 'string'}},
+          lambda d: {'filter': {'$and': [{'ko_number': d['ko_number']},
+                                         {'ncbi_taxonomy_id': {'$in': d['ancestor_taxon_id'][-3:]}}]},
+                     'collation': COLLATION}),
+    Audit('QueryProtein.get_equivalent_protein', 'uniprot',
+          {'ancestor_taxon_id.1': {'$exists': True}, 'ko_number': {'$type': 'string'}},
+          lambda d: {'filter': QueryProtein._equivalent_query(d['ko_number'], d['ancestor_taxon_id'],
+                                                             min(3, len(d['ancestor_taxon_id'])),
+                                                             [d['ncbi_taxonomy_id']])}),
+    Audit('QueryProtein.get_all_ortho', 'uniprot', {'orthodb_id': {'$type': 'string'}},
+          lambda d: {'filter': {'$and': [{'orthodb_id': d['orthodb_id']}, {'abu_exist': True}]},
+                     'hint': [('abu_exist', ASCENDING), ('orthodb_id', ASCENDING)]}),
+    Audit('QueryTaxonTree.get_anc_by_id', 'taxon_tree', {'tax_id': {'$exists': True}},
+          lambda d: {'filter': {'tax_id': d['tax_id']}}),
+    Audit('QueryTaxonTree.get_anc_by_name', 'taxon_tree', {'tax_name': {'$exists': True}},
+          lambda d: {'filter': {'tax_name': d['tax_name']}, 'collation': COLLATION}),
+    Audit('QuerySabioOld.get_kinlaw_by_rxn', 'sabio_rk_old', {'reaction_participant.4': {'$exists': True}},
+          lambda d: {'pipeline': QuerySabioOld._kegg_meta_pipeline(
+              QuerySabioOld._rxn_query(d['reaction_participant'][3]['substrate_aggregate'],
+                                       d['reaction_participant'][4]['product_aggregate']),
+              {'kinlaw_id': 1, '_id': 0})}),
+    Audit('QuerySabioOld.get_kinlaw_by_environment', 'sabio_rk_old', {'taxon_id': {'$exists': True}},
+          lambda d: {'filter': QuerySabioOld._environment_query(taxon=[d['taxon_id']], taxon_wildtype=[True])}),
+    Audit('QuerySabioOld.get_kinlaw_by_entryid', 'sabio_rk_old', {'resource.namespace': 'sabiork.reaction'},
+          lambda d: {'filter': QuerySabioOld._entryid_query(
+              [r['id'] for r in d['resource'] if r.get('namespace') == 'sabiork.reaction'][0])}),
+    Audit('QuerySabioOld.get_rxn_with_prm', 'sabio_rk_old', {'kinlaw_id': {'$exists': True}},
+          lambda d: {'filter': QuerySabioOld._prm_query([d['kinlaw_id']]), 'collation': COLLATION}),
+    Audit('QueryMetabolitesMeta.get_metabolites_meta', 'metabolites_meta', {'InChI_Key': {'$exists': True}},
+          lambda d: {'filter': {'InChI_Key': d['InChI_Key']}, 'collation': COLLATION}, db='datanator-test'),
+    Audit('QueryRNA.get_doc_by_ko', 'rna_halflife_new', {'ko_number': {'$type': 'string'}},
+          lambda d: {'filter': QueryRNA._doc_by_ko_query(d['ko_number'])}),
+    Audit('QueryRNA.get_doc_by_names', 'rna_halflife_new', {'protein_names.0': {'$exists': True}},
+          lambda d: {'filter': QueryRNA._doc_by_names_query(d['protein_names'][0]), 'collation': COLLATION}),
+    Audit('QueryPax.get_file_by_ncbi_id', 'pax', {'ncbi_id': {'$exists': True}},
+          lambda d: {'filter': {'ncbi_id': {'$in': [d['ncbi_id']]}}}),
+    Audit('QueryPax.get_file_by_quality', 'pax', {'organ': {'$exists': True}},
+          lambda d: {'filter': QueryPax._quality_query(d['organ'], 4.0, 20, None)}),
+    Audit('QueryObs.get_entity_datatype', 'observation', {'identifier': {'$exists': True}},
+          lambda d: {'filter': QueryObs._datatype_query(d['identifier'], 'protein', 'half-life'),
+                     'hint': QueryObs.datatype_hint, 'collation': COLLATION}, db='datanator-demo'),
+]
+
+
+def explain(database, collection, spec):
+    """Run the explain command with executionStats verbosity.
+
+    Args:
+        database (:obj:`pymongo.database.Database`): database.
+        collection (:obj:`str`): collection name.
+        spec (:obj:`dict`): what Audit.build returns.
+
+    Return:
+        (:obj:`dict`): explain output.
+    """
+    if 'pipeline' in spec:
+        command = {'aggregate': collection, 'pipeline': spec['pipeline'], 'cursor': {}}
+    else:
+        command = {'find': collection, 'filter': spec['filter']}
+        for key in ('sort', 'projection', 'limit'):
+            if spec.get(key) is not None:
+                command[key] = spec[key]
+        if spec.get('hint') is not None:
+            command['hint'] = dict(spec['hint'])
+    if spec.get('collation') is not None:
+        command['collation'] = spec['collation']
+    return database.command('explain', command, verbosity='executionStats')
+
+
+def summarize(plan):
+    """Collect the plan stages and execution counters of an explain output,
+    whatever its layout (find, aggregate $cursor stage, sharded).
+
+    Args:
+        plan (:obj:`dict`): explain output.
+
+    Return:
+        (:obj:`dict`): stages, docs/keys examined, documents returned.
+    """
+    stages = set()
+    totals = {'docs_examined': 0, 'keys_examined': 0, 'n_returned': 0}
+
+    def walk(node):
+        if isinstance(node, dict):
+            stage = node.get('stage')
+            if isinstance(stage, str):
+                stages.add(stage)
+            if 'executionStats' in node and isinstance(node['executionStats'], dict):
+                stats = node['executionStats']
+                totals['docs_examined'] += stats.get('totalDocsExamined', 0)
+                totals['keys_examined'] += stats.get('totalKeysExamined', 0)
+                totals['n_returned'] += stats.get('nReturned', 0)
+            for key, value in node.items():
+                if key.startswith('$sort'):
+                    stages.add('$sort')
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(plan)
+    totals['stages'] = sorted(stages)
+    totals['ratio'] = totals['docs_examined'] / max(totals['n_returned'], 1)
+    return totals
+
+
+def problems(summary, max_ratio=10.0):
+    """Problems found in a plan summary.
+
+    Args:
+        summary (:obj:`dict`): what summarize returns.
+        max_ratio (:obj:`float`, optional): max docs examined per document returned. Defaults to 10.0.
+
+    Return:
+        (:obj:`list` of :obj:`str`)
+    """
+    found = []
+    if 'COLLSCAN' in summary['stages']:
+        found.append('COLLSCAN')
+    if 'SORT' in summary['stages'] or '$sort' in summary['stages']:
+        found.append('SORT')
+    if summary['ratio'] > max_ratio:
+        found.append('RATIO')
+    return found
+
+
+def run(client, db='datanator', names=None, max_ratio=10.0):
+    """Explain the query of every audited method.
+
+    Args:
+        client (:obj:`pymongo.MongoClient`): client of the target deployment.
+        db (:obj:`str`, optional): target database. Defaults to 'datanator'.
+        names (:obj:`list` of :obj:`str`, optional): audit only these methods. Defaults to None (all).
+        max_ratio (:obj:`float`, optional): max docs examined per document returned. Defaults to 10.0.
+
+    Return:
+        (:obj:`list` of :obj:`dict`): one result per audit; 'problems' lists the
+        unexpected findings, 'skipped' says why an audit could not run.
+    """
+    results = []
+    for audit in AUDITS:
+        if names is not None and audit.name not in names:
+            continue
+        database = client[audit.db or db]
+        result = {'name': audit.name, 'db': database.name, 'collection': audit.collection}
+        sample = database[audit.collection].find_one(audit.sample)
+        if sample is None:
+            result['skipped'] = 'no sample document'
+            results.append(result)
+            continue
+        summary = summarize(explain(database, audit.collection, audit.build(sample)))
+        result.update(summary)
+        result['problems'] = [p for p in problems(summary, max_ratio=max_ratio) if p not in audit.allow]
+        results.append(result)
+    return results
+
+
+def report(results):
+    """Human readable lines of run's results.
+
+    Return:
+        (:obj:`str`)
+    """
+    lines = []
+    for r in results:
+        if 'skipped' in r:
+            lines.append('SKIP  {}: {}'.format(r['name'], r['skipped']))
+            continue
+        status = 'FAIL' if r['problems'] else 'OK'
+        lines.append('{:<5} {}: {} examined/{} returned (ratio {:.1f}), stages {}{}'.format(
+            status, r['name'], r['docs_examined'], r['n_returned'], r['ratio'], ','.join(r['stages']),
+            ' -> ' + ','.join(r['problems']) if r['problems'] else ''))
+    return '\n'.join(lines)
@@ -1,19 +1,310 @@
 import pymongo
 from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import copy
+import itertools
 import json
 from genson import SchemaBuilder
+from datanator_query_python.util import client_registry, pagination
 
 
 class MongoUtil:
 
     def __init__(self, cache_dirname=None, MongoDB=None, replicaSet=None, db='test',
                  verbose=False, max_entries=float('inf'), username=None, 
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None, cache=None):
         string = "mongodb+srv://{}:{}@{}/{}?authSource={}&retryWrites=true&w=majority&readPreference={}".format(username, password, MongoDB, db, authSource, readPreference)
-        self.client = pymongo.MongoClient(string)
+        self.options = options
+        self.max_time_ms = None if options is None else options.max_time_ms
+        self.cache = cache
+        self.client = client_registry.get_client(string, replicaSet=replicaSet, options=options)
         self.db_obj = self.client.get_database(db)
 
+    @staticmethod
+    def _facet_pipeline(query, projection=None, skip=0, limit=0, sort=None,
+                        stages=None, max_count=None, count=True):
+        """Pipeline returning one document {'docs': [...], 'count': [{'n': ...}]}.
+        """
+        if stages is None:
+            stages = []
+            if sort:
+                stages.append({'$sort': dict(sort)})
+            if skip:
+                stages.append({'$skip': skip})
+            if limit:
+                stages.append({'$limit': limit})
+            if projection:
+                stages.append({'$project': projection})
+        facet = {'docs': stages or [{'$skip': 0}]}
+        if count:
+            count_stages = [{'$count': 'n'}]
+            if max_count is not None:
+                count_stages.insert(0, {'$limit': max_count})
+            facet['count'] = count_stages
+        return [{'$match': query}, {'$facet': facet}]
+
+    @staticmethod
+    def _facet_result(doc):
+        """(docs, count) out of the document returned by _facet_pipeline.
+        """
+        if doc is None:
+            return [], 0
+        count = doc.get('count')
+        return doc['docs'], count[0]['n'] if count else 0
+
+    def find_with_count(self, collection, query, projection=None, skip=0, limit=0,
+                        sort=None, collation=None, stages=None, max_count=None,
+                        approximate=False, filters=True):
+        """Get a page of documents and the total number of matching
+        documents in one round trip ($facet aggregation) instead of
+        find + count_documents.
+
+        All documents of the page are returned in a single aggregation
+        result, which is subject to MongoDB's 16MB document limit, so
+        unpaged calls (limit 0) read the documents with find (or an
+        aggregation without $facet when stages are given) and count them
+        separately: the count is the number of returned documents when
+        nothing is skipped or filtered by stages, else a $count aggregation
+        capped at max_count.
+
+        Stages replace sort/skip/limit/projection, so they apply skip and
+        limit themselves; pass skip and limit as well, so that paged calls
+        take the $facet round trip and unpaged ones know whether documents
+        were skipped.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): collection to query.
+            query (:obj:`dict`): query filter.
+            projection (:obj:`dict`, optional): result projection. Defaults to None.
+            skip (:obj:`int`, optional): number of documents to skip. Defaults to 0.
+            limit (:obj:`int`, optional): max number of documents, 0 for no limit. Defaults to 0.
+            sort (:obj:`list` of :obj:`tuple`, optional): e.g. [('kinlaw_id', 1)]. Defaults to None.
+            collation (:obj:`pymongo.collation.Collation`, optional): collation of the query. Defaults to None.
+            stages (:obj:`list` of :obj:`dict`, optional): pipeline applied to the matching documents
+            instead of sort/skip/limit/projection, e.g. to add $lookup stages. Defaults to None.
+            max_count (:obj:`int`, optional): stop counting at this number. Defaults to None.
+            approximate (:obj:`bool`, optional): for an empty query, take the count from collection
+            metadata (estimated_document_count) instead of counting. Defaults to False.
+            filters (:obj:`bool`, optional): whether stages may drop or add documents ($match, $unwind, ...);
+            False lets unpaged calls count the returned documents instead of querying. Defaults to True.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`): documents and count.
+        """
+        estimate = approximate and not query
+        kwargs = {}
+        if collation is not None:
+            kwargs['collation'] = collation
+        if self.max_time_ms is not None:
+            kwargs['maxTimeMS'] = self.max_time_ms
+        if limit == 0:
+            return self._find_all_with_count(collection, query, projection, skip, sort,
+                                             stages, max_count, estimate, filters, kwargs)
+        pipeline = self._facet_pipeline(query, projection=projection, skip=skip, limit=limit,
+                                        sort=sort, stages=stages, max_count=max_count,
+                                        count=not estimate)
+        docs, count = self._facet_result(next(collection.aggregate(pipeline, **kwargs), None))
+        if estimate:
+            count = collection.estimated_document_count()
+        return docs, count
+
+    @staticmethod
+    def _count_pipeline(query, max_count=None):
+        """Pipeline returning one document {'n': ...}, no document if nothing matches.
+        """
+        stages = [{'$match': query}, {'$count': 'n'}]
+        if max_count is not None:
+            stages.insert(1, {'$limit': max_count})
+        return stages
+
+    @staticmethod
+    def _count_result(doc):
+        return 0 if doc is None else doc['n']
+
+    @staticmethod
+    def _unpaged_count(docs, skip, stages, max_count, estimate, filters):
+        """Count of an unpaged find_with_count that needs no query,
+        None if it has to be counted on the server.
+        """
+        if estimate or skip or (stages is not None and filters):
+            return None
+        return len(docs) if max_count is None else min(len(docs), max_count)
+
+    def _find_all_with_count(self, collection, query, projection, skip, sort,
+                             stages, max_count, estimate, filters, kwargs):
+        """find_with_count without limit: documents and count in separate queries.
+        """
+        if stages is None:
+            find_kwargs = {'collation': kwargs['collation']} if 'collation' in kwargs else {}
+            if sort:
+                find_kwargs['sort'] = sort
+            if self.max_time_ms is not None:
+                find_kwargs['max_time_ms'] = self.max_time_ms
+            docs = list(collection.find(filter=query, projection=projection, skip=skip, **find_kwargs))
+        else:
+            docs = list(collection.aggregate([{'$match': query}] + stages, **kwargs))
+        count = self._unpaged_count(docs, skip, stages, max_count, estimate, filters)
+        if count is None:
+            if estimate:
+                count = collection.estimated_document_count()
+            else:
+                pipeline = self._count_pipeline(query, max_count)
+                count = self._count_result(next(collection.aggregate(pipeline, **kwargs), None))
+        return docs, count
+
+    @staticmethod
+    def _keep_key(projection, key):
+        """Make sure projection returns the pagination key.
+
+        Return:
+            (:obj:`tuple` of :obj:`dict` and :obj:`bool`): projection and
+            whether the key has to be removed from the results.
+        """
+        if not projection:
+            return projection, False
+        projection = dict(projection)
+        if projection.get(key, 1) in (0, False):
+            del projection[key]
+            return projection or None, True
+        inclusion = any(v not in (0, False) for k, v in projection.items() if k != '_id')
+        if inclusion and key not in projection:
+            projection[key] = 1
+            return projection, True
+        return projection, False
+
+    def find_page(self, collection, query, key='_id', size=10, page_token=None,
+                  projection=None, collation=None, hint=None, stages=None):
+        """Get one page of documents sorted by key using keyset (seek) pagination:
+        the page starts after the last key of the previous page, so deep pages
+        cost the same as the first one, unlike skip.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): collection to query.
+            query (:obj:`dict`): query filter.
+            key (:obj:`str`, optional): unique, indexed top level field to page on. Defaults to '_id'.
+            size (:obj:`int`, optional): number of documents per page. Defaults to 10.
+            page_token (:obj:`str`, optional): token returned with the previous page, None for the first page.
+            projection (:obj:`dict`, optional): result projection. Defaults to None.
+            collation (:obj:`pymongo.collation.Collation`, optional): collation of the query. Defaults to None.
+            hint (:obj:`list`, optional): index to use. Defaults to None.
+            stages (:obj:`list` of :obj:`dict`, optional): aggregation stages applied to the
+            page before projection, e.g. $lookup. Defaults to None.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`str`): documents and token of the next page,
+            None if this is the last page.
+
+        Raises:
+            ValueError: page_token is malformed or was issued for another key.
+        """
+        if page_token is not None:
+            last = pagination.decode_token(page_token, key)
+            query = {'$and': [query, {key: {'$gt': last}}]}
+        projection, strip = self._keep_key(projection, key)
+        kwargs = {}
+        if collation is not None:
+            kwargs['collation'] = collation
+        if hint is not None:
+            kwargs['hint'] = hint
+        if stages is None:
+            if self.max_time_ms is not None:
+                kwargs['max_time_ms'] = self.max_time_ms
+            docs = list(collection.find(filter=query, projection=projection, sort=[(key, pymongo.ASCENDING)],
+                                        limit=size + 1, **kwargs))
+        else:
+            if self.max_time_ms is not None:
+                kwargs['maxTimeMS'] = self.max_time_ms
+            pipeline = [{'$match': query}, {'$sort': {key: pymongo.ASCENDING}}, {'$limit': size + 1}] + stages
+            if projection:
+                pipeline.append({'$project': projection})
+            docs = list(collection.aggregate(pipeline, **kwargs))
+        next_token = None
+        if len(docs) > size:
+            docs = docs[:size]
+            next_token = pagination.encode_token(key, docs[-1][key])
+        if strip:
+            for doc in docs:
+                doc.pop(key, None)
+        return docs, next_token
+
+    def iter_find(self, collection, query, projection=None, batch_size=None,
+                  limit=0, collation=None, sort=None):
+        """Yield documents as the cursor receives them from the server, instead of
+        loading the whole result set. The cursor is closed as soon as the caller
+        stops iterating (break, generator close or garbage collection).
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): collection to query.
+            query (:obj:`dict`): query filter.
+            projection (:obj:`dict`, optional): result projection. Defaults to None.
+            batch_size (:obj:`int`, optional): number of documents per server round trip. Defaults to None (server default).
+            limit (:obj:`int`, optional): stop after this many documents, 0 for all. Defaults to 0.
+            collation (:obj:`pymongo.collation.Collation`, optional): collation of the query. Defaults to None.
+            sort (:obj:`list`, optional): list of (key, direction) pairs. Defaults to None.
+
+        Return:
+            (:obj:`Generator` of :obj:`dict`): documents that match the query.
+        """
+        kwargs = {}
+        if collation is not None:
+            kwargs['collation'] = collation
+        if sort is not None:
+            kwargs['sort'] = sort
+        if batch_size:
+            kwargs['batch_size'] = batch_size
+        if self.max_time_ms is not None:
+            kwargs['max_time_ms'] = self.max_time_ms
+        cursor = collection.find(filter=query, projection=projection, limit=limit, **kwargs)
+        try:
+            for doc in cursor:
+                yield doc
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def map_chunks(func, items, chunk_size=500, max_workers=4):
+        """Call func on consecutive chunks of items on a thread pool, e.g. one
+        $in query per chunk of ids, and yield the results in the order of the chunks.
+
+        At most 2 * max_workers chunks are submitted ahead of the one being
+        yielded, so results are streamed with bounded memory; chunks not started
+        when the caller stops iterating are cancelled. Each chunk runs in a copy
+        of the caller's context, so QueryMetrics tags its commands with the
+        caller's method.
+
+        Args:
+            func (:obj:`callable`): function of a list of items.
+            items (:obj:`Iterable`): items to split into chunks.
+            chunk_size (:obj:`int`, optional): items per chunk. Defaults to 500.
+            max_workers (:obj:`int`, optional): chunks processed concurrently, 1 to run
+            them in the calling thread. Defaults to 4.
+
+        Return:
+            (:obj:`Generator` of :obj:`tuple`): (chunk, func(chunk)) pairs.
+        """
+        items = iter(items)
+        chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+        if max_workers <= 1:
+            for chunk in chunks:
+                yield chunk, func(chunk)
+            return
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            try:
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(contextvars.copy_context().run, func, chunk)))
+                    if len(pending) > 2 * max_workers:
+                        chunk, future = pending.popleft()
+                        yield chunk, future.result()
+                while pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
     def list_all_collections(self):
         '''List all non-system collections within database
         '''
@@ -1,10 +1,116 @@
+from collections import deque
+import asyncio
+import itertools
 import motor.motor_asyncio
+from datanator_query_python.util import client_registry
+from datanator_query_python.util.mongo_util import MongoUtil
 
 
 class MotorUtil:
 
     def __init__(self, MongoDB=None, replicaSet=None, db='test',
                  verbose=False, max_entries=float('inf'), username=None, 
-                 password=None, authSource='admin', readPreference='nearest'):
+                 password=None, authSource='admin', readPreference='nearest', options=None):
         string = "mongodb+srv://{}:{}@{}/{}?authSource={}&retryWrites=true&w=majority&readPreference={}".format(username, password, MongoDB, db, authSource, readPreference)
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(string)
\ No newline at end of file
+        self.options = options
+        self.max_time_ms = None if options is None else options.max_time_ms
+        self.client = client_registry.get_client(string, client_class=motor.motor_asyncio.AsyncIOMotorClient,
+                                                 replicaSet=replicaSet, options=options)
+        self.db_obj = self.client.get_database(db)
+
+    async def find_with_count(self, collection, query, projection=None, skip=0, limit=0,
+                              sort=None, collation=None, stages=None, max_count=None,
+                              approximate=False, filters=True):
+        """Asyncio counterpart of :meth:`MongoUtil.find_with_count`.
+
+        Return:
+            (:obj:`tuple` of :obj:`list` and :obj:`int`): documents and count.
+        """
+        estimate = approximate and not query
+        kwargs = {}
+        if collation is not None:
+            kwargs['collation'] = collation
+        if self.max_time_ms is not None:
+            kwargs['maxTimeMS'] = self.max_time_ms
+        if limit == 0:
+            return await self._find_all_with_count(collection, query, projection, skip, sort,
+                                                   stages, max_count, estimate, filters, kwargs)
+        pipeline = MongoUtil._facet_pipeline(query, projection=projection, skip=skip, limit=limit,
+                                             sort=sort, stages=stages, max_count=max_count,
+                                             count=not estimate)
+        result = await collection.aggregate(pipeline, **kwargs).to_list(1)
+        docs, count = MongoUtil._facet_result(result[0] if result else None)
+        if estimate:
+            count = await collection.estimated_document_count()
+        return docs, count
+
+    async def _find_all_with_count(self, collection, query, projection, skip, sort,
+                                   stages, max_count, estimate, filters, kwargs):
+        """Asyncio counterpart of :meth:`MongoUtil._find_all_with_count`.
+        """
+        if stages is None:
+            find_kwargs = {'collation': kwargs['collation']} if 'collation' in kwargs else {}
+            if sort:
+                find_kwargs['sort'] = sort
+            if self.max_time_ms is not None:
+                find_kwargs['max_time_ms'] = self.max_time_ms
+            cursor = collection.find(filter=query, projection=projection, skip=skip, **find_kwargs)
+        else:
+            cursor = collection.aggregate([{'$match': query}] + stages, **kwargs)
+        docs = await cursor.to_list(None)
+        count = MongoUtil._unpaged_count(docs, skip, stages, max_count, estimate, filters)
+        if count is None:
+            if estimate:
+                count = await collection.estimated_document_count()
+            else:
+                result = await collection.aggregate(MongoUtil._count_pipeline(query, max_count),
+                                                    **kwargs).to_list(1)
+                count = MongoUtil._count_result(result[0] if result else None)
+        return docs, count
+
+    async def iter_find(self, collection, query, projection=None, batch_size=None,
+                        limit=0, collation=None, sort=None):
+        """Asyncio counterpart of :meth:`MongoUtil.iter_find`.
+
+        Return:
+            (:obj:`AsyncGenerator` of :obj:`dict`): documents that match the query.
+        """
+        kwargs = {}
+        if collation is not None:
+            kwargs['collation'] = collation
+        if sort is not None:
+            kwargs['sort'] = sort
+        if batch_size:
+            kwargs['batch_size'] = batch_size
+        if self.max_time_ms is not None:
+            kwargs['max_time_ms'] = self.max_time_ms
+        cursor = collection.find(filter=query, projection=projection, limit=limit, **kwargs)
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
+
+    @staticmethod
+    async def map_chunks(func, items, chunk_size=500, max_workers=4):
+        """Asyncio counterpart of :meth:`MongoUtil.map_chunks`; func is a coroutine
+        function and max_workers the number of chunks awaited concurrently.
+
+        Return:
+            (:obj:`AsyncGenerator` of :obj:`tuple`): (chunk, await func(chunk)) pairs.
+        """
+        items = iter(items)
+        chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append((chunk, asyncio.ensure_future(func(chunk))))
+                if len(pending) >= max(max_workers, 1):
+                    chunk, task = pending.popleft()
+                    yield chunk, await task
+            while pending:
+                chunk, task = pending.popleft()
+                yield chunk, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
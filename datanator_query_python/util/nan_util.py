@@ -0,0 +1,39 @@
+"""Replace NaN (and infinite) values of decoded documents with None, so the
+documents serialize to valid JSON.
+
+This does what json.loads(json.dumps(doc, ignore_nan=True)) did, in a single
+pass over the document and without copying it: floats are the only BSON type
+that can hold NaN, and they decode to python floats, so only dicts and lists
+need to be walked.
+"""
+import math
+
+
+def replace_nan(doc):
+    """Replace non-finite floats in doc with None, in place.
+
+    Args:
+        doc (:obj:`Obj`): decoded document, list or scalar.
+
+    Return:
+        (:obj:`Obj`): doc, or None if doc itself is a non-finite float.
+    """
+    if isinstance(doc, float):
+        return doc if math.isfinite(doc) else None
+    isfinite = math.isfinite
+    stack = [doc]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, float):
+                if not isfinite(value):
+                    node[key] = None
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return doc
@@ -0,0 +1,47 @@
+"""Continuation tokens for keyset (seek) pagination.
+
+A token records the sort key and its value in the last document of a page,
+so the next page is found with an index seek (``{key: {'$gt': value}}``)
+instead of skipping over all preceding documents.
+"""
+import base64
+import binascii
+import bson
+from bson.errors import BSONError
+
+
+def encode_token(key, value):
+    """Make an opaque continuation token.
+
+    Args:
+        key (:obj:`str`): name of the sort key, e.g. '_id' or 'kinlaw_id'.
+        value (:obj:`Obj`): value of the key in the last document returned.
+
+    Return:
+        (:obj:`str`): url safe token.
+    """
+    raw = bson.BSON.encode({'k': key, 'v': value})
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_token(token, key):
+    """Read the last key value out of a continuation token.
+
+    Args:
+        token (:obj:`str`): token returned with the previous page.
+        key (:obj:`str`): sort key the token is expected to be for.
+
+    Return:
+        (:obj:`Obj`): value of the key in the last document of the previous page.
+
+    Raises:
+        ValueError: token is malformed or was issued for another key.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        doc = bson.BSON(raw).decode()
+    except (TypeError, ValueError, binascii.Error, BSONError):
+        raise ValueError('Invalid page token.')
+    if doc.get('k') != key or 'v' not in doc:
+        raise ValueError('Page token was not issued for key {}.'.format(key))
+    return doc['v']
@@ -0,0 +1,113 @@
+"""Connection pool statistics collected from pymongo's pool events
+(https://pymongo.readthedocs.io/en/stable/api/pymongo/monitoring.html).
+"""
+from pymongo import monitoring
+import threading
+import time
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener that counts connection creations, checkouts
+    and the time spent waiting for a free connection, per server address.
+
+    Pass an instance through :class:`ConnectionOptions.pool_metrics` so that it
+    is registered with the client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self._servers = {}
+
+    def _server(self, address):
+        stats = self._servers.get(address)
+        if stats is None:
+            stats = {'pools_created': 0,
+                     'pools_cleared': 0,
+                     'connections_created': 0,
+                     'connections_closed': 0,
+                     'connections_open': 0,
+                     'checked_out': 0,
+                     'checkouts': 0,
+                     'checkout_failures': 0,
+                     'wait_queue_time_total': 0.0,
+                     'wait_queue_time_max': 0.0}
+            self._servers[address] = stats
+        return stats
+
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event.address)['pools_created'] += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event.address)['pools_cleared'] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats['connections_created'] += 1
+            stats['connections_open'] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats['connections_closed'] += 1
+            stats['connections_open'] -= 1
+
+    def connection_check_out_started(self, event):
+        # checkout events are published on the thread that waits for the connection
+        self._started[(event.address, threading.get_ident())] = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._started.pop((event.address, threading.get_ident()), None)
+        with self._lock:
+            self._server(event.address)['checkout_failures'] += 1
+
+    def connection_checked_out(self, event):
+        start = self._started.pop((event.address, threading.get_ident()), None)
+        with self._lock:
+            stats = self._server(event.address)
+            stats['checked_out'] += 1
+            stats['checkouts'] += 1
+            if start is not None:
+                waited = time.perf_counter() - start
+                stats['wait_queue_time_total'] += waited
+                stats['wait_queue_time_max'] = max(stats['wait_queue_time_max'], waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._server(event.address)['checked_out'] -= 1
+
+    def snapshot(self):
+        """Current statistics.
+
+        Return:
+            (:obj:`dict`): {'servers': {'host:port': {...}}, 'total': {...}},
+            wait queue times are in seconds.
+        """
+        with self._lock:
+            servers = {'{}:{}'.format(*address): dict(stats)
+                       for address, stats in self._servers.items()}
+        total = {}
+        for stats in servers.values():
+            for key, val in stats.items():
+                if key == 'wait_queue_time_max':
+                    total[key] = max(total.get(key, 0.0), val)
+                else:
+                    total[key] = total.get(key, 0) + val
+        if total.get('checkouts'):
+            total['wait_queue_time_mean'] = total['wait_queue_time_total'] / total['checkouts']
+        return {'servers': servers, 'total': total}
+
+    def reset(self):
+        """Clear all counters.
+        """
+        with self._lock:
+            self._servers = {}
@@ -0,0 +1,259 @@
+"""Opt-in result cache for query methods on reference collections
+(taxon_tree, kegg_orthology, sabio_compound, ...), which only change
+when the ETL runs.
+
+A query object uses a cache when its ``cache`` attribute is set, e.g.
+``QueryTaxonTree(..., cache=query_cache.LRUCache(max_entries=10000))``;
+methods decorated with :func:`cached` then serve repeated calls from it.
+
+Each decorated method's entries expire after the TTL of the collection it
+reads (:data:`TTLS`): a week for the copies of external releases (NCBI
+taxonomy, KEGG), which are reloaded with new releases, and a day for the
+collections the datanator ETL rebuilds (uniprot, sabio_compound,
+metabolites_meta). :meth:`CacheBackend.invalidate` still drops entries
+right after a reload.
+"""
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pymongo.cursor import Cursor
+from pymongo.command_cursor import CommandCursor
+
+
+DAY = 24 * 3600
+# collection -> seconds its cached results stay valid
+TTLS = {'taxon_tree': 7 * DAY,
+        'kegg_orthology': 7 * DAY,
+        'kegg_organism_code': 7 * DAY,
+        'uniprot': DAY,
+        'sabio_compound': DAY,
+        'metabolites_meta': DAY}
+
+
+class CacheBackend:
+    """Interface of cache storage. Values are the pickled results,
+    so a backend shared between processes only has to store bytes.
+    """
+
+    def get(self, key):
+        """Look up a key.
+
+        Args:
+            key (:obj:`tuple`): (method name, collection, normalized arguments).
+
+        Return:
+            (:obj:`bytes`): stored value, None if missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None, tags=()):
+        """Store a value.
+
+        Args:
+            key (:obj:`tuple`): (method name, collection, normalized arguments).
+            value (:obj:`bytes`): pickled result.
+            ttl (:obj:`float`, optional): seconds until the entry expires, None for never.
+            tags (:obj:`tuple` of :obj:`str`): collection names the entry is invalidated by.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, collection):
+        """Drop all entries read from a collection.
+
+        Args:
+            collection (:obj:`str`): collection name, e.g. 'taxon_tree' or 'datanator-test.taxon_tree'.
+
+        Return:
+            (:obj:`int`): number of entries dropped.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop all entries.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Cache statistics.
+
+        Return:
+            (:obj:`dict`)
+        """
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """In-process least recently used cache bounded by number of entries and bytes.
+
+    Args:
+        max_entries (:obj:`int`, optional): max number of entries. Defaults to 10000.
+        max_bytes (:obj:`int`, optional): max total size of stored values. Defaults to 64 MiB.
+        default_ttl (:obj:`float`, optional): ttl of entries stored without one. Defaults to None (never expire).
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, default_ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires, tags)
+        self._tags = {}  # tag -> set of keys
+        self._bytes = 0
+        self._methods = {}
+        self._evictions = 0
+        self._expirations = 0
+
+    def _count(self, key, outcome):
+        counts = self._methods.get(key[0])
+        if counts is None:
+            counts = self._methods[key[0]] = {'hits': 0, 'misses': 0}
+        counts[outcome] += 1
+
+    def _drop(self, key):
+        value, _, tags = self._entries.pop(key)
+        self._bytes -= len(value)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._drop(key)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._count(key, 'misses')
+                return None
+            self._entries.move_to_end(key)
+            self._count(key, 'hits')
+            return entry[0]
+
+    def set(self, key, value, ttl=None, tags=()):
+        if ttl is None:
+            ttl = self.default_ttl
+        if len(value) > self.max_bytes:
+            return
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, expires, tuple(tags))
+            self._bytes += len(value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, collection):
+        with self._lock:
+            keys = list(self._tags.get(collection, ()))
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            methods = {name: dict(counts) for name, counts in self._methods.items()}
+            return {'hits': sum(c['hits'] for c in methods.values()),
+                    'misses': sum(c['misses'] for c in methods.values()),
+                    'entries': len(self._entries),
+                    'bytes': self._bytes,
+                    'evictions': self._evictions,
+                    'expirations': self._expirations,
+                    'methods': methods}
+
+
+def normalize(value, casefold=False):
+    """Turn an argument into a hashable key component. Lists and tuples
+    compare equal, dicts and sets ignore order.
+
+    Args:
+        value (:obj:`Obj`): argument.
+        casefold (:obj:`bool`, optional): fold case of strings, for methods
+        that query with a case insensitive collation. Defaults to False.
+
+    Return:
+        (:obj:`Obj`)
+    """
+    if isinstance(value, str):
+        return value.casefold() if casefold else value
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v, casefold) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize(v, casefold)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(normalize(v, casefold) for v in value)
+    return value
+
+
+def _materialize(result):
+    if isinstance(result, (Cursor, CommandCursor)):
+        return list(result)
+    if isinstance(result, tuple):
+        return tuple(_materialize(r) for r in result)
+    return result
+
+
+def entry_key(name, collection, args=(), kwargs=None, casefold=False):
+    """Key :func:`cached` stores a call under, so batch methods can
+    read and fill the entries of the single-item method they batch.
+
+    Args:
+        name (:obj:`str`): qualified method name, e.g. 'QueryProtein.get_kegg_orthology'.
+        collection (:obj:`pymongo.collection.Collection`): collection the method reads.
+        args (:obj:`tuple`, optional): positional arguments. Defaults to ().
+        kwargs (:obj:`dict`, optional): keyword arguments. Defaults to None.
+        casefold (:obj:`bool`, optional): treat string arguments case insensitively. Defaults to False.
+
+    Return:
+        (:obj:`tuple`)
+    """
+    return (name, collection.full_name, normalize(tuple(args), casefold), normalize(kwargs or {}, casefold))
+
+
+def cached(collection='collection', ttl=None, casefold=False):
+    """Decorator serving a query method from ``self.cache`` when one is set.
+
+    Cursors in the result are read into lists before they are stored,
+    so cached calls return lists where uncached ones return cursors.
+    Every call returns a fresh copy of the stored result.
+
+    Args:
+        collection (:obj:`str`, optional): name of the attribute holding the pymongo
+        collection the method reads; entries are invalidated by its name. Defaults to 'collection'.
+        ttl (:obj:`float`, optional): seconds a result stays valid. Defaults to the backend's default.
+        casefold (:obj:`bool`, optional): treat string arguments case insensitively. Defaults to False.
+    """
+    def decorator(method):
+        name = method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+            col = getattr(self, collection)
+            key = entry_key(name, col, args, kwargs, casefold)
+            value = cache.get(key)
+            if value is not None:
+                return pickle.loads(value)
+            result = _materialize(method(self, *args, **kwargs))
+            cache.set(key, pickle.dumps(result, pickle.HIGHEST_PROTOCOL), ttl=ttl,
+                      tags=(col.name, col.full_name))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,320 @@
+"""Per query method statistics collected from pymongo's command events
+(https://pymongo.readthedocs.io/en/stable/api/pymongo/monitoring.html).
+
+:func:`instrument` wraps the public methods of a query object so that every
+command they send is tagged with the method that was called, e.g.
+'QueryProtein.get_all_kegg'. Only the outermost instrumented call is tagged,
+so commands sent by nested managers (taxon_manager, kegg_manager, ...)
+count towards the method the caller actually invoked.
+
+Commands are matched to calls through a context variable, which works for
+pymongo, including the worker threads of MongoUtil.map_chunks (each chunk
+runs in a copy of the caller's context, so the *_bulk methods are tagged);
+motor runs commands on executor threads without the caller's context, so
+its commands are counted as untracked, as are getMores of cursors a method
+returns unconsumed (generators are followed until they are exhausted).
+"""
+from pymongo import monitoring
+import bson
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+UNTRACKED = '<untracked>'
+
+
+class _Call:
+
+    __slots__ = ('method', 'elapsed', 'round_trips', 'docs', 'bytes', 'command_time', 'failed')
+
+    def __init__(self, method):
+        self.method = method
+        self.elapsed = 0.0
+        self.round_trips = 0
+        self.docs = 0
+        self.bytes = 0
+        self.command_time = 0.0
+        self.failed = False
+
+
+class _Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+        self.max = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        """Prometheus style cumulative bucket counts, including +Inf.
+
+        Return:
+            (:obj:`list` of :obj:`tuple`): (upper bound, count) pairs.
+        """
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self):
+        return {'buckets': {str(bound): count for bound, count in self.cumulative()},
+                'sum': self.sum, 'count': self.count, 'max': self.max}
+
+
+class _MethodStats:
+
+    def __init__(self):
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.round_trips = _Histogram(ROUND_TRIP_BUCKETS)
+        self.calls = 0
+        self.failed = 0
+        self.docs = 0
+        self.bytes = 0
+        self.command_time = 0.0
+
+    def to_dict(self):
+        return {'calls': self.calls,
+                'failed': self.failed,
+                'docs_returned': self.docs,
+                'bytes_received': self.bytes,
+                'command_seconds': self.command_time,
+                'latency_seconds': self.latency.to_dict(),
+                'round_trips': self.round_trips.to_dict()}
+
+
+class QueryMetrics(monitoring.CommandListener):
+    """Command listener that aggregates latency, documents returned, bytes
+    received and round trips per instrumented query method call.
+
+    Register it with the client through :class:`ConnectionOptions.query_metrics`
+    (or globally with pymongo.monitoring.register before the client is created),
+    then pass query objects through :func:`instrument`.
+
+    Args:
+        measure_bytes (:obj:`bool`, optional): measure reply sizes by re-encoding the
+        replies, which costs some CPU per command. Defaults to True.
+    """
+
+    def __init__(self, measure_bytes=True):
+        self.measure_bytes = measure_bytes
+        self._lock = threading.Lock()
+        self._current = contextvars.ContextVar('query_metrics_call', default=None)
+        self._methods = {}
+
+    @staticmethod
+    def _docs_in(reply):
+        cursor = reply.get('cursor')
+        if isinstance(cursor, dict):
+            return len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+        if isinstance(reply.get('values'), list):
+            return len(reply['values'])
+        return 0
+
+    def _stats(self, method):
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = _MethodStats()
+            self._methods[method] = stats
+        return stats
+
+    def _command(self, event, reply):
+        call = self._current.get()
+        seconds = event.duration_micros / 1e6
+        docs = self._docs_in(reply)
+        size = len(bson.BSON.encode(reply)) if self.measure_bytes else 0
+        with self._lock:
+            if call is not None:
+                # worker threads of one call may report concurrently
+                call.round_trips += 1
+                call.docs += docs
+                call.bytes += size
+                call.command_time += seconds
+                return
+            stats = self._stats(UNTRACKED)
+            stats.calls += 1
+            stats.docs += docs
+            stats.bytes += size
+            stats.command_time += seconds
+            stats.latency.observe(seconds)
+            stats.round_trips.observe(1)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._command(event, event.reply)
+
+    def failed(self, event):
+        self._command(event, {})
+
+    def _finish(self, call):
+        with self._lock:
+            stats = self._stats(call.method)
+            stats.calls += 1
+            stats.failed += int(call.failed)
+            stats.docs += call.docs
+            stats.bytes += call.bytes
+            stats.command_time += call.command_time
+            stats.latency.observe(call.elapsed)
+            stats.round_trips.observe(call.round_trips)
+
+    def _run(self, call, func, *args, **kwargs):
+        """Run func with call as the current call of this context.
+        """
+        token = self._current.set(call)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            if not isinstance(e, (StopIteration, GeneratorExit)):
+                call.failed = True
+            raise
+        finally:
+            call.elapsed += time.perf_counter() - start
+            self._current.reset(token)
+
+    def _iterate(self, call, gen):
+        """Tag the commands sent while the caller pulls items from gen;
+        the call ends when gen is exhausted or closed.
+        """
+        try:
+            while True:
+                try:
+                    item = self._run(call, next, gen)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            self._run(call, gen.close)
+            self._finish(call)
+
+    def call(self, method, func, *args, **kwargs):
+        """Call func, tagging the commands it sends with method.
+
+        Args:
+            method (:obj:`str`): name to tag with, e.g. 'QueryProtein.get_meta_by_id'.
+            func (:obj:`callable`): function to call.
+
+        Return:
+            (:obj:`Obj`): what func returns; generators are tracked until they are exhausted or closed.
+        """
+        if self._current.get() is not None:
+            return func(*args, **kwargs)
+        call = _Call(method)
+        try:
+            result = self._run(call, func, *args, **kwargs)
+        except BaseException:
+            self._finish(call)
+            raise
+        if inspect.isgenerator(result):
+            return self._iterate(call, result)
+        self._finish(call)
+        return result
+
+    def snapshot(self):
+        """Current statistics.
+
+        Return:
+            (:obj:`dict`): method name to statistics; latencies are in seconds.
+        """
+        with self._lock:
+            return {method: stats.to_dict() for method, stats in self._methods.items()}
+
+    def reset(self):
+        """Clear all statistics.
+        """
+        with self._lock:
+            self._methods = {}
+
+    def to_json(self):
+        """Statistics as JSON.
+
+        Return:
+            (:obj:`str`)
+        """
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix='datanator_query'):
+        """Statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix (:obj:`str`, optional): metric name prefix. Defaults to 'datanator_query'.
+
+        Return:
+            (:obj:`str`)
+        """
+        with self._lock:
+            methods = sorted(self._methods.items())
+            lines = []
+
+            def histogram(name, help_text, attr):
+                lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+                lines.append('# TYPE {}_{} histogram'.format(prefix, name))
+                for method, stats in methods:
+                    hist = getattr(stats, attr)
+                    for bound, count in hist.cumulative():
+                        lines.append('{}_{}_bucket{{method="{}",le="{}"}} {}'.format(prefix, name, method, bound, count))
+                    lines.append('{}_{}_sum{{method="{}"}} {}'.format(prefix, name, method, hist.sum))
+                    lines.append('{}_{}_count{{method="{}"}} {}'.format(prefix, name, method, hist.count))
+
+            def counter(name, help_text, attr):
+                lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+                lines.append('# TYPE {}_{} counter'.format(prefix, name))
+                for method, stats in methods:
+                    lines.append('{}_{}{{method="{}"}} {}'.format(prefix, name, method, getattr(stats, attr)))
+
+            histogram('call_seconds', 'Latency of query method calls.', 'latency')
+            histogram('round_trips', 'Database round trips per query method call.', 'round_trips')
+            counter('calls_failed_total', 'Query method calls that raised.', 'failed')
+            counter('docs_returned_total', 'Documents returned to query methods.', 'docs')
+            counter('bytes_received_total', 'Reply bytes received by query methods.', 'bytes')
+            counter('command_seconds_total', 'Time spent in database commands.', 'command_time')
+        return '\n'.join(lines) + '\n'
+
+
+def instrument(obj, metrics, methods=None):
+    """Tag the commands sent by obj's public methods with 'ClassName.method'.
+    The methods are wrapped on the instance only; the class is untouched.
+
+    Args:
+        obj (:obj:`Obj`): query object, e.g. QueryProtein(...).
+        metrics (:obj:`QueryMetrics`): listener registered with obj's client.
+        methods (:obj:`list` of :obj:`str`, optional): names of the methods to wrap.
+        Defaults to None (every public method of the class).
+
+    Return:
+        (:obj:`Obj`): obj
+    """
+    cls = type(obj)
+    if methods is None:
+        methods = [name for name, attr in inspect.getmembers(cls)
+                   if not name.startswith('_') and inspect.isfunction(attr)]
+    for name in methods:
+        func = getattr(obj, name)
+        tag = '{}.{}'.format(cls.__name__, name)
+
+        def wrapper(*args, _func=func, _tag=tag, **kwargs):
+            return metrics.call(_tag, _func, *args, **kwargs)
+
+        setattr(obj, name, functools.wraps(func)(wrapper))
+    return obj
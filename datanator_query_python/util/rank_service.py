@@ -0,0 +1,198 @@
+"""Ranks of taxon_tree nodes, resolved in batches and kept in memory.
+
+Ranks only change when the taxon_tree ETL runs, so the tax_id -> rank map
+of a collection is held for the life of the process: ids missing from it
+are resolved with a single $in query and remembered, and :meth:`RankService.preload`
+reads the whole map at startup (one collection scan, about 100 bytes per
+node, so 260MB for the 2.6M nodes of the full NCBI taxonomy). After an ETL
+run, :meth:`RankService.clear` drops the map.
+
+Ranks are labelled the way :meth:`QueryTaxonTree.get_rank` always did:
+canonical ranks (see :data:`CANON_RANKS`) are kept, the root of cellular
+organisms is 'cellular organisms' and every other node is '+'.
+"""
+import sys
+import threading
+from datanator_query_python.util.taxonomy_index import CANON_RANKS, CELLULAR_ORGANISMS
+
+
+NO_RANK = '+'
+_CANON = frozenset(CANON_RANKS)
+_MISSING = object()
+
+
+def label(tax_id, rank):
+    """Label of a node in a canonical lineage.
+
+    Args:
+        tax_id (:obj:`int`): tax id of the node.
+        rank (:obj:`str`): rank of the node, None if unknown.
+
+    Return:
+        (:obj:`str`): the rank if it is canonical, 'cellular organisms' or '+'.
+    """
+    if rank in _CANON:
+        return rank
+    if tax_id == CELLULAR_ORGANISMS:
+        return 'cellular organisms'
+    return NO_RANK
+
+
+class RankService:
+    """Process-wide cache of taxon ranks, one map per taxon_tree collection.
+
+    Args:
+        batch_size (:obj:`int`, optional): most ids resolved per query. Defaults to 50000.
+    """
+
+    def __init__(self, batch_size=50000):
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._ranks = {}  # collection full name -> {tax_id: rank}
+        self._complete = set()  # collections whose whole map was preloaded
+
+    def _map(self, collection):
+        ranks = self._ranks.get(collection.full_name)
+        if ranks is None:
+            with self._lock:
+                ranks = self._ranks.setdefault(collection.full_name, {})
+        return ranks
+
+    @staticmethod
+    def _intern(rank):
+        # a few dozen distinct ranks shared by millions of entries
+        return None if rank is None else sys.intern(rank)
+
+    def remember(self, collection, docs):
+        """Add the ranks of taxon_tree documents to the map.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+            docs (:obj:`iter` of :obj:`dict`): documents with tax_id and rank.
+        """
+        ranks = self._map(collection)
+        for doc in docs:
+            ranks[doc['tax_id']] = self._intern(doc.get('rank'))
+
+    def preload(self, collection):
+        """Read the ranks of all nodes of a collection.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+
+        Return:
+            (:obj:`int`): number of nodes.
+        """
+        ranks = {}
+        docs = collection.find(filter={}, projection={'_id': 0, 'tax_id': 1, 'rank': 1},
+                               batch_size=self.batch_size)
+        for doc in docs:
+            ranks[doc['tax_id']] = self._intern(doc.get('rank'))
+        with self._lock:
+            self._ranks[collection.full_name] = ranks
+            self._complete.add(collection.full_name)
+        return len(ranks)
+
+    def resolve(self, collection, ids):
+        """Ranks of taxon ids, querying only the ids not in the map yet.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+            ids (:obj:`list` of :obj:`int`): tax ids.
+
+        Return:
+            (:obj:`list` of :obj:`str`): rank of each id, None if the node has no rank or does not exist.
+        """
+        ranks = self._map(collection)
+        if collection.full_name not in self._complete:
+            missing = list({_id for _id in ids if _id not in ranks})
+            for i in range(0, len(missing), self.batch_size):
+                chunk = missing[i:i + self.batch_size]
+                self.remember(collection, collection.find(filter={'tax_id': {'$in': chunk}},
+                                                          projection={'_id': 0, 'tax_id': 1, 'rank': 1}))
+        return [ranks.get(_id) for _id in ids]
+
+    def labels(self, collection, ids):
+        """Canonical labels of taxon ids (see :func:`label`).
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+            ids (:obj:`list` of :obj:`int`): tax ids.
+
+        Return:
+            (:obj:`list` of :obj:`str`)
+        """
+        return [label(_id, rank) for _id, rank in zip(ids, self.resolve(collection, ids))]
+
+    def canonical_lineage(self, collection, anc_ids, anc_names=None):
+        """Canonically ranked nodes of a lineage, root of cellular organisms included.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+            anc_ids (:obj:`list` of :obj:`int`): tax ids of the lineage.
+            anc_names (:obj:`list` of :obj:`str`, optional): names of the lineage. Defaults to None.
+
+        Return:
+            (:obj:`tuple` of :obj:`list`): ids and names (None if anc_names is None) of the kept nodes.
+        """
+        keep = [l != NO_RANK for l in self.labels(collection, anc_ids)]
+        ids = [_id for _id, k in zip(anc_ids, keep) if k]
+        if anc_names is None:
+            return ids, None
+        return ids, [name for name, k in zip(anc_names, keep) if k]
+
+    def clear(self, collection=None):
+        """Forget the ranks of a collection, or of all collections.
+
+        Args:
+            collection (:obj:`pymongo.collection.Collection`, optional): taxon_tree collection. Defaults to None.
+        """
+        with self._lock:
+            if collection is None:
+                self._ranks.clear()
+                self._complete.clear()
+            else:
+                self._ranks.pop(collection.full_name, None)
+                self._complete.discard(collection.full_name)
+
+
+default = RankService()
+
+
+def preload(collection):
+    """Read all ranks of a collection into the process-wide :class:`RankService`.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+
+    Return:
+        (:obj:`int`): number of nodes.
+    """
+    return default.preload(collection)
+
+
+def labels(collection, ids):
+    """Canonical labels of taxon ids, from the process-wide :class:`RankService`.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+        ids (:obj:`list` of :obj:`int`): tax ids.
+
+    Return:
+        (:obj:`list` of :obj:`str`)
+    """
+    return default.labels(collection, ids)
+
+
+def canonical_lineage(collection, anc_ids, anc_names=None):
+    """Canonically ranked nodes of a lineage, from the process-wide :class:`RankService`.
+
+    Args:
+        collection (:obj:`pymongo.collection.Collection`): taxon_tree collection.
+        anc_ids (:obj:`list` of :obj:`int`): tax ids of the lineage.
+        anc_names (:obj:`list` of :obj:`str`, optional): names of the lineage. Defaults to None.
+
+    Return:
+        (:obj:`tuple` of :obj:`list`): ids and names of the kept nodes.
+    """
+    return default.canonical_lineage(collection, anc_ids, anc_names)
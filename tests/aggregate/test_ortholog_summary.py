@@ -0,0 +1,22 @@
+import unittest
+import datetime
+from datanator_query_python.aggregate import ortholog_summary
+
+
+class TestOrthologSummary(unittest.TestCase):
+
+    def test_summary_id(self):
+        self.assertEqual(ortholog_summary.summary_id('ko_number', 'K00001'),
+                         {'group_type': 'ko_number', 'group_id': 'K00001'})
+
+    def test_pipeline(self):
+        now = datetime.datetime(2020, 1, 1)
+        pipeline = ortholog_summary.OrthologSummary.pipeline('orthodb_id', 'ortholog_abundance_summary', now)
+        self.assertEqual(pipeline[0], {'$match': {'orthodb_id': {'$type': 'string'}}})
+        self.assertEqual(pipeline[1]['$project']['group_name'], '$orthodb_name')
+        self.assertEqual(pipeline[2]['$group']['_id'], {'group_type': 'orthodb_id', 'group_id': '$group_id'})
+        self.assertEqual(pipeline[3]['$addFields']['refreshed_at'], {'$literal': now})
+        self.assertEqual(pipeline[-1]['$merge']['into'], 'ortholog_abundance_summary')
+        self.assertEqual(pipeline[-1]['$merge']['on'], '_id')
+        pipeline = ortholog_summary.OrthologSummary.pipeline('ko_number', 'summary', now, group_ids={'K00001'})
+        self.assertEqual(pipeline[0], {'$match': {'ko_number': {'$in': ['K00001']}}})
@@ -0,0 +1,66 @@
+import unittest
+import mongomock
+from datanator_query_python.aggregate import taxon_intervals
+from datanator_query_python.util import client_registry
+
+
+class TestTaxonIntervals(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        #        131567
+        #       /      \
+        #      2        10
+        #     / \
+        #    3   4
+        cls.client = mongomock.MongoClient()
+        cls.previous = client_registry.set_override(cls.client)
+        db = cls.client['datanator-test']
+        db.taxon_tree.insert_many([{'tax_id': 131567, 'anc_id': []},
+                                   {'tax_id': 2, 'anc_id': [131567]},
+                                   {'tax_id': 3, 'anc_id': [131567, 2]},
+                                   {'tax_id': 4, 'anc_id': [131567, 2]},
+                                   {'tax_id': 10, 'anc_id': [131567]}])
+        db.uniprot.insert_many([{'uniprot_id': 'a', 'ncbi_taxonomy_id': 3},
+                                {'uniprot_id': 'b', 'ncbi_taxonomy_id': 10},
+                                {'uniprot_id': 'c', 'ncbi_taxonomy_id': 99}])
+        db.rna_halflife_new.insert_many([{'uniprot_id': 'a', 'halflives': [{'ncbi_taxonomy_id': 4, 'halflife': 1},
+                                                                           {'ncbi_taxonomy_id': 10, 'halflife': 2}]},
+                                         {'uniprot_id': 'b', 'halflives': [{'ncbi_taxonomy_id': 99}]}])
+        cls.src = taxon_intervals.TaxonIntervals(MongoDB='mock', db='datanator-test')
+        cls.result = cls.src.run(collections=['uniprot', 'rna_halflife_new'])
+        cls.db = db
+
+    @classmethod
+    def tearDownClass(cls):
+        client_registry.set_override(cls.previous)
+
+    def test_label_tree(self):
+        self.assertEqual(self.result['taxon_tree'], 5)
+        root = taxon_intervals.interval(self.db.taxon_tree, 131567)
+        self.assertEqual(root, (0, 4))
+        left, right = taxon_intervals.interval(self.db.taxon_tree, 2)
+        self.assertEqual(right - left, 2)
+        self.assertIsNone(taxon_intervals.interval(self.db.taxon_tree, 99))
+        self.assertEqual(self.src.labels()[2], left)
+
+    def test_denormalize(self):
+        self.assertEqual(self.result['uniprot'], 2)
+        labels = taxon_intervals.interval(self.db.taxon_tree, 2)
+        docs = self.db.uniprot.find(taxon_intervals.subtree_query(labels))
+        self.assertEqual([doc['uniprot_id'] for doc in docs], ['a'])
+        self.assertNotIn('taxon_left', self.db.uniprot.find_one({'uniprot_id': 'c'}))
+        docs = list(taxon_intervals.iter_subtree_docs(self.db.rna_halflife_new, labels, 'halflives',
+                                                      projection={'_id': 0}))
+        self.assertEqual(len(docs), 1)
+        self.assertEqual([h['halflife'] for h in docs[0]['halflives']], [1])
+
+    def test_subtree_query(self):
+        self.assertEqual(taxon_intervals.subtree_query((1, 3)), {'taxon_left': {'$gte': 1, '$lte': 3}})
+        self.assertEqual(taxon_intervals.subtree_query((1, 3), field='left', strict=True),
+                         {'left': {'$gt': 1, '$lte': 3}})
+        self.assertEqual(taxon_intervals.subtree_query((1, 3), array='halflives'),
+                         {'halflives': {'$elemMatch': {'taxon_left': {'$gte': 1, '$lte': 3}}}})
+        self.assertTrue(taxon_intervals.in_subtree((1, 3), 1))
+        self.assertFalse(taxon_intervals.in_subtree((1, 3), 1, strict=True))
+        self.assertFalse(taxon_intervals.in_subtree((1, 3), None))
@@ -0,0 +1,24 @@
+import unittest
+from datanator_query_python.benchmark import micro
+
+
+class TestMicro(unittest.TestCase):
+
+    def test_sanitize(self):
+        result = micro.sanitize(n_docs=5, n_abundances=50, repeat=1)
+        self.assertEqual(result['n_docs'], 5)
+        self.assertGreater(result['json_round_trip_ms'], 0)
+        self.assertGreater(result['replace_nan_ms'], 0)
+
+    def test_canon_distances(self):
+        result = micro.canon_distances(n_species=50, repeat=1)
+        self.assertEqual(result['n_species'], 50)
+        self.assertIn('speedup', result)
+
+    def test_canon_rank_distance(self):
+        result = micro.canon_rank_distance(n_lineages=3, repeat=1)
+        self.assertEqual(result['ancestors'], 32)
+        self.assertEqual(result['queries_per_lineage'], {'per_ancestor': 33, 'batched': 2, 'taxonomy_index': 0})
+
+    def test_run(self):
+        self.assertEqual(micro.run(only=[]), {})
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+from datanator_query_python.benchmark import runner
+from datanator_query_python.util import client_registry
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+@unittest.skipIf(mongomock is None, 'mongomock is not installed')
+class TestRunner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = runner.run(scale=1000, repeat=2,
+                                only=['QueryProtein.get_meta_by_id',
+                                      'QueryTaxonTree.get_canon_common_ancestor',
+                                      'QueryPax.get_file_by_ncbi_id'])
+
+    def test_report(self):
+        self.assertEqual(self.report['backend'], 'mongomock')
+        self.assertEqual(self.report['documents']['uniprot'], 1000)
+        self.assertEqual(set(self.report['results']), {'QueryProtein.get_meta_by_id',
+                                                       'QueryTaxonTree.get_canon_common_ancestor',
+                                                       'QueryPax.get_file_by_ncbi_id'})
+        for result in self.report['results'].values():
+            self.assertEqual(result['calls'], 2)
+            self.assertLessEqual(result['min_ms'], result['max_ms'])
+        self.assertIsNone(client_registry.set_override(None))
+
+    def test_dump_compare(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            runner.dump(self.report, path)
+            with open(path) as f:
+                base = json.load(f)
+        self.assertEqual(base, self.report)
+        ratios = runner.compare(base, self.report)
+        self.assertEqual(set(ratios.values()), {1.0})
+
+    def test_time_case(self):
+        def fail(i):
+            raise ValueError('unsupported')
+        self.assertEqual(runner.time_case(fail), {'error': 'ValueError: unsupported'})
@@ -0,0 +1,44 @@
+import unittest
+from datanator_query_python.benchmark import synthetic
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = synthetic.SyntheticData(scale=2000, seed=1)
+
+    def test_counts(self):
+        counts = self.data.counts()
+        self.assertEqual(counts['uniprot'], 2000)
+        self.assertEqual(len(self.data.species), 20)
+        self.assertEqual(sum(1 for _ in self.data.uniprot()), 2000)
+        self.assertEqual(sum(1 for _ in self.data.pax()), counts['pax'])
+
+    def test_taxon_tree(self):
+        taxa = {doc['tax_id']: doc for doc in self.data.taxon_tree()}
+        species = self.data.species[-1]
+        self.assertEqual(species['rank'], 'species')
+        self.assertEqual(species['anc_id'][0], 131567)
+        for anc_id in species['anc_id']:
+            self.assertIn(anc_id, taxa)
+        ranks = [taxa[anc_id]['rank'] for anc_id in species['canon_anc_ids'][1:]]
+        self.assertEqual(ranks, synthetic.CANON_RANKS[:-1])
+
+    def test_clade_depth(self):
+        data = synthetic.SyntheticData(scale=20000, clade_depth=25)
+        self.assertEqual(max(len(species['anc_id']) for species in data.species), 32)
+        self.assertEqual(max(len(species['canon_anc_ids']) for species in data.species), 7)
+
+    def test_deterministic(self):
+        again = synthetic.SyntheticData(scale=2000, seed=1)
+        self.assertEqual(next(again.sabio_rk_old()), next(self.data.sabio_rk_old()))
+        other = synthetic.SyntheticData(scale=2000, seed=2)
+        self.assertNotEqual(next(other.sabio_rk_old()), next(self.data.sabio_rk_old()))
+
+    def test_shapes(self):
+        protein = next(self.data.uniprot())
+        self.assertIn(protein['ncbi_taxonomy_id'], [s['tax_id'] for s in self.data.species])
+        kinlaw = next(self.data.sabio_rk_old())
+        self.assertIn('substrate_aggregate', kinlaw['reaction_participant'][3])
+        self.assertIn('product_aggregate', kinlaw['reaction_participant'][4])
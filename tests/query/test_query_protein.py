@@ -110,6 +110,52 @@ class TestQueryProtein(unittest.TestCase):
         self.assertEqual(result_0[1]['ko_number'], 'MOCK_0')
         self.assertTrue(isinstance(result_1, dict))
 
+    def test_attach_kegg_meta(self):
+        docs = [{'uniprot_id': 'a', 'ko_number': 'K00001'}, {'uniprot_id': 'b'},
+                {'uniprot_id': 'c', 'ko_number': 'k00001'}, {'uniprot_id': 'd', 'ko_number': 'K00002'}]
+        self.assertEqual(query_protein.QueryProtein._ko_numbers(docs), ['K00001', 'k00001', 'K00002'])
+        kegg_docs = [{'kegg_orthology_id': 'K00001', 'definition': {'name': ['x']}}]
+        result = query_protein.QueryProtein._attach_kegg_meta(docs, kegg_docs)
+        self.assertEqual(result[0]['kegg_meta'], kegg_docs)
+        self.assertEqual(result[2]['kegg_meta'], kegg_docs)
+        self.assertIsNot(result[2]['kegg_meta'], result[0]['kegg_meta'])
+        self.assertNotIn('kegg_meta', result[1])
+        self.assertNotIn('kegg_meta', result[3])
+
+    def test_group_by_ko(self):
+        docs = [{'uniprot_id': 'a', 'ko_number': 'K00002', 'ko_name': ['two'], 'abundances': []},
+                {'uniprot_id': 'b', 'ko_number': 'nan', 'ko_name': ['nan']},
+                {'uniprot_id': 'c', 'ko_number': 'K00001', 'ko_name': ['one']},
+                {'uniprot_id': 'd', 'ko_number': 'K00002', 'ko_name': ['two']},
+                {'uniprot_id': 'e'}]
+        group_by_ko = query_protein.QueryProtein._group_by_ko
+        self.assertEqual(group_by_ko(docs),
+                         [{'ko_number': 'K00002', 'ko_name': ['two'], 'uniprot_ids': ['a', 'd']},
+                          {'ko_number': 'nan', 'ko_name': ['nan'], 'uniprot_ids': ['b']},
+                          {'ko_number': 'K00001', 'ko_name': ['one'], 'uniprot_ids': ['c']},
+                          {'ko_number': 'no number', 'ko_name': ['no name'], 'uniprot_ids': ['e']}])
+        self.assertEqual(group_by_ko(docs, abundance=True, check_nan=True),
+                         [{'ko_number': 'K00002', 'ko_name': ['two'], 'uniprot_ids': {'a': True, 'd': False}},
+                          {'ko_number': 'no number', 'ko_name': ['no name'], 'uniprot_ids': {'b': False, 'e': False}},
+                          {'ko_number': 'K00001', 'ko_name': ['one'], 'uniprot_ids': {'c': False}}])
+        self.assertEqual(group_by_ko(docs, abundance=True, check_nan=True, max_groups=2),
+                         [{'ko_number': 'K00002', 'ko_name': ['two'], 'uniprot_ids': {'a': True, 'd': False}},
+                          {'ko_number': 'no number', 'ko_name': ['no name'], 'uniprot_ids': {'b': False, 'e': False}}])
+        self.assertEqual(group_by_ko(iter(docs), max_groups=0), [])
+
+    def test_info_from_summary(self):
+        doc = {'group_name': ['one'],
+               'members': [{'uniprot_id': 'a', 'abundances': True}, {'uniprot_id': 'b', 'abundances': False}]}
+        info_from_summary = query_protein.QueryProtein._info_from_summary
+        self.assertEqual(info_from_summary(doc, 'k00001', 'ko_number'),
+                         [{'ko_number': 'K00001', 'ko_name': ['one'], 'uniprot_ids': ['a', 'b']}])
+        self.assertEqual(info_from_summary(doc, 'K00001', 'ko_number', abundance=True),
+                         [{'ko_number': 'K00001', 'ko_name': ['one'], 'uniprot_ids': {'a': True, 'b': False}}])
+        self.assertEqual(info_from_summary(None, '1At2', 'orthodb_id'),
+                         [{'orthodb_id': '1at2', 'uniprot_ids': []}])
+        self.assertEqual(query_protein.QueryProtein._summary_query('k00001', 'ko_number'),
+                         {'_id': {'group_type': 'ko_number', 'group_id': 'K00001'}})
+
     @unittest.skip("takes too long.")
     def test_get_meta_by_name_taxon(self):
         name_0 = 'special name'
@@ -196,6 +242,16 @@ class TestQueryProtein(unittest.TestCase):
         self.assertEqual(result_2, [{'abundances': [], 'uniprot_id': 'No proteins that match input',
                                     "species_name": "No proteins that match input"}])
 
+    def test_get_abundance_bulk(self):
+        _id = ['MOCK_2', 'mock_0', 'MOCK_1', 'asdfafd', 'MOCK_4']
+        docs, missing = self.src.get_abundance_bulk(_id, chunk_size=2, max_workers=2)
+        self.assertEqual([doc['uniprot_id'] for doc in docs], ['MOCK_2', 'MOCK_0', 'MOCK_4'])
+        self.assertEqual(missing, ['MOCK_1', 'asdfafd'])
+        pairs = list(self.src.iter_meta_bulk(_id, chunk_size=3, max_workers=1))
+        self.assertEqual([uniprot_id for uniprot_id, _ in pairs], _id)
+        self.assertEqual(pairs[2][1][0]['ko_number'], 'MOCK_0')
+        self.assertEqual(pairs[3][1], [])
+
     def test_get_proximity_abundance_taxon(self):
         result_0 = self.src.get_proximity_abundance_taxon('MOCK_0', max_distance=0)
         self.assertEqual('Please use get_abundance_by_id to check self abundance values', result_0)
@@ -217,6 +273,41 @@ class TestQueryProtein(unittest.TestCase):
         result = self.src.get_equivalent_protein(['uniprot0'], 3, max_depth=2)
         self.assertEqual(len(result[2]['documents']), 0)
 
+    def test_bucket_equivalents(self):
+        ancestor_ids = [1, 2, 3, 4]
+        docs = [{'uniprot_id': 'sibling', 'ncbi_taxonomy_id': 6, 'ancestor_taxon_id': [1, 2, 3, 4]},
+                {'uniprot_id': 'cousin', 'ncbi_taxonomy_id': 7, 'ancestor_taxon_id': [1, 2, 3, 8]},
+                {'uniprot_id': 'deep', 'ncbi_taxonomy_id': 9, 'ancestor_taxon_id': [1, 2, 10, 11, 12]},
+                {'uniprot_id': 'far', 'ncbi_taxonomy_id': 13, 'ancestor_taxon_id': [1, 14]},
+                {'uniprot_id': 'ancestor', 'ncbi_taxonomy_id': 3, 'ancestor_taxon_id': [1, 2]},
+                {'uniprot_id': 'skip', 'ncbi_taxonomy_id': 15, 'ancestor_taxon_id': [1, 2, 16, 4]}]
+        levels = [query_protein.QueryProtein._equivalent_level(doc, ancestor_ids, 3) for doc in docs]
+        self.assertEqual(levels, [0, 1, 2, None, None, None])
+        result = [{'distance': i + 1, 'documents': []} for i in range(3)]
+        query_protein.QueryProtein._bucket_equivalents(docs, ancestor_ids, 3, 2, result)
+        self.assertEqual([[d['uniprot_id'] for d in level['documents']] for level in result],
+                         [['sibling'], ['cousin'], []])
+        self.assertEqual(result[1]['documents'][0], {'uniprot_id': 'cousin', 'ncbi_taxonomy_id': 7, 'depth': 2})
+        query = query_protein.QueryProtein._equivalent_query('K00001', ancestor_ids, 3, [5])
+        self.assertIn({'ancestor_taxon_id': 2}, query['$and'])
+
+    def test_canon_distance(self):
+        canon_distance = query_protein.QueryProtein._canon_distance
+        self.assertEqual(canon_distance(['a', 'b', 'c'], ['a', 'b', 'd', 'e']), 2)
+        self.assertEqual(canon_distance(['a', 'b', 'd', 'e'], ['a', 'b', 'c']), 3)
+        self.assertEqual(canon_distance(['a', 'b'], ['a', 'b']), 1)
+        self.assertEqual(canon_distance(['a'], ['b']), -1)
+        self.assertEqual(canon_distance([], ['a']), -1)
+
+    def test_canon_distances(self):
+        anchor = ['root', 'a', 'b', 'c']
+        species = ['s0', 's1', 's2', 'c', 's4', 'anchor', 's6']
+        canon_ancs = [['root', 'a', 'b', 'c'], ['root', 'a', 'x'], ['other'], ['root', 'a', 'b'],
+                      ['root', 'a', 'b', 'c', 'anchor'], ['root', 'a', 'y'], []]
+        result = self.src._canon_distances('anchor', species, anchor, canon_ancs)
+        self.assertEqual(result.tolist(), [0, 3, -1, 1, 0, 2, -1])
+        self.assertEqual(self.src._canon_distances('anchor', [], anchor, []).tolist(), [])
+
     def test_get_equivalent_protein_with_anchor(self):
 
         result = self.src.get_equivalent_protein_with_anchor('uniprot0', 2, max_depth=2)
@@ -262,6 +353,13 @@ class TestQueryProtein(unittest.TestCase):
         self.assertEqual(ko_number_1, None)
         self.assertEqual(ko_name_1, [])
 
+    def test_get_kegg_orthology_bulk(self):
+        result = self.src.get_kegg_orthology_bulk(['uniprot15', 'aldfja;lfj;', 'uniprot0'], chunk_size=2)
+        self.assertEqual(list(result), ['uniprot15', 'aldfja;lfj;', 'uniprot0'])
+        self.assertEqual(result['uniprot0'], ('KO0', ['KO0 name']))
+        self.assertEqual(result['uniprot15'], ('KO1', ['ko name 1']))
+        self.assertEqual(result['aldfja;lfj;'], (None, []))
+
     def test_get_equivalent_kegg_with_anchor_obsolete(self):
         result_0 = self.src_1.get_equivalent_kegg_with_anchor_obsolete('K03154','Thermus thermophilus HB27', 3, max_depth=2)
         self.assertTrue(len(result_0[0]['documents']) > 0)
@@ -66,6 +66,22 @@ class TestQueryTaxonTree(unittest.TestCase):
         self.assertEqual(result_ids[0], [131567, 2157, 1783276])
         self.assertEqual(result_ids[1], [131567, 2157, 1783276, 743725, 2107589, 2107590])
 
+    def test_get_anc_bulk(self):
+        ids = [743725, -1, 2107591, 743725]
+        self.assertEqual(self.src.get_anc_by_id_bulk(ids, chunk_size=2), self.src.get_anc_by_id(ids))
+        names = ['candidatus diapherotrites', 'nonsense', 'Candidatus Diapherotrites']
+        result_ids, _ = self.src.get_anc_by_name_bulk(names, chunk_size=1)
+        self.assertEqual(result_ids, [[131567, 2157, 1783276], [], [131567, 2157, 1783276]])
+
+    def test_ancestors_in_order(self):
+        docs = [{'tax_name': 'B', 'anc_id': [1, 2], 'anc_name': ['a', 'b']},
+                {'tax_name': 'a', 'anc_id': [1], 'anc_name': ['a']},
+                {'tax_name': 'b', 'anc_id': [3], 'anc_name': ['c']}]
+        src = query_taxon_tree.QueryTaxonTree
+        self.assertEqual(src._ancestors_in_order(['A', 'x', 'b', 'a'], docs, 'tax_name', fold=src._casefold, missing=([], [])),
+                         ([[1], [], [1, 2], [1]], [['a'], [], ['a', 'b'], ['a']]))
+        self.assertEqual(src._ancestors_in_order([5], [], 'tax_id'), ([[-1]], [['not in database']]))
+
     # @unittest.skip('passed')
     def test_get_common_ancestor(self):
         names = ['Candidatus Diapherotrites', 'Candidatus Forterrea multitransposorum CG_2015-17_Forterrea_25_41']
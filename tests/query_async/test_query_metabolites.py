@@ -0,0 +1,21 @@
+import unittest
+import asyncio
+from datanator_query_python.query_async import query_metabolites
+from datanator_query_python.config import config
+
+
+class TestAsyncQueryMetabolites(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        conf = config.TestConfig()
+        cls.src = query_metabolites.AsyncQueryMetabolites(MongoDB=conf.SERVER, db='datanator',
+                 username=conf.USERNAME, password=conf.PASSWORD, readPreference='nearest')
+
+    def test_get_conc_from_inchi(self):
+        loop = asyncio.get_event_loop()
+        inchi = '''InChI=1S/C10H16N5O13P3/c11-8-5-9(13-2-12-8)15(3-14-5)10-7(17)6(16)4(26-10)1-25-30(21,22)28-31(23,24)27-29(18,19)20/h2-4,6-7,10,16-17H,1H2,(H,21,22)(H,23,24)(H2,11,12,13)(H2,18,19,20)/t4-,6-,7-,10-/m1/s1'''
+        result_0 = loop.run_until_complete(self.src.get_conc_from_inchi(inchi))
+        self.assertEqual(len(result_0), 2)
+        result_1 = loop.run_until_complete(self.src.get_conc_from_inchi(inchi, consensus=True))
+        self.assertTrue('consensus_value' in result_1[0])
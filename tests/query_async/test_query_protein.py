@@ -0,0 +1,37 @@
+import unittest
+import asyncio
+from datanator_query_python.query import query_protein
+from datanator_query_python.query_async import query_protein as async_query_protein
+from datanator_query_python.config import config
+
+
+class TestAsyncQueryProtein(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        conf = config.TestConfig()
+        cls.src = async_query_protein.AsyncQueryProtein(server=conf.SERVER, database='datanator',
+                 verbose=True, username=conf.USERNAME,
+                 password=conf.PASSWORD, readPreference='nearest')
+        cls.sync = query_protein.QueryProtein(server=conf.SERVER, database='datanator',
+                 verbose=True, username=conf.USERNAME,
+                 password=conf.PASSWORD, readPreference='nearest')
+
+    def test_get_meta_by_id(self):
+        loop = asyncio.get_event_loop()
+        _id = ['P0A8S5', 'Q8TUR1']
+        result = loop.run_until_complete(self.src.get_meta_by_id(_id))
+        self.assertEqual(result, self.sync.get_meta_by_id(_id))
+        result = loop.run_until_complete(self.src.get_meta_by_id(['aldfja;lfj;']))
+        self.assertEqual(result['uniprot_id'], 'None')
+
+    def test_get_kegg_orthology(self):
+        loop = asyncio.get_event_loop()
+        ko_number, ko_name = loop.run_until_complete(self.src.get_kegg_orthology('aldfja;lfj;'))
+        self.assertEqual(ko_number, None)
+        self.assertEqual(ko_name, [])
+
+    def test_get_info_by_taxonid(self):
+        loop = asyncio.get_event_loop()
+        result = loop.run_until_complete(self.src.get_info_by_taxonid(562))
+        self.assertEqual(result, self.sync.get_info_by_taxonid(562))
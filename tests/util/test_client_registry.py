@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+from datanator_query_python.util import client_registry
+
+
+class DummyClient:
+
+    def __init__(self, uri, **kwargs):
+        self.uri = uri
+        self.kwargs = kwargs
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class DummyMotorClient(DummyClient):
+    pass
+
+
+DummyMotorClient.__module__ = 'motor.motor_asyncio'
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        client_registry.reset()
+
+    def tearDown(self):
+        client_registry.reset()
+
+    def test_get_client(self):
+        a = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        b = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        c = client_registry.get_client('mongodb://a', client_class=DummyClient, replicaSet='rs0')
+        d = client_registry.get_client('mongodb://b', client_class=DummyClient, maxPoolSize=5)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(d.kwargs, {'maxPoolSize': 5})
+        self.assertEqual(client_registry.live_pools(), 3)
+
+    def test_key(self):
+        a = client_registry.get_client('mongodb+srv://u:p@host/datanator?authSource=admin', client_class=DummyClient)
+        b = client_registry.get_client('mongodb+srv://u:p@host/datanator-test?authSource=admin', client_class=DummyClient)
+        c = client_registry.get_client('mongodb+srv://u:p@other/datanator?authSource=admin', client_class=DummyClient)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        d = client_registry.get_client('mongodb://a', client_class=DummyClient, replicaSet='rs0')
+        self.assertEqual(d.kwargs, {'replicaSet': 'rs0'})
+
+    def test_motor_loop(self):
+        loop = asyncio.new_event_loop()
+        other = asyncio.new_event_loop()
+        try:
+            async def get(uri='mongodb://a'):
+                return client_registry.get_client(uri, client_class=DummyMotorClient)
+            a = loop.run_until_complete(get())
+            self.assertIs(loop.run_until_complete(get()), a)
+            self.assertIsNot(other.run_until_complete(get()), a)
+            self.assertEqual(client_registry.live_pools(), 2)
+            loop.close()
+            # clients of closed loops are forgotten
+            other.run_until_complete(get('mongodb://b'))
+            self.assertEqual(client_registry.live_pools(), 2)
+        finally:
+            loop.close()
+            other.close()
+
+    def test_set_override(self):
+        a = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        local = DummyClient('mongodb://localhost')
+        self.assertIsNone(client_registry.set_override(local))
+        self.assertIs(client_registry.get_client('mongodb://b'), local)
+        # other client classes are not overridden
+        self.assertIs(client_registry.get_client('mongodb://a', client_class=DummyClient), a)
+        self.assertIsNone(client_registry.set_override(local, client_class=DummyClient))
+        self.assertIs(client_registry.get_client('mongodb://a', client_class=DummyClient), local)
+        self.assertIs(client_registry.set_override(None, client_class=DummyClient), local)
+        self.assertIs(client_registry.set_override(None), local)
+        self.assertIs(client_registry.get_client('mongodb://a', client_class=DummyClient), a)
+
+    def test_close_client(self):
+        a = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        self.assertTrue(client_registry.close_client('mongodb://a', client_class=DummyClient))
+        self.assertTrue(a.closed)
+        self.assertFalse(client_registry.close_client('mongodb://a', client_class=DummyClient))
+        self.assertEqual(client_registry.live_pools(), 0)
+
+    def test_close_all_reset(self):
+        a = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        client_registry.close_all()
+        self.assertTrue(a.closed)
+        b = client_registry.get_client('mongodb://a', client_class=DummyClient)
+        client_registry.reset()
+        self.assertFalse(b.closed)
+        self.assertEqual(client_registry.live_pools(), 0)
@@ -0,0 +1,66 @@
+import unittest
+import datetime
+import time
+import mongomock
+from pymongo.errors import OperationFailure
+from datanator_query_python.util import collection_stats
+
+
+class TestCollectionStats(unittest.TestCase):
+
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.db.uniprot.insert_many([{'uniprot_id': 'a', 'ncbi_taxonomy_id': 1},
+                                     {'uniprot_id': 'b', 'ncbi_taxonomy_id': 1},
+                                     {'uniprot_id': 'c', 'ncbi_taxonomy_id': 2},
+                                     {'uniprot_id': 'd'}])
+        self.src = collection_stats.StatsService(max_age=3600, persist=True)
+
+    def test_distinct_count_pipeline(self):
+        pipeline = collection_stats.distinct_count_pipeline('taxon_id')
+        self.assertEqual(pipeline[1], {'$group': {'_id': '$taxon_id'}})
+        self.assertEqual(self.src.refresh(self.db.uniprot, 'taxon_id'), 0)
+        pipeline = collection_stats.distinct_count_pipeline('ncbi_taxonomy_id')
+        self.assertEqual(list(self.db.uniprot.aggregate(pipeline)), [{'n': 2}])
+
+    def test_get(self):
+        self.assertEqual(self.src.get(self.db.uniprot, 'ncbi_taxonomy_id'), 2)
+        stored = self.db.collection_stats.find_one({'_id': 'uniprot.ncbi_taxonomy_id'})
+        self.assertEqual(stored['value'], 2)
+        # served from memory
+        self.db.uniprot.insert_one({'uniprot_id': 'e', 'ncbi_taxonomy_id': 3})
+        self.assertEqual(self.src.get(self.db.uniprot, 'ncbi_taxonomy_id'), 2)
+        # served from the stats collection by another process
+        self.assertEqual(collection_stats.StatsService().get(self.db.uniprot, 'ncbi_taxonomy_id'), 2)
+        self.assertEqual(self.src.refresh(self.db.uniprot, 'ncbi_taxonomy_id'), 3)
+        self.assertEqual(self.src.get(self.db.uniprot, 'uniprot_id'), 5)
+
+    def test_persist(self):
+        src = collection_stats.StatsService()
+        self.assertEqual(src.get(self.db.uniprot, 'ncbi_taxonomy_id'), 2)
+        self.assertIsNone(self.db.collection_stats.find_one({'_id': 'uniprot.ncbi_taxonomy_id'}))
+
+        def replace_one(*args, **kwargs):
+            raise OperationFailure('not authorized')
+        self.db.collection_stats.replace_one = replace_one
+        self.assertEqual(self.src.get(self.db.uniprot, 'uniprot_id'), 4)
+        self.assertEqual(self.src._values[(self.db.uniprot.full_name, 'uniprot_id')][0], 4)
+
+    def test_get_stale(self):
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=2)
+        self.db.collection_stats.insert_one({'_id': 'uniprot.uniprot_id', 'value': 1, 'computed_at': old})
+        self.assertEqual(self.src.get(self.db.uniprot, 'uniprot_id'), 1)
+        # the refresh runs in the background
+        deadline = time.monotonic() + 5
+        while self.src._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.src.get(self.db.uniprot, 'uniprot_id'), 4)
+        self.assertEqual(self.db.collection_stats.find_one({'_id': 'uniprot.uniprot_id'})['value'], 4)
+
+    def test_refresh_all(self):
+        self.db.sabio_rk_old.insert_many([{'kinlaw_id': 1, 'taxon_id': 9}, {'kinlaw_id': 2, 'taxon_id': 9}])
+        result = collection_stats.refresh_all(self.db, collections=['sabio_rk_old'])
+        self.assertEqual(result, {'sabio_rk_old.kinlaw_id': 2, 'sabio_rk_old.taxon_id': 1})
+        self.assertEqual(self.db.collection_stats.find_one({'_id': 'sabio_rk_old.kinlaw_id'})['value'], 2)
+        # read by a non-persisting service without counting
+        self.assertEqual(collection_stats.StatsService().get(self.db.sabio_rk_old, 'taxon_id'), 1)
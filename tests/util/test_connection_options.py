@@ -0,0 +1,45 @@
+import unittest
+from datanator_query_python.util import connection_options, pool_metrics, client_registry
+from datanator_query_python.config import config
+
+
+class DummyClient:
+
+    def __init__(self, uri, **kwargs):
+        self.kwargs = kwargs
+
+    def close(self):
+        pass
+
+
+class TestConnectionOptions(unittest.TestCase):
+
+    def tearDown(self):
+        client_registry.reset()
+
+    def test_client_kwargs(self):
+        options = connection_options.ConnectionOptions(max_pool_size=10, compressors='zstd,snappy')
+        kwargs = options.client_kwargs()
+        self.assertEqual(kwargs['maxPoolSize'], 10)
+        self.assertEqual(kwargs['compressors'], 'zstd,snappy')
+        self.assertNotIn('socketTimeoutMS', kwargs)
+        self.assertNotIn('event_listeners', kwargs)
+        metrics = pool_metrics.PoolMetrics()
+        kwargs = options._replace(pool_metrics=metrics).client_kwargs()
+        self.assertEqual(kwargs['event_listeners'], [metrics])
+
+    def test_registry(self):
+        options = connection_options.ConnectionOptions(max_pool_size=10)
+        a = client_registry.get_client('mongodb://a', client_class=DummyClient, options=options)
+        b = client_registry.get_client('mongodb://a', client_class=DummyClient,
+                                       options=connection_options.ConnectionOptions(max_pool_size=10))
+        c = client_registry.get_client('mongodb://a', client_class=DummyClient,
+                                       options=connection_options.ConnectionOptions(max_pool_size=20))
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(a.kwargs['maxPoolSize'], 10)
+
+    def test_atlas_config(self):
+        options = config.AtlasConfig.connection_options()
+        self.assertIsInstance(options.max_pool_size, int)
+        self.assertIsInstance(options.server_selection_timeout_ms, int)
@@ -0,0 +1,85 @@
+import unittest
+from datanator_query_python.util import explain_audit
+from datanator_query_python.benchmark import synthetic
+
+
+COLLSCAN = {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}},
+            'executionStats': {'nReturned': 2, 'totalDocsExamined': 1000, 'totalKeysExamined': 0,
+                               'executionStages': {'stage': 'COLLSCAN'}}}
+SORTED = {'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'FETCH',
+                                                                          'inputStage': {'stage': 'IXSCAN'}}}},
+          'executionStats': {'nReturned': 5, 'totalDocsExamined': 5, 'totalKeysExamined': 5}}
+AGGREGATE = {'stages': [{'$cursor': {'queryPlanner': {'winningPlan': {'stage': 'FETCH',
+                                                                      'inputStage': {'stage': 'IXSCAN'}}},
+                                     'executionStats': {'nReturned': 3, 'totalDocsExamined': 3,
+                                                        'totalKeysExamined': 3}}},
+                        {'$lookup': {'from': 'kegg_orthology'}}]}
+
+
+class FakeCollection:
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def find_one(self, query):
+        return self.doc
+
+
+class FakeDatabase:
+
+    def __init__(self, name, docs, plan):
+        self.name = name
+        self.docs = docs
+        self.plan = plan
+        self.commands = []
+
+    def __getitem__(self, collection):
+        return FakeCollection(self.docs.get(collection))
+
+    def command(self, name, command, verbosity=None):
+        self.commands.append(command)
+        return self.plan
+
+
+class TestExplainAudit(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        data = synthetic.SyntheticData(scale=1000)
+        cls.docs = {'uniprot': next(data.uniprot()),
+                    'taxon_tree': data.species[0],
+                    'sabio_rk_old': next(data.sabio_rk_old()),
+                    'metabolites_meta': next(data.metabolites_meta()),
+                    'rna_halflife_new': next(data.rna_halflife_new()),
+                    'pax': next(data.pax()),
+                    'observation': {'identifier': {'namespace': 'uniprot_id', 'value': 'P00000'}}}
+
+    def test_summarize(self):
+        summary = explain_audit.summarize(COLLSCAN)
+        self.assertEqual(summary['stages'], ['COLLSCAN'])
+        self.assertEqual(summary['ratio'], 500)
+        self.assertEqual(explain_audit.problems(summary), ['COLLSCAN', 'RATIO'])
+        summary = explain_audit.summarize(SORTED)
+        self.assertEqual(summary['stages'], ['FETCH', 'IXSCAN', 'SORT'])
+        self.assertEqual(explain_audit.problems(summary), ['SORT'])
+        summary = explain_audit.summarize(AGGREGATE)
+        self.assertEqual(summary['n_returned'], 3)
+        self.assertEqual(explain_audit.problems(summary), [])
+
+    def test_builds(self):
+        for audit in explain_audit.AUDITS:
+            spec = audit.build(self.docs[audit.collection])
+            self.assertTrue('filter' in spec or 'pipeline' in spec, audit.name)
+
+    def test_run(self):
+        database = FakeDatabase('datanator', self.docs, COLLSCAN)
+        client = {'datanator': database, 'datanator-test': database, 'datanator-demo': database}
+        results = explain_audit.run(client, names=['QueryProtein.get_all_ortho', 'QueryObs.get_entity_datatype'])
+        self.assertEqual([r['name'] for r in results], ['QueryProtein.get_all_ortho', 'QueryObs.get_entity_datatype'])
+        self.assertEqual(results[0]['problems'], ['COLLSCAN', 'RATIO'])
+        self.assertEqual(list(database.commands[0]['hint']), ['abu_exist', 'orthodb_id'])
+        self.assertEqual(database.commands[1]['collation'], explain_audit.COLLATION)
+        self.assertIn('FAIL  QueryProtein.get_all_ortho', explain_audit.report(results))
+        empty = FakeDatabase('datanator', {}, COLLSCAN)
+        results = explain_audit.run({'datanator': empty}, names=['QueryPax.get_file_by_ncbi_id'])
+        self.assertEqual(results[0]['skipped'], 'no sample document')
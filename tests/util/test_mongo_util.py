@@ -63,6 +63,53 @@ class TestMongoUtil(unittest.TestCase):
         num, results = self.src_test.get_duplicates(self.duplicate, "name")
         self.assertEqual(num, 1)
 
+    def test_find_with_count(self):
+        collection = self.src_test.db_obj[self.duplicate]
+        docs, count = self.src_test.find_with_count(collection, {'name': 'mike'}, projection={'_id': 0},
+                                                    sort=[('num', -1)], limit=1)
+        self.assertEqual(docs, [{'name': 'mike', 'num': 3}])
+        self.assertEqual(count, 2)
+        _, count = self.src_test.find_with_count(collection, {}, max_count=3)
+        self.assertEqual(count, 3)
+        _, count = self.src_test.find_with_count(collection, {}, approximate=True)
+        self.assertEqual(count, 4)
+        docs, count = self.src_test.find_with_count(collection, {}, projection={'_id': 0},
+                                                    sort=[('num', 1)], skip=3)
+        self.assertEqual(docs, [{'name': 'mike', 'num': 3}])
+        self.assertEqual(count, 4)
+        docs, count = self.src_test.find_with_count(collection, {'name': 'mike'},
+                                                    stages=[{'$project': {'_id': 0, 'num': 1}}])
+        self.assertEqual(sorted(doc['num'] for doc in docs), [0, 3])
+        self.assertEqual(count, 2)
+        docs, count = self.src_test.find_with_count(collection, {'name': 'mike'}, filters=False,
+                                                    stages=[{'$sort': {'num': -1}}, {'$project': {'_id': 0}}])
+        self.assertEqual([doc['num'] for doc in docs], [3, 0])
+        self.assertEqual(count, 2)
+
+    def test_find_page(self):
+        collection = self.src_test.db_obj[self.duplicate]
+        docs, token = self.src_test.find_page(collection, {}, key='num', size=3, projection={'_id': 0})
+        self.assertEqual([doc['num'] for doc in docs], [0, 1, 2])
+        docs, token = self.src_test.find_page(collection, {}, key='num', size=3, page_token=token,
+                                              projection={'_id': 0, 'name': 1})
+        self.assertEqual(docs, [{'name': 'mike'}])
+        self.assertIsNone(token)
+
+    def test_iter_find(self):
+        collection = self.src_test.db_obj[self.duplicate]
+        docs = self.src_test.iter_find(collection, {}, projection={'_id': 0}, batch_size=1,
+                                       sort=[('num', 1)])
+        self.assertEqual(next(docs)['num'], 0)
+        docs.close()
+        docs = list(self.src_test.iter_find(collection, {'name': 'mike'}, limit=1))
+        self.assertEqual(len(docs), 1)
+
+    def test_map_chunks(self):
+        result = list(self.src_test.map_chunks(sum, range(10), chunk_size=3, max_workers=2))
+        self.assertEqual(result, [([0, 1, 2], 3), ([3, 4, 5], 12), ([6, 7, 8], 21), ([9], 9)])
+        result = list(self.src_test.map_chunks(len, iter([]), chunk_size=3, max_workers=1))
+        self.assertEqual(result, [])
+
     @unittest.skip('duplicate removed')
     def test_get_duplicates_real(self):
         num, results = self.src.get_duplicates('taxon_tree', 'tax_id', allowDiskUse=True)
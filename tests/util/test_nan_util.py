@@ -0,0 +1,22 @@
+import unittest
+import simplejson as json
+from datanator_query_python.util import nan_util
+
+
+class TestNanUtil(unittest.TestCase):
+
+    def test_replace_nan(self):
+        doc = {'mass': float('nan'), 'length': 3, 'name': 'nan',
+               'abundances': [{'abundance': float('inf')}, {'abundance': 1.5}, [float('-inf'), 2.0]],
+               'nested': {'deeper': {'value': float('nan')}}}
+        expected = json.loads(json.dumps(doc, ignore_nan=True))
+        result = nan_util.replace_nan(doc)
+        self.assertIs(result, doc)
+        self.assertEqual(result, expected)
+        self.assertEqual(result['abundances'][2], [None, 2.0])
+
+    def test_replace_nan_scalar(self):
+        self.assertIsNone(nan_util.replace_nan(float('nan')))
+        self.assertEqual(nan_util.replace_nan(1.0), 1.0)
+        self.assertEqual(nan_util.replace_nan('x'), 'x')
+        self.assertEqual(nan_util.replace_nan([]), [])
@@ -0,0 +1,23 @@
+import unittest
+from bson.objectid import ObjectId
+from datanator_query_python.util import pagination
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_round_trip(self):
+        _id = ObjectId('5ca29231d4378913c58e07d7')
+        token = pagination.encode_token('_id', _id)
+        self.assertNotIn('=', token)
+        self.assertEqual(pagination.decode_token(token, '_id'), _id)
+        token = pagination.encode_token('kinlaw_id', 123)
+        self.assertEqual(pagination.decode_token(token, 'kinlaw_id'), 123)
+
+    def test_invalid(self):
+        token = pagination.encode_token('kinlaw_id', 123)
+        with self.assertRaises(ValueError):
+            pagination.decode_token(token, '_id')
+        with self.assertRaises(ValueError):
+            pagination.decode_token('!!!', '_id')
+        with self.assertRaises(ValueError):
+            pagination.decode_token('abc', '_id')
@@ -0,0 +1,34 @@
+import unittest
+from types import SimpleNamespace
+from datanator_query_python.util import pool_metrics
+
+
+class TestPoolMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.src = pool_metrics.PoolMetrics()
+        self.event = SimpleNamespace(address=('localhost', 27017))
+
+    def test_checkout(self):
+        self.src.pool_created(self.event)
+        self.src.connection_created(self.event)
+        self.src.connection_check_out_started(self.event)
+        self.src.connection_checked_out(self.event)
+        snapshot = self.src.snapshot()
+        server = snapshot['servers']['localhost:27017']
+        self.assertEqual(server['checked_out'], 1)
+        self.assertEqual(server['connections_created'], 1)
+        self.assertGreaterEqual(server['wait_queue_time_total'], 0)
+        self.src.connection_checked_in(self.event)
+        self.src.connection_check_out_started(self.event)
+        self.src.connection_check_out_failed(self.event)
+        total = self.src.snapshot()['total']
+        self.assertEqual(total['checked_out'], 0)
+        self.assertEqual(total['checkouts'], 1)
+        self.assertEqual(total['checkout_failures'], 1)
+        self.assertIn('wait_queue_time_mean', total)
+
+    def test_reset(self):
+        self.src.connection_created(self.event)
+        self.src.reset()
+        self.assertEqual(self.src.snapshot(), {'servers': {}, 'total': {}})
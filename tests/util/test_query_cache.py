@@ -0,0 +1,92 @@
+import unittest
+import time
+from types import SimpleNamespace
+from datanator_query_python.util import query_cache
+
+
+class Source:
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.collection = SimpleNamespace(name='taxon_tree', full_name='datanator-test.taxon_tree')
+        self.calls = 0
+
+    @query_cache.cached()
+    def get_anc_by_id(self, ids):
+        self.calls += 1
+        return [[1, 2, _id] for _id in ids]
+
+    @query_cache.cached(casefold=True)
+    def get_by_name(self, name):
+        self.calls += 1
+        return {'name': name}
+
+    @query_cache.cached(ttl=0.05)
+    def get_short_lived(self, _id):
+        self.calls += 1
+        return _id
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = query_cache.LRUCache(max_entries=3)
+        self.src = Source(cache=self.cache)
+
+    def test_no_cache(self):
+        src = Source()
+        src.get_anc_by_id([1])
+        src.get_anc_by_id([1])
+        self.assertEqual(src.calls, 2)
+
+    def test_hit_and_normalization(self):
+        self.assertEqual(self.src.get_anc_by_id([3, 4]), [[1, 2, 3], [1, 2, 4]])
+        result = self.src.get_anc_by_id((3, 4))
+        self.assertEqual(result, [[1, 2, 3], [1, 2, 4]])
+        result.append('mutated')
+        self.assertEqual(self.src.get_anc_by_id([3, 4]), [[1, 2, 3], [1, 2, 4]])
+        self.assertEqual(self.src.calls, 1)
+        self.src.get_by_name('ATP')
+        self.src.get_by_name('atp')
+        self.assertEqual(self.src.calls, 2)
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['methods']['Source.get_by_name'], {'hits': 1, 'misses': 1})
+
+    def test_lru_bounds(self):
+        for i in range(4):
+            self.src.get_anc_by_id([i])
+        self.assertEqual(self.cache.stats()['entries'], 3)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.src.get_anc_by_id([0])
+        self.assertEqual(self.src.calls, 5)
+        cache = query_cache.LRUCache(max_bytes=200)
+        src = Source(cache=cache)
+        src.get_anc_by_id(list(range(100)))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_ttl(self):
+        self.src.get_short_lived(1)
+        self.src.get_short_lived(1)
+        self.assertEqual(self.src.calls, 1)
+        time.sleep(0.06)
+        self.src.get_short_lived(1)
+        self.assertEqual(self.src.calls, 2)
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_invalidate(self):
+        self.src.get_anc_by_id([1])
+        self.src.get_by_name('ATP')
+        self.assertEqual(self.cache.invalidate('taxon_tree'), 2)
+        self.assertEqual(self.cache.invalidate('datanator-test.taxon_tree'), 0)
+        self.src.get_anc_by_id([1])
+        self.assertEqual(self.src.calls, 3)
+        self.cache.clear()
+        self.assertEqual(self.cache.stats()['bytes'], 0)
+
+    def test_entry_key(self):
+        self.src.get_by_name('ATP')
+        key = query_cache.entry_key('Source.get_by_name', self.src.collection, ('atp',), casefold=True)
+        self.assertIsNotNone(self.cache.get(key))
+        self.assertIsNone(self.cache.get(query_cache.entry_key('Source.get_by_name', self.src.collection, ('ATP',))))
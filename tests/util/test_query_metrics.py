@@ -0,0 +1,104 @@
+import unittest
+from datanator_query_python.util import query_metrics, connection_options, mongo_util
+
+
+class Event:
+
+    def __init__(self, reply, duration_micros=2000):
+        self.reply = reply
+        self.duration_micros = duration_micros
+
+
+class DummyQuery:
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def send(self, n):
+        self.metrics.succeeded(Event({'cursor': {'firstBatch': [{'a': 1}] * n}, 'ok': 1}))
+
+    def get_one(self):
+        self.send(1)
+        return 'one'
+
+    def get_many(self, rounds):
+        for _ in range(rounds):
+            self.send(2)
+        return self.get_one()
+
+    def iter_docs(self, rounds):
+        for i in range(rounds):
+            self.send(1)
+            yield i
+
+    def get_bulk(self, ids):
+        return [r for _, r in mongo_util.MongoUtil.map_chunks(lambda chunk: self.send(len(chunk)), ids,
+                                                              chunk_size=2, max_workers=2)]
+
+    def get_error(self):
+        self.metrics.failed(Event({}))
+        raise ValueError('error')
+
+
+class TestQueryMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = query_metrics.QueryMetrics()
+        self.query = query_metrics.instrument(DummyQuery(self.metrics), self.metrics,
+                                              methods=['get_one', 'get_many', 'iter_docs', 'get_error', 'get_bulk'])
+
+    def test_calls(self):
+        self.assertEqual(self.query.get_one(), 'one')
+        self.assertEqual(self.query.get_many(3), 'one')
+        stats = self.metrics.snapshot()
+        self.assertEqual(stats['DummyQuery.get_one']['calls'], 1)
+        many = stats['DummyQuery.get_many']
+        self.assertEqual(many['calls'], 1)
+        self.assertEqual(many['round_trips']['sum'], 4)
+        self.assertEqual(many['round_trips']['buckets']['5'], 1)
+        self.assertEqual(many['docs_returned'], 7)
+        self.assertGreater(many['bytes_received'], 0)
+        self.assertAlmostEqual(many['command_seconds'], 0.008)
+        self.assertEqual(many['latency_seconds']['count'], 1)
+
+    def test_worker_threads(self):
+        self.query.get_bulk(list(range(7)))
+        stats = self.metrics.snapshot()
+        self.assertEqual(stats['DummyQuery.get_bulk']['round_trips']['sum'], 4)
+        self.assertEqual(stats['DummyQuery.get_bulk']['docs_returned'], 7)
+        self.assertNotIn(query_metrics.UNTRACKED, stats)
+
+    def test_generator_and_errors(self):
+        docs = self.query.iter_docs(3)
+        self.assertEqual(next(docs), 0)
+        docs.close()
+        with self.assertRaises(ValueError):
+            self.query.get_error()
+        self.query.send(5)
+        stats = self.metrics.snapshot()
+        self.assertEqual(stats['DummyQuery.iter_docs']['round_trips']['sum'], 1)
+        self.assertEqual(stats['DummyQuery.get_error']['failed'], 1)
+        self.assertEqual(stats[query_metrics.UNTRACKED]['docs_returned'], 5)
+
+    def test_export(self):
+        self.query.get_many(2)
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE datanator_query_call_seconds histogram', text)
+        self.assertIn('datanator_query_round_trips_bucket{method="DummyQuery.get_many",le="5"} 1', text)
+        self.assertIn('datanator_query_docs_returned_total{method="DummyQuery.get_many"} 5', text)
+        self.assertIn('"DummyQuery.get_many"', self.metrics.to_json())
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_instrument_all(self):
+        metrics = query_metrics.QueryMetrics(measure_bytes=False)
+        query = query_metrics.instrument(DummyQuery(metrics), metrics)
+        query.get_one()
+        self.assertEqual(metrics.snapshot()['DummyQuery.get_one']['bytes_received'], 0)
+        self.assertNotIn('DummyQuery.send', metrics.snapshot())
+        self.assertIs(DummyQuery(metrics).get_one.__func__, DummyQuery.get_one)
+
+    def test_connection_options(self):
+        metrics = query_metrics.QueryMetrics()
+        kwargs = connection_options.ConnectionOptions(query_metrics=metrics).client_kwargs()
+        self.assertEqual(kwargs['event_listeners'], [metrics])
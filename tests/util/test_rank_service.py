@@ -0,0 +1,52 @@
+import unittest
+import mongomock
+from datanator_query_python.util import rank_service
+
+
+class TestRankService(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.taxon_tree
+        self.collection.insert_many([{'tax_id': 131567, 'rank': 'no rank', 'tax_name': 'cellular organisms'},
+                                     {'tax_id': 2, 'rank': 'superkingdom', 'tax_name': 'Bacteria'},
+                                     {'tax_id': 3, 'rank': 'no rank', 'tax_name': 'c'},
+                                     {'tax_id': 4, 'rank': 'phylum', 'tax_name': 'd'},
+                                     {'tax_id': 5, 'tax_name': 'e'}])
+        self.src = rank_service.RankService(batch_size=2)
+        self.queries = 0
+        find = self.collection.find
+
+        def counting_find(*args, **kwargs):
+            self.queries += 1
+            return find(*args, **kwargs)
+        self.collection.find = counting_find
+
+    def test_label(self):
+        self.assertEqual(rank_service.label(2, 'superkingdom'), 'superkingdom')
+        self.assertEqual(rank_service.label(131567, 'no rank'), 'cellular organisms')
+        self.assertEqual(rank_service.label(3, 'no rank'), '+')
+        self.assertEqual(rank_service.label(3, None), '+')
+
+    def test_labels(self):
+        ids = [131567, 2, 3, 4, 5, 99]
+        self.assertEqual(self.src.labels(self.collection, ids),
+                         ['cellular organisms', 'superkingdom', '+', 'phylum', '+', '+'])
+        self.assertEqual(self.queries, 3)
+        # known ids are served from memory, unknown ones are looked up again
+        self.assertEqual(self.src.resolve(self.collection, [4, 99]), ['phylum', None])
+        self.assertEqual(self.queries, 4)
+        self.src.clear(self.collection)
+        self.assertEqual(self.src.resolve(self.collection, [4]), ['phylum'])
+        self.assertEqual(self.queries, 5)
+
+    def test_preload(self):
+        self.assertEqual(self.src.preload(self.collection), 5)
+        self.assertEqual(self.src.labels(self.collection, [2, 99]), ['superkingdom', '+'])
+        self.assertEqual(self.queries, 1)
+
+    def test_canonical_lineage(self):
+        ids, names = self.src.canonical_lineage(self.collection, [131567, 2, 3, 4],
+                                                ['cellular organisms', 'Bacteria', 'c', 'd'])
+        self.assertEqual(ids, [131567, 2, 4])
+        self.assertEqual(names, ['cellular organisms', 'Bacteria', 'd'])
+        self.assertEqual(self.src.canonical_lineage(self.collection, [3, 4]), ([4], None))
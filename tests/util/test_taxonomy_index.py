@@ -0,0 +1,104 @@
+import unittest
+import mongomock
+from datanator_query_python.util import taxonomy_index
+
+
+class TestTaxonomyIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        #        131567
+        #       /      \
+        #      2 (sk)   10 (sk)
+        #     / \        \
+        #    3   4 (p)    11 (p)
+        #   /     \
+        #  5 (c)   6 (c)
+        #  |
+        #  7 (s)
+        cls.docs = [{'tax_id': 131567, 'anc_id': [], 'rank': 'no rank', 'tax_name': 'cellular organisms'},
+                    {'tax_id': 2, 'anc_id': [131567], 'rank': 'superkingdom', 'tax_name': 'b'},
+                    {'tax_id': 3, 'anc_id': [131567, 2], 'rank': 'no rank', 'tax_name': 'c'},
+                    {'tax_id': 4, 'anc_id': [131567, 2], 'rank': 'phylum', 'tax_name': 'd'},
+                    {'tax_id': 5, 'anc_id': [131567, 2, 3], 'rank': 'class', 'tax_name': 'e'},
+                    {'tax_id': 6, 'anc_id': [131567, 2, 4], 'rank': 'class', 'tax_name': 'f'},
+                    {'tax_id': 7, 'anc_id': [131567, 2, 3, 5], 'rank': 'species', 'tax_name': 'g'},
+                    {'tax_id': 10, 'anc_id': [131567], 'rank': 'superkingdom', 'tax_name': 'h'},
+                    {'tax_id': 11, 'anc_id': [131567, 10], 'rank': 'phylum', 'tax_name': 'i'},
+                    {'tax_id': 20, 'anc_id': [], 'rank': 'no rank', 'tax_name': 'other root'}]
+        cls.src = taxonomy_index.TaxonomyIndex.from_docs(cls.docs, names=True, block=2)
+
+    def test_lca(self):
+        self.assertEqual(self.src.lca(7, 6), 2)
+        self.assertEqual(self.src.lca(7, 5), 5)
+        self.assertEqual(self.src.lca(7, 11), 131567)
+        self.assertEqual(self.src.lca(7, 7), 7)
+        self.assertIsNone(self.src.lca(7, 20))
+        self.assertIsNone(self.src.lca(7, 99))
+        self.assertEqual(self.src.lca_many([7, 7, 6, 99], [6, 11, 4, 1]).tolist(), [2, 131567, 4, -1])
+
+    def test_common_ancestor(self):
+        self.assertEqual(self.src.common_ancestor(7, 6), (2, [3, 2]))
+        self.assertEqual(self.src.common_ancestor(7, 5), (3, [2, 1]))
+        self.assertIsNone(self.src.common_ancestor(131567, 7))
+        self.assertIsNone(self.src.common_ancestor(7, 20))
+
+    def test_canon_distance(self):
+        # canonical ancestors of 7: 131567, 2, 5; of 6: 131567, 2, 4
+        self.assertEqual(self.src.canon_distance(7, 6), (2, 2))
+        self.assertEqual(self.src.canon_distance(7, 11), (3, 2))
+        self.assertIsNone(self.src.canon_distance(7, 99))
+
+    def test_subtree(self):
+        self.assertTrue(self.src.is_under(7, 2))
+        self.assertFalse(self.src.is_under(2, 2))
+        self.assertFalse(self.src.is_under(6, 3))
+        self.assertEqual(self.src.each_under([7, 6, 11, 99], 2).tolist(), [True, True, False, False])
+        self.assertEqual(sorted(self.src.subtree(3).tolist()), [3, 5, 7])
+        self.assertEqual(self.src.subtree(99).tolist(), [])
+
+    def test_ancestors(self):
+        self.assertEqual(self.src.ancestors(7), [131567, 2, 3, 5])
+        self.assertEqual(self.src.ancestors(7, canonical=True), [131567, 2, 5])
+        self.assertEqual(self.src.name(7), 'g')
+        self.assertEqual(self.src.rank_of(7), 'species')
+        self.assertIsNone(self.src.rank_of(99))
+        self.assertIn(20, self.src)
+        self.assertNotIn(99, self.src)
+
+    def test_missing_ancestor_document(self):
+        docs = [d for d in self.docs if d['tax_id'] != 3]
+        src = taxonomy_index.TaxonomyIndex.from_docs(docs)
+        self.assertEqual(src.ancestors(7), [131567, 2, 3, 5])
+        self.assertEqual(src.lca(7, 6), 2)
+
+    def test_intervals(self):
+        tax_ids, left, right = self.src.intervals()
+        labels = {t: (l, r) for t, l, r in zip(tax_ids.tolist(), left.tolist(), right.tolist())}
+        self.assertEqual(sorted(labels), sorted(d['tax_id'] for d in self.docs))
+        for doc in self.docs:
+            for other in self.docs:
+                inside = labels[doc['tax_id']][0] < labels[other['tax_id']][0] <= labels[doc['tax_id']][1]
+                self.assertEqual(inside, doc['tax_id'] in other['anc_id'])
+
+    def test_nbytes(self):
+        sizes = self.src.nbytes()
+        self.assertEqual(sizes['total'], sum(v for k, v in sizes.items() if k != 'total'))
+
+    def test_get_refresh(self):
+        collection = mongomock.MongoClient().db.taxon_tree
+        collection.insert_many([dict(d) for d in self.docs])
+        taxonomy_index.reset()
+        index = taxonomy_index.get(collection)
+        self.assertIs(taxonomy_index.get(collection), index)
+        collection.insert_one({'tax_id': 8, 'anc_id': [131567, 2, 3, 5, 7], 'rank': 'no rank'})
+        self.assertNotIn(8, taxonomy_index.get(collection))
+        self.assertIn(8, taxonomy_index.refresh(collection))
+        self.assertIn(8, taxonomy_index.get(collection))
+        index = taxonomy_index.get(collection)
+        self.assertIsNone(index.names)
+        # an index without names is rebuilt for a caller that needs them
+        index = taxonomy_index.get(collection, names=True)
+        self.assertIsNotNone(index.names)
+        self.assertIs(taxonomy_index.get(collection), index)
+        taxonomy_index.reset()